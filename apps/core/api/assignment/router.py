@@ -3,6 +3,7 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import status as HTTP_STATUS
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from apps.core.api.assignment.schemas import (
@@ -10,14 +11,17 @@ from apps.core.api.assignment.schemas import (
     AssignmentListSchema,
     AssignmentSchema,
 )
-from apps.core.api.authentication.controller import get_current_user
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+)
 from apps.core.api.authorization.controller import validate_transaction_access
+from apps.core.api.authorization.permissions import refresh_user_permissions
 from apps.core.api.transaction.enum_operation_code import (
     EnumOperationCode as op,
 )
 from apps.core.database.session import get_session
 from apps.core.models.assignment import Assignment
-from apps.core.models.user import User
 from apps.packpage.base_schemas import SimpleMessageSchema
 from apps.packpage.client_ip import get_client_ip
 from apps.packpage.exceptions import (
@@ -30,7 +34,7 @@ router = APIRouter()
 controller = GenericController(Assignment)
 
 SessionDep = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.get(
@@ -90,6 +94,7 @@ def create_assignment(
             detail='Object ASSIGNMENT was not accepted',
         ) from ex
 
+    refresh_user_permissions(db_session, [new_assignment.user_id])
     return new_assignment
 
 
@@ -108,6 +113,12 @@ def update_assignment(
     """Update an existing assignment."""
     validate_transaction_access(db_session, current_user, op.OP_1010002.value)
 
+    # A atribuição pode trocar de usuário: os dois precisam ser recalculados.
+    affected_users = set(
+        db_session.scalars(
+            select(Assignment.user_id).where(Assignment.id == assignment_id)
+        ).all()
+    )
     new_assignment: Assignment = Assignment(**assignment.model_dump())
     new_assignment.id = assignment_id
     new_assignment.audit_user_ip = get_client_ip(request)
@@ -121,6 +132,9 @@ def update_assignment(
             detail='Object ASSIGNMENT was not accepted',
         ) from ex
 
+    refresh_user_permissions(
+        db_session, affected_users | {new_assignment.user_id}
+    )
     return new_assignment
 
 
@@ -135,6 +149,11 @@ def delete_assignment(
     """Delete an assignment."""
     validate_transaction_access(db_session, current_user, op.OP_1010004.value)
 
+    affected_users = set(
+        db_session.scalars(
+            select(Assignment.user_id).where(Assignment.id == assignment_id)
+        ).all()
+    )
     try:
         controller.delete(db_session, assignment_id)
     except ObjectNotFoundException as ex:
@@ -142,4 +161,5 @@ def delete_assignment(
             status_code=HTTP_STATUS.HTTP_404_NOT_FOUND, detail=ex.args[0]
         ) from ex
 
+    refresh_user_permissions(db_session, affected_users)
     return {'detail': 'Assignment deleted successfully'}
@@ -1,9 +1,11 @@
 """Authentication controller module."""
+from dataclasses import dataclass
 from typing import Annotated
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
+from sqlalchemy import select
 
 from apps.core.api.authentication.schemas import TokenData
 from apps.core.api.user.controller import UserController
@@ -11,13 +13,15 @@ from apps.core.database.session import Session, get_session
 from apps.core.models.user import User
 from apps.core.utils.security import (
     create_access_token,
-    extract_username,
+    decode_access_token,
     verify_password,
 )
+from apps.ia.services.query_cache import LRUCache
 from apps.packpage.exceptions import (
     CredentialsValidationException,
     IncorrectCredentialException,
 )
+from apps.packpage.settings import get_settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/auth/token')
 
@@ -27,6 +31,37 @@ OAuth2Token = Annotated[str, Depends(oauth2_scheme)]
 user_controller = UserController()
 
 
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user as the routes see it.
+
+    Built from the token claims and cached per worker, so authenticating a
+    request does not load the `User` entity and its relationships; `load`
+    fetches it for the routes that need the full user. Changing a user
+    bumps its permissions version, so tokens issued afterwards reload it on
+    every worker; older tokens see the change within the cache TTL.
+    """
+
+    id: int
+    username: str
+    permissions_version: int = 0
+
+    def load(self, db_session: Session) -> User:
+        """Load the full ORM user."""
+        db_user = db_session.get(User, self.id)
+        if db_user is None:
+            raise CredentialsValidationException()
+        return db_user
+
+
+# Chave: id do usuário. A entrada vale para tokens de versão igual ou menor.
+principal_cache = LRUCache(
+    get_settings().SECURITY_USER_CACHE_SIZE,
+    get_settings().SECURITY_USER_CACHE_TTL_SECONDS,
+)
+
+
 def execute_user_login(
     db_session: SessionDep, username: str, password: str
 ) -> dict:
@@ -39,27 +74,65 @@ def execute_user_login(
     if not verify_password(password, db_user.password):
         raise IncorrectCredentialException()
 
-    token = create_access_token(data={'sub': db_user.username})
+    token = create_access_token(
+        data={
+            'sub': db_user.username,
+            'uid': db_user.id,
+            'pv': db_user.permissions_version,
+        }
+    )
 
     return {'access_token': token, 'token_type': 'bearer'}
 
 
-async def get_current_user(db_session: SessionDep, token: OAuth2Token) -> User:
+async def get_current_user(
+    db_session: SessionDep, token: OAuth2Token
+) -> Principal:
     """Get current user from JWT token."""
     token_data = TokenData()
     try:
-        username = extract_username(token)
+        payload = decode_access_token(token)
+        username = payload.get('sub')
         if not username:
             raise CredentialsValidationException()
 
         token_data.username = username
+        token_data.user_id = payload.get('uid')
+        token_data.permissions_version = payload.get('pv', 0)
     except JWTError as ex:
         raise CredentialsValidationException() from ex
 
-    db_user = user_controller.get_user_by_username(
-        db_session, token_data.username
-    )
-
-    if db_user is None:
+    # Tokens antigos (só com `sub`) continuam consultando o banco.
+    if token_data.user_id is not None:
+        principal = principal_cache.get(token_data.user_id)
+        # Um token mais novo que a entrada indica alteração no usuário.
+        if (
+            principal is not None
+            and principal.username == username
+            and principal.permissions_version >= token_data.permissions_version
+        ):
+            return principal
+
+    principal = load_principal(db_session, token_data)
+    if principal is None:
         raise CredentialsValidationException()
-    return db_user
+    if token_data.user_id is not None:
+        principal_cache.set(token_data.user_id, principal)
+    return principal
+
+
+def load_principal(
+    db_session: Session, token_data: TokenData
+) -> Principal | None:
+    """Read the token's user columns, without its relationships."""
+    query = select(User.id, User.username, User.permissions_version)
+    if token_data.user_id is not None:
+        query = query.where(User.id == token_data.user_id)
+    else:
+        query = query.where(User.username == token_data.username)
+
+    row = db_session.execute(query).one_or_none()
+    # Um usuário renomeado invalida os tokens emitidos com o nome antigo.
+    if row is None or row.username != token_data.username:
+        return None
+    return Principal(row.id, row.username, row.permissions_version)
@@ -17,3 +17,5 @@ class TokenData(BaseModel):
     """
 
     username: str | None = None
+    user_id: int | None = None
+    permissions_version: int = 0
@@ -1,42 +1,112 @@
 """Controller for handling authorization logic."""
+import threading
+import time
+from typing import NamedTuple
+
 from sqlalchemy import Select, and_, select
 
+from apps.core.api.authentication.controller import Principal
 from apps.core.api.user.controller import UserController
 from apps.core.database.session import Session
-from apps.core.models.assignment import Assignment
-from apps.core.models.authorization import Authorization
-from apps.core.models.role import Role
 from apps.core.models.transaction import Transaction
-from apps.core.models.user import User
+from apps.core.models.user_permission import UserPermission
 from apps.packpage.exceptions import (
     AmbiguousAuthorizationException,
     CredentialsValidationException,
     IllegalAccessException,
 )
+from apps.packpage.settings import get_settings
 
 user_controller = UserController()
 
+
+class UserPermissions(NamedTuple):
+    """Operation codes a user may execute."""
+
+    granted: frozenset[str]
+    # Códigos concedidos por mais de um caminho (papéis diferentes).
+    ambiguous: frozenset[str]
+
+
+class PermissionCache:
+    """
+    Per-user permissions, read from user_permission and kept `ttl` seconds.
+
+    Refreshing a user's materialized permissions calls `invalidate` and
+    bumps the user's permissions version. Other workers reload as soon as a
+    token with the new version arrives, and otherwise within the TTL.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: dict[int, tuple[float, int, UserPermissions]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(
+        self, db_session: Session, user_id: int, version: int = 0
+    ) -> UserPermissions:
+        """Return the user's permissions, reloading older versions."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now and entry[1] >= version:
+                return entry[2]
+            generation = self._generation
+
+        permissions = load_user_permissions(db_session, user_id)
+        with self._lock:
+            # Não guarda o que foi lido antes de uma invalidação concorrente.
+            if generation == self._generation:
+                self._entries[user_id] = (now + self.ttl, version, permissions)
+        return permissions
+
+    def invalidate(self, user_id: int | None = None) -> None:
+        """Forget one user's permissions, or everyone's."""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+permission_cache = PermissionCache(
+    get_settings().SECURITY_PERMISSION_CACHE_TTL_SECONDS
+)
+
+
 # TODO: removed controller in add packpages
 def validate_transaction_access(
-    db_session: Session, current_user: User, op_code: str
+    db_session: Session, current_user: Principal, op_code: str
 ) -> None:
     """Validate if the current user has access to the specified operation code."""
     if not current_user:
         raise CredentialsValidationException()
 
-    transactions = get_user_authorized_transactions(
-        db_session, current_user.id, op_code
+    permissions = permission_cache.get(
+        db_session, current_user.id, current_user.permissions_version
     )
-    if not transactions:
+    if op_code not in permissions.granted:
         raise IllegalAccessException(current_user.id, op_code)
 
-    if len(transactions) > 1:
+    if op_code in permissions.ambiguous:
         raise AmbiguousAuthorizationException(current_user.id, op_code)
 
-    if transactions[0].operation_code != op_code:
-        raise IllegalAccessException(
-            current_user.id, transactions[0].operation_code
+
+def load_user_permissions(
+    db_session: Session, user_id: int
+) -> UserPermissions:
+    """Read a user's operation codes from the materialized permissions."""
+    rows = db_session.execute(
+        select(UserPermission.operation_code, UserPermission.grants).where(
+            UserPermission.user_id == user_id
         )
+    ).all()
+    return UserPermissions(
+        granted=frozenset(code for code, _ in rows),
+        ambiguous=frozenset(code for code, grants in rows if grants > 1),
+    )
 
 
 def get_user_authorized_transactions(
@@ -46,16 +116,13 @@ def get_user_authorized_transactions(
     Retrieve transactions authorized for a specific user,
     optionally filtered by operation code.
     """
-    query: Select = (
-        select(Transaction)
-        .join(Authorization)
-        .join(Role)
-        .join(Assignment)
-        .join(User)
+    query: Select = select(Transaction).join(
+        UserPermission,
+        UserPermission.operation_code == Transaction.operation_code,
     )
 
     criteria_and = []
-    criteria_and.append(User.id == user_id)
+    criteria_and.append(UserPermission.user_id == user_id)
 
     if op_code:
         criteria_and.append(Transaction.operation_code == op_code)
@@ -0,0 +1,107 @@
+"""Maintenance of the materialized user permissions (user_permission)."""
+import logging
+from collections.abc import Iterable
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from apps.core.api.authorization.controller import permission_cache
+from apps.core.models.assignment import Assignment
+from apps.core.models.authorization import Authorization
+from apps.core.models.role import Role
+from apps.core.models.transaction import Transaction
+from apps.core.models.user import User
+from apps.core.models.user_permission import UserPermission
+
+logger = logging.getLogger(__name__)
+
+
+def users_with_roles(db_session: Session, role_ids: Iterable[int]) -> set[int]:
+    """Users assigned to any of the roles."""
+    return set(
+        db_session.scalars(
+            select(Assignment.user_id).where(
+                Assignment.role_id.in_(set(role_ids))
+            )
+        ).all()
+    )
+
+
+def users_with_transactions(
+    db_session: Session, transaction_ids: Iterable[int]
+) -> set[int]:
+    """Users granted any of the transactions by one of their roles."""
+    return set(
+        db_session.scalars(
+            select(Assignment.user_id)
+            .join(Authorization, Authorization.role_id == Assignment.role_id)
+            .where(Authorization.transaction_id.in_(set(transaction_ids)))
+        ).all()
+    )
+
+
+def refresh_user_permissions(
+    db_session: Session, user_ids: Iterable[int] | None = None
+) -> None:
+    """
+    Recompute the user_permission rows of the given users, or of everyone.
+
+    Must be called after the RBAC change is committed; the users' cached
+    permissions are invalidated once the new rows are committed.
+    """
+    granted = (
+        select(
+            Assignment.user_id,
+            Transaction.operation_code,
+            func.count(),
+        )
+        .select_from(Assignment)
+        .join(Role)
+        .join(Authorization)
+        .join(Transaction)
+        .group_by(Assignment.user_id, Transaction.operation_code)
+    )
+    stale = delete(UserPermission)
+    # Tokens emitidos depois desta alteração levam a nova versão.
+    bump = update(User).values(
+        permissions_version=User.permissions_version + 1
+    )
+    if user_ids is not None:
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        granted = granted.where(Assignment.user_id.in_(user_ids))
+        stale = stale.where(UserPermission.user_id.in_(user_ids))
+        bump = bump.where(User.id.in_(user_ids))
+
+    db_session.execute(stale)
+    db_session.execute(
+        insert(UserPermission).from_select(
+            [
+                UserPermission.user_id,
+                UserPermission.operation_code,
+                UserPermission.grants,
+            ],
+            granted,
+        )
+    )
+    db_session.execute(bump)
+    db_session.commit()
+
+    if user_ids is None:
+        permission_cache.invalidate()
+    else:
+        for user_id in user_ids:
+            permission_cache.invalidate(user_id)
+
+
+if __name__ == '__main__':
+    from apps.core.database.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    with Session(engine) as session:
+        refresh_user_permissions(session)
+        total = session.scalar(
+            select(func.count()).select_from(UserPermission)
+        )
+    logger.info(f'Permissões materializadas: {total} registros')
@@ -3,10 +3,18 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import status as HTTP_STATUS
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from apps.core.api.authentication.controller import get_current_user
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+)
 from apps.core.api.authorization.controller import validate_transaction_access
+from apps.core.api.authorization.permissions import (
+    refresh_user_permissions,
+    users_with_roles,
+)
 from apps.core.api.authorization.schemas import (
     AuthorizationDTOSchema,
     AuthorizationListSchema,
@@ -17,7 +25,6 @@ from apps.core.api.transaction.enum_operation_code import (
 )
 from apps.core.database.session import get_session
 from apps.core.models.authorization import Authorization
-from apps.core.models.user import User
 from apps.packpage.base_schemas import SimpleMessageSchema
 from apps.packpage.client_ip import get_client_ip
 from apps.packpage.exceptions import (
@@ -30,7 +37,7 @@ router = APIRouter()
 controller = GenericController(Authorization)
 
 SessionDep = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post(
@@ -59,6 +66,9 @@ def create_authorization(
             detail='Object AUTHORIZATION was not accepted',
         ) from ex
 
+    refresh_user_permissions(
+        db_session, users_with_roles(db_session, [new_authorization.role_id])
+    )
     return new_authorization
 
 
@@ -112,6 +122,9 @@ def delete_authorization(
     """Delete an authorization by ID."""
     validate_transaction_access(db_session, current_user, op.OP_1020004.value)
 
+    affected_users = users_with_roles(
+        db_session, _authorization_roles(db_session, autorization_id)
+    )
     try:
         controller.delete(db_session, autorization_id)
     except ObjectNotFoundException as ex:
@@ -120,6 +133,7 @@ def delete_authorization(
             detail='Object AUTHORIZATION was not found',
         ) from ex
 
+    refresh_user_permissions(db_session, affected_users)
     return {'detail': 'Object AUTHORIZATION was deleted'}
 
 
@@ -142,12 +156,32 @@ def update_authorization(
         **authorization.model_dump()
     )
     new_authorization.id = autorization_id
+    role_ids = _authorization_roles(db_session, autorization_id)
     new_authorization.audit_user_ip = get_client_ip(request)
     new_authorization.audit_user_login = current_user.username
 
     try:
-        return controller.update(db_session, new_authorization)
+        new_authorization = controller.update(db_session, new_authorization)
     except ObjectNotFoundException as ex:
         raise HTTPException(
             status_code=HTTP_STATUS.HTTP_404_NOT_FOUND, detail=ex.args[0]
         ) from ex
+
+    refresh_user_permissions(
+        db_session,
+        users_with_roles(db_session, role_ids | {new_authorization.role_id}),
+    )
+    return new_authorization
+
+
+def _authorization_roles(
+    db_session: Session, authorization_id: int
+) -> set[int]:
+    """Role currently linked to an authorization (empty if not found)."""
+    return set(
+        db_session.scalars(
+            select(Authorization.role_id).where(
+                Authorization.id == authorization_id
+            )
+        ).all()
+    )
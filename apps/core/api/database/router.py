@@ -0,0 +1,21 @@
+"""Database router module."""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi import status as HTTP_STATUS
+
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+)
+from apps.core.database.session import pool_metrics
+
+router = APIRouter()
+
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+
+
+@router.get('/stats', status_code=HTTP_STATUS.HTTP_200_OK)
+def get_database_stats(current_user: CurrentUser):
+    """Get the connection pool usage and checkout wait times of this worker."""
+    return pool_metrics.stats()
@@ -6,7 +6,10 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import status as HTTP_STATUS
 from sqlalchemy.orm import Session
 
-from apps.core.api.authentication.controller import get_current_user
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+)
 from apps.core.api.authorization.controller import validate_transaction_access
 from apps.core.api.paint.controller import PaintController
 from apps.core.api.paint.schema import PaintList, PaintPublic, PaintSchema
@@ -15,7 +18,6 @@ from apps.core.api.transaction.enum_operation_code import (
 )
 from apps.core.database.session import get_session
 from apps.core.models.paint import Paint
-from apps.core.models.user import User
 from apps.packpage.base_schemas import SimpleMessageSchema
 from apps.packpage.client_ip import get_client_ip
 from apps.packpage.exceptions import (
@@ -27,7 +29,7 @@ router = APIRouter()
 paint_controller = PaintController()
 
 DbSession = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post('/', status_code=201, response_model=PaintPublic)
@@ -5,8 +5,15 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import status as HTTP_STATUS
 from sqlalchemy.orm import Session
 
-from apps.core.api.authentication.controller import get_current_user
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+)
 from apps.core.api.authorization.controller import validate_transaction_access
+from apps.core.api.authorization.permissions import (
+    refresh_user_permissions,
+    users_with_roles,
+)
 from apps.core.api.role.schemas import (
     RoleDTOSchema,
     RoleListSchema,
@@ -17,7 +24,6 @@ from apps.core.api.transaction.enum_operation_code import (
 )
 from apps.core.database.session import get_session
 from apps.core.models.role import Role
-from apps.core.models.user import User
 from apps.packpage.base_schemas import SimpleMessageSchema
 from apps.packpage.client_ip import get_client_ip
 from apps.packpage.exceptions import (
@@ -30,7 +36,7 @@ router = APIRouter()
 role_controller = GenericController(Role)
 
 SessionDep = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.get(
@@ -129,6 +135,7 @@ def delete_role(
     """Delete a role by ID."""
     validate_transaction_access(db_session, current_user, op.OP_1050004.value)
 
+    affected_users = users_with_roles(db_session, [role_id])
     try:
         role_controller.delete(db_session, role_id)
     except ObjectNotFoundException as ex:
@@ -137,4 +144,5 @@ def delete_role(
             detail=ex.args[0],
         ) from ex
 
+    refresh_user_permissions(db_session, affected_users)
     return {'detail': 'Role deleted successfully'}
@@ -51,6 +51,7 @@ class EnumOperationCode(Enum):
     OP_1070005 = '1070005'  # Document - View
     OP_1070006 = '1070006'  # Search Base - via Document
     OP_1070007 = '1070007'  # Search Content - via Document
+    OP_1070008 = '1070008'  # Rebuild Index - via Document
     # --------------------- Paint ---------------------
     OP_1080001 = '1080001'  # Paint - Create
     OP_1080002 = '1080002'  # Paint - Update
@@ -5,8 +5,15 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import status as HTTP_STATUS
 from sqlalchemy.orm import Session
 
-from apps.core.api.authentication.controller import get_current_user
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+)
 from apps.core.api.authorization.controller import validate_transaction_access
+from apps.core.api.authorization.permissions import (
+    refresh_user_permissions,
+    users_with_transactions,
+)
 from apps.core.api.transaction.enum_operation_code import (
     EnumOperationCode as op,
 )
@@ -17,7 +24,6 @@ from apps.core.api.transaction.schemas import (
 )
 from apps.core.database.session import get_session
 from apps.core.models.transaction import Transaction
-from apps.core.models.user import User
 from apps.packpage.base_schemas import SimpleMessageSchema
 from apps.packpage.client_ip import get_client_ip
 from apps.packpage.exceptions import (
@@ -30,7 +36,7 @@ router = APIRouter()
 transaction_controller = GenericController(Transaction)
 
 SessionDep = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post(
@@ -115,6 +121,8 @@ async def update_transaction(
 ):
     """Update an existing transaction."""
     validate_transaction_access(db_session, current_user, op.OP_1030002.value)
+    # O código de operação pode mudar para quem já tem a transação.
+    affected_users = users_with_transactions(db_session, [transaction_id])
 
     new_transaction: Transaction = Transaction(**transaction.model_dump())
     new_transaction.id = transaction_id
@@ -122,12 +130,17 @@ async def update_transaction(
     new_transaction.audit_user_ip = get_client_ip(request)
 
     try:
-        return transaction_controller.update(db_session, new_transaction)
+        new_transaction = transaction_controller.update(
+            db_session, new_transaction
+        )
     except ObjectNotFoundException as ex:
         raise HTTPException(
             status_code=HTTP_STATUS.HTTP_404_NOT_FOUND, detail=ex.args[0]
         ) from ex
 
+    refresh_user_permissions(db_session, affected_users)
+    return new_transaction
+
 
 @router.delete('/{transaction_id}', response_model=SimpleMessageSchema)
 def delete_existing_transaction(
@@ -138,9 +151,11 @@ def delete_existing_transaction(
     """Delete a transaction by ID."""
     validate_transaction_access(db_session, current_user, op.OP_1030004.value)
 
+    affected_users = users_with_transactions(db_session, [transaction_id])
     try:
         transaction_controller.delete(db_session, transaction_id)
     except ObjectNotFoundException as ex:
         raise HTTPException(status_code=404, detail=ex.args[0]) from ex
 
+    refresh_user_permissions(db_session, affected_users)
     return {'detail': 'Transaction deleted'}
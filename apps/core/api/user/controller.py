@@ -28,4 +28,12 @@ class UserController(GenericController):
     def update(self, db_session: Session, obj: User) -> AbstractBaseModel:
         """Update an existing user in the database with hashed password."""
         obj.password = get_password_hash(obj.password)
+        if obj.permissions_version is None:
+            # Nova versão: os workers recarregam o usuário nos novos tokens.
+            obj.permissions_version = (
+                db_session.scalar(
+                    select(User.permissions_version).where(User.id == obj.id)
+                )
+                or 0
+            ) + 1
         return super().update(db_session, obj)
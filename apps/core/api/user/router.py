@@ -5,11 +5,16 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import status as HTTP_STATUS
 from sqlalchemy.orm import Session
 
-from apps.core.api.authentication.controller import get_current_user
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+    principal_cache,
+)
 from apps.core.api.authorization.controller import (
     get_user_authorized_transactions,
     validate_transaction_access,
 )
+from apps.core.api.authorization.permissions import refresh_user_permissions
 from apps.core.api.transaction.enum_operation_code import (
     EnumOperationCode as op,
 )
@@ -29,7 +34,7 @@ router = APIRouter()
 user_controller = UserController()
 
 DbSession = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post('/', status_code=201, response_model=UserPublic)
@@ -95,10 +100,14 @@ def update_existing_user(
         new_user.audit_user_ip = get_client_ip(request)
         new_user.audit_user_login = current_user.username
 
-        return user_controller.update(db_session, new_user)
+        new_user = user_controller.update(db_session, new_user)
     except ObjectNotFoundException as ex:
         raise HTTPException(status_code=404, detail=ex.args[0]) from ex
 
+    # O nome de usuário pode ter mudado.
+    principal_cache.clear()
+    return new_user
+
 
 @router.delete('/{user_id}', response_model=SimpleMessageSchema)
 def delete_existing_user(
@@ -114,6 +123,8 @@ def delete_existing_user(
     except ObjectNotFoundException as ex:
         raise HTTPException(status_code=404, detail=ex.args[0]) from ex
 
+    refresh_user_permissions(db_session, [user_id])
+    principal_cache.clear()
     return {'detail': 'User deleted'}
 
 
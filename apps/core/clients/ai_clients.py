@@ -1,28 +1,126 @@
 """AI clients integration module."""
 
+import logging
+import threading
+
+from sqlalchemy.orm import Session
+
+from apps.core.database.session import engine
 from apps.ia.agents.conversation_agent import ConversationAgent
+from apps.ia.services.index_sync import IndexSync
 from apps.ia.services.rag_service import RAGService
+from apps.packpage.llm import get_local_llm
+from apps.packpage.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AIClients:
+    """
+    Process-wide holder of the AI engines shared by every request of a worker.
+
+    The instances are created once by the application lifespan (see
+    `apps.core.startup`) so the embedding model stays warm and every caller
+    searches the same vector index. With an index directory, one worker
+    becomes the index writer and the others read its generations through
+    the `IndexSync` loop.
+    """
+
+    def __init__(self) -> None:
+        self.rag_service: RAGService | None = None
+        self.conversation_agent: ConversationAgent | None = None
+        self.index_sync: IndexSync | None = None
+        self._lock = threading.Lock()
+
+    def startup(self, rag_service: RAGService | None = None) -> None:
+        """Create the shared engines and load the persisted index."""
+        with self._lock:
+            if rag_service is not None:
+                self.rag_service = rag_service
+            elif self.rag_service is None:
+                settings = get_settings()
+                self.rag_service = RAGService(
+                    index_dir=settings.RAG_INDEX_DIR,
+                    role=settings.RAG_INDEX_ROLE,
+                )
+                try:
+                    self.rag_service.load_index()
+                except Exception as e:
+                    logger.error(
+                        f'Falha ao carregar índice RAG salvo: {str(e)}',
+                        exc_info=True,
+                    )
+
+                if self.rag_service.index_store is not None:
+                    self.index_sync = IndexSync(
+                        self.rag_service,
+                        lambda: Session(engine),
+                        settings.RAG_INDEX_SYNC_SECONDS,
+                    )
+                    self.index_sync.start()
+
+                # Carrega o modelo local antes da primeira falta de cota,
+                # em vez de no meio de uma requisição.
+                if settings.LOCAL_LLM_PRELOAD:
+                    get_local_llm().preload()
+        logger.info('Serviço RAG compartilhado inicializado')
+
+    def shutdown(self) -> None:
+        """Checkpoint pending index changes and release the shared engines."""
+        with self._lock:
+            if self.index_sync is not None:
+                self.index_sync.stop()
+                self.index_sync = None
+            if self.rag_service is not None:
+                try:
+                    self.rag_service.checkpoint()
+                    if self.rag_service.embedding_cache is not None:
+                        self.rag_service.embedding_cache.flush()
+                except Exception as e:
+                    logger.error(
+                        f'Falha ao salvar índice RAG: {str(e)}', exc_info=True
+                    )
+            self.conversation_agent = None
+            self.rag_service = None
+
+    def get_rag_service(self) -> RAGService:
+        """Get the shared RAG service, creating it on first use."""
+        if self.rag_service is None:
+            # Fora do lifespan (scripts, seeds, testes) o serviço é criado
+            # sob demanda, preservando uma única instância por processo.
+            self.startup()
+        return self.rag_service
+
+    def get_conversation_agent(
+        self, rag_service: RAGService | None = None
+    ) -> ConversationAgent:
+        """
+        Get the shared conversation agent, creating it on first use.
+
+        An agent for a RAG service other than the shared one (scripts,
+        tests) is built on the spot.
+        """
+        if rag_service is not None and rag_service is not self.rag_service:
+            return ConversationAgent(rag_service)
+        if self.conversation_agent is None:
+            rag_service = self.get_rag_service()
+            with self._lock:
+                if self.conversation_agent is None:
+                    self.conversation_agent = ConversationAgent(rag_service)
+        return self.conversation_agent
+
 
-# Instância global do serviço RAG
-_global_rag_service = None
-_global_conversation_agent = None
+ai_clients = AIClients()
 
 
 def get_rag_service() -> RAGService:
-    """Get global RAG service instance."""
-    global _global_rag_service
-    if _global_rag_service is None:
-        _global_rag_service = RAGService()
-    return _global_rag_service
+    """Dependency that provides the worker's shared RAG service."""
+    return ai_clients.get_rag_service()
 
 
 def get_conversation_agent() -> ConversationAgent:
-    """Get global conversation agent instance."""
-    global _global_conversation_agent
-    if _global_conversation_agent is None:
-        rag_service = get_rag_service()
-        _global_conversation_agent = ConversationAgent(rag_service)
-    return _global_conversation_agent
+    """Dependency that provides the worker's shared conversation agent."""
+    return ai_clients.get_conversation_agent()
 
 
 def get_simple_agent() -> ConversationAgent:
@@ -1,11 +1,186 @@
 """Database session management."""
 
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
 
 from apps.packpage.settings import get_settings
 
-engine = create_engine(get_settings().DB_URL)
+
+class PoolMetrics:
+    """Checkout wait times and utilization of a worker's connection pool."""
+
+    def __init__(self) -> None:
+        self.capacity: int | None = None
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def bind(self, engine: Engine, capacity: int | None = None) -> None:
+        """Collect the metrics of a pool of `capacity` connections."""
+        self.capacity = capacity
+        pool = engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            pool.metrics = self
+
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """Record how long a checkout waited for a connection."""
+        with self._lock:
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return the pool usage and checkout wait times."""
+        with self._lock:
+            waited = self.checkouts + self.timeouts
+            return {
+                'capacity': self.capacity,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'utilization': round(self.checked_out / self.capacity, 3)
+                if self.capacity
+                else None,
+                'connections_opened': self.connections_opened,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(1000 * self.wait_seconds / waited, 3)
+                if waited
+                else 0.0,
+                'max_wait_ms': round(1000 * self.max_wait_seconds, 3),
+            }
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_checkout(
+        self, dbapi_connection, connection_record, connection_proxy
+    ) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(
+                self.peak_checked_out, self.checked_out
+            )
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long checkouts wait for a connection."""
+
+    metrics: PoolMetrics | None = None
+
+    def recreate(self) -> 'InstrumentedQueuePool':
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics:
+                self.metrics.record_wait(
+                    time.perf_counter() - started, timed_out=True
+                )
+            raise
+        if self.metrics:
+            self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def engine_options(db_url: str) -> dict[str, Any]:
+    """Pool and connection arguments for `create_engine` from the settings."""
+    settings = get_settings()
+    url = make_url(db_url)
+    if url.get_backend_name() == 'sqlite':
+        # SQLite mantém o pool padrão do dialeto.
+        return {}
+
+    options: dict[str, Any] = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT_SECONDS,
+        'pool_recycle': settings.DB_POOL_RECYCLE_SECONDS,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+    if url.get_backend_name() != 'postgresql':
+        return options
+
+    connect_args: dict[str, Any] = {}
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if settings.DB_PGBOUNCER:
+        if url.get_driver_name() == 'psycopg':
+            # Sem prepared statements no servidor (pool de transações).
+            connect_args['prepare_threshold'] = None
+    elif timeout:
+        connect_args['options'] = f'-c statement_timeout={timeout}'
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+def pool_capacity(db_url: str) -> int | None:
+    """Connections the configured pool may open, or None for SQLite."""
+    settings = get_settings()
+    if make_url(db_url).get_backend_name() == 'sqlite':
+        return None
+    return settings.DB_POOL_SIZE + max(settings.DB_MAX_OVERFLOW, 0)
+
+
+def configure_engine(engine: Engine) -> None:
+    """Apply the per-transaction settings that cannot go in the URL."""
+    settings = get_settings()
+    if (
+        engine.dialect.name != 'postgresql'
+        or not settings.DB_PGBOUNCER
+        or not settings.DB_STATEMENT_TIMEOUT_MS
+    ):
+        return
+
+    # O PgBouncer não repassa `options` e reutiliza a conexão do servidor
+    # entre clientes, então o limite vale só para a transação corrente.
+    statement = (
+        f'SET LOCAL statement_timeout = {settings.DB_STATEMENT_TIMEOUT_MS}'
+    )
+
+    @event.listens_for(engine, 'begin')
+    def set_statement_timeout(connection) -> None:
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+engine = create_engine(
+    get_settings().DB_URL, **engine_options(get_settings().DB_URL)
+)
+configure_engine(engine)
+pool_metrics = PoolMetrics()
+pool_metrics.bind(engine, pool_capacity(get_settings().DB_URL))
 
 
 def get_session():
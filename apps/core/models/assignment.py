@@ -28,10 +28,10 @@ class Assignment(AbstractBaseModel):
     )
 
     user: Mapped['User'] = relationship(
-        back_populates='assignments', lazy='subquery'
+        back_populates='assignments', lazy='select'
     )
     role: Mapped['Role'] = relationship(
-        back_populates='assignments', lazy='subquery'
+        back_populates='assignments', lazy='select'
     )
 
     __table_args__ = (Index('idx_user_role', user_id, role_id, unique=True),)
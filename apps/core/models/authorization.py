@@ -26,10 +26,10 @@ class Authorization(AbstractBaseModel):
     )
 
     role: Mapped['Role'] = relationship(
-        back_populates='authorizations', lazy='subquery'
+        back_populates='authorizations', lazy='select'
     )
     transaction: Mapped['Transaction'] = relationship(
-        back_populates='authorizations', lazy='subquery'
+        back_populates='authorizations', lazy='select'
     )
 
     __table_args__ = (
@@ -46,7 +46,7 @@ class Paint(AbstractBaseModel):
     )
 
     created_by_user: Mapped['User'] = relationship(
-        back_populates='paints', lazy='subquery'
+        back_populates='paints', lazy='select'
     )
 
     __table_args__ = (
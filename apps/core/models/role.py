@@ -23,10 +23,10 @@ class Role(AbstractBaseModel):
     description: Mapped[str] = mapped_column(name='str_description')
 
     assignments: Mapped[list['Assignment']] = relationship(
-        back_populates='role', lazy='subquery'
+        back_populates='role', lazy='select'
     )
     authorizations: Mapped[list['Authorization']] = relationship(
-        back_populates='role', lazy='subquery'
+        back_populates='role', lazy='select'
     )
 
     __table_args__ = (Index('idx_role_name', name, unique=True),)
@@ -25,7 +25,7 @@ class Transaction(AbstractBaseModel):
     )
 
     authorizations: Mapped[list['Authorization']] = relationship(
-        back_populates='transaction', lazy='subquery'
+        back_populates='transaction', lazy='select'
     )
 
     __table_args__ = (
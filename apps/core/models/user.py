@@ -1,7 +1,7 @@
 """Model for represents the User."""
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Index
+from sqlalchemy import Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from apps.packpage.base_model import AbstractBaseModel
@@ -24,15 +24,21 @@ class User(AbstractBaseModel):
     username: Mapped[str] = mapped_column(name='str_username')
     password: Mapped[str] = mapped_column(name='str_password')
     email: Mapped[str] = mapped_column(name='str_email')
+    # Incrementada quando as permissões materializadas do usuário mudam.
+    permissions_version: Mapped[int] = mapped_column(
+        name='int_permissions_version',
+        default=0,
+        server_default=text('0'),
+    )
 
     assignments: Mapped[list['Assignment']] = relationship(
-        back_populates='user', lazy='subquery'
+        back_populates='user', lazy='select'
     )
     conversations: Mapped[list['Conversation']] = relationship(
         'Conversation', back_populates='user', lazy='select'
     )
     paints: Mapped[list['Paint']] = relationship(
-        'Paint', back_populates='created_by_user', lazy='subquery'
+        'Paint', back_populates='created_by_user', lazy='select'
     )
     __table_args__ = (
         Index('idx_user_username', username, unique=True),
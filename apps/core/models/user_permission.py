@@ -0,0 +1,30 @@
+"""Model for the materialized permissions (user → operation code)."""
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from apps.packpage.base_model import Base
+
+
+class UserPermission(Base):
+    """
+    Denormalized operation codes each user may execute.
+
+    Derived from Assignment → Role → Authorization → Transaction and kept
+    up to date by the RBAC routers, so an access check is a primary-key
+    lookup instead of a join over the five tables.
+    """
+
+    __tablename__ = 'user_permission'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('user.id', ondelete='CASCADE'),
+        primary_key=True,
+        name='user_id',
+    )
+    operation_code: Mapped[str] = mapped_column(
+        String(7), primary_key=True, name='str_operation_code'
+    )
+    # Quantos papéis do usuário concedem o código (> 1 é ambíguo).
+    grants: Mapped[int] = mapped_column(
+        name='int_grants', nullable=False, default=1
+    )
@@ -1,4 +1,6 @@
 """Application startup and configuration."""
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -6,14 +8,26 @@ from apps.core.api.assignment.router import router as assignment_router
 from apps.core.api.authentication.router import router as auth_router
 from apps.core.api.authorization.middleware import AuthorizationMiddleware
 from apps.core.api.authorization.router import router as authorization_router
+from apps.core.api.database.router import router as database_router
 from apps.core.api.paint.router import router as paint_router
 from apps.core.api.role.router import router as role_router
 from apps.core.api.transaction.router import router as transaction_router
 from apps.core.api.user.router import router as user_router
+from apps.core.clients.ai_clients import ai_clients
 from apps.ia.api.chat.router import router as chat_router
 from apps.ia.api.documents.router import router as documents_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the worker-wide AI engines on startup and release them on exit."""
+    ai_clients.startup()
+    yield
+    ai_clients.shutdown()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title='FastAPI Suvinil-IA',
     description='FastAPI application for Suvinil-IA project',
     version='0.1.0',
@@ -45,6 +59,10 @@ app = FastAPI(
             'name': 'Authorizations',
             'description': 'Operations with authorizations',
         },
+        {
+            'name': 'Database',
+            'description': 'Connection pool statistics',
+        },
         {
             'name': 'Paints',
             'description': 'Operations with paint management',
@@ -95,6 +113,7 @@ app.include_router(
 app.include_router(
     authorization_router, prefix='/authorization', tags=['Authorizations']
 )
+app.include_router(database_router, prefix='/database', tags=['Database'])
 app.include_router(paint_router, prefix='/paints', tags=['Paints'])
 app.include_router(chat_router, prefix='/ia', tags=['AI Chat'])
 app.include_router(documents_router, prefix='/ia', tags=['AI Documents'])
@@ -46,13 +46,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return checkpw(plain_password_encoded, hashed_password_bytes)
 
 
-def extract_username(jwt_token: str) -> str:
-    """
-    docstring
-    """
-    payload = jwt.decode(
+def decode_access_token(jwt_token: str) -> dict:
+    """Validate a JWT access token and return its claims."""
+    return jwt.decode(
         jwt_token,
         get_settings().SECURITY_API_SECRET_KEY,
         algorithms=[get_settings().SECURITY_ALGORITHM],
     )
+
+
+def extract_username(jwt_token: str) -> str:
+    """
+    docstring
+    """
+    payload = decode_access_token(jwt_token)
     return payload.get('sub') or ''
@@ -0,0 +1,72 @@
+"""Pool of prebuilt CrewAI agents and crews reused across requests."""
+
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from crewai import Agent, Crew
+
+
+class AgentPool:
+    """
+    Keeps idle `(Agent, Crew)` pairs built by `factory` for reuse.
+
+    Every query checks out its own pair, so concurrent users never share an
+    Agent or Crew; only the Task is created per query. Pairs are built on
+    demand and at most `max_idle` are kept once returned.
+    """
+
+    def __init__(
+        self, factory: Callable[[], tuple[Agent, Crew]], max_idle: int
+    ) -> None:
+        self.factory = factory
+        self.max_idle = max(1, max_idle)
+        self.crews_built = 0
+        self.checkouts = 0
+        self._build_ms = 0.0
+        self._setup_ms = 0.0
+        self._idle: list[tuple[Agent, Crew]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self) -> Iterator[tuple[Agent, Crew]]:
+        """Borrow a pair for one query, building it if none is idle."""
+        with self._lock:
+            pair = self._idle.pop() if self._idle else None
+
+        if pair is None:
+            started = time.perf_counter()
+            pair = self.factory()
+            with self._lock:
+                self.crews_built += 1
+                self._build_ms += (time.perf_counter() - started) * 1000
+
+        try:
+            yield pair
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(pair)
+
+    def record_setup(self, setup_ms: float) -> None:
+        """Record the per-query setup time (checkout and Task creation)."""
+        with self._lock:
+            self.checkouts += 1
+            self._setup_ms += setup_ms
+
+    def stats(self) -> dict[str, Any]:
+        """Return how many pairs were built and the average costs."""
+        with self._lock:
+            return {
+                'crews_built': self.crews_built,
+                'idle': len(self._idle),
+                'queries': self.checkouts,
+                'build_ms_avg': round(self._build_ms / self.crews_built, 3)
+                if self.crews_built
+                else 0.0,
+                'setup_ms_avg': round(self._setup_ms / self.checkouts, 3)
+                if self.checkouts
+                else 0.0,
+            }
@@ -1,12 +1,131 @@
 """Conversation Agent using CrewAI with optimizations."""
 
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Iterator
+from functools import lru_cache, partial
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import litellm
 from crewai import Agent, Crew, Process, Task
 
+from apps.ia.agents.agent_pool import AgentPool
+from apps.ia.services.query_cache import normalize_query
 from apps.ia.services.rag_service import RAGService
+from apps.ia.services.single_flight import SingleFlight
 from apps.ia.utils.prompts.prompt_builder import (
     build_agent_prompt_conversation_agent,
 )
-from apps.packpage.llm import get_llm
+from apps.packpage.llm import get_llm, get_local_llm
+from apps.packpage.llm_gateway import (
+    estimate_tokens,
+    get_llm_gateway,
+    is_rate_limit_error,
+)
+from apps.packpage.settings import get_settings
+
+# Pools por serviço RAG e prompt: as ferramentas do agente usam o serviço,
+# então um Agent/Crew pronto só vale para o mesmo serviço.
+_pools: WeakKeyDictionary = WeakKeyDictionary()
+_pools_lock = threading.Lock()
+
+_load_prompt = lru_cache(maxsize=8)(build_agent_prompt_conversation_agent)
+
+EMPTY_QUERY_RESPONSE = (
+    'Por favor, faça uma pergunta para que eu possa ajudá-lo.'
+)
+EMPTY_RESPONSE = (
+    'Desculpe, não consegui processar sua pergunta. '
+    'Pode tentar reformulá-la?'
+)
+
+# Termos que pedem dados estruturados (ferramenta de banco) em vez de uma
+# resposta direta com o contexto RAG.
+TOOL_HINTS = (
+    'preço',
+    'preco',
+    'valor',
+    'estoque',
+    'catálogo',
+    'catalogo',
+    'quantas',
+    'quantos',
+    'listar',
+    'liste',
+    'código',
+    'codigo',
+)
+
+
+class RouteStats:
+    """Per-path counters of chat queries, latency and prompt tokens."""
+
+    def __init__(self) -> None:
+        self._paths: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, path: str, latency_ms: float, prompt_tokens: int | None
+    ) -> None:
+        """Record one answered query."""
+        with self._lock:
+            stats = self._paths.setdefault(
+                path,
+                {'queries': 0, 'latency_ms': 0.0, 'prompt_tokens': 0},
+            )
+            stats['queries'] += 1
+            stats['latency_ms'] += latency_ms
+            stats['prompt_tokens'] += prompt_tokens or 0
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Return the query count and averages of each path."""
+        with self._lock:
+            return {
+                path: {
+                    'queries': stats['queries'],
+                    'latency_ms_avg': round(
+                        stats['latency_ms'] / stats['queries'], 1
+                    ),
+                    'prompt_tokens_avg': round(
+                        stats['prompt_tokens'] / stats['queries'], 1
+                    ),
+                }
+                for path, stats in self._paths.items()
+            }
+
+
+route_stats = RouteStats()
+# Perguntas idênticas em andamento (ex.: picos de promoção) compartilham
+# uma única chamada ao LLM.
+llm_flights = SingleFlight()
+
+
+def _prompt_tokens(usage: Any) -> int | None:
+    """Prompt tokens of CrewAI usage metrics, if reported."""
+    prompt_tokens = getattr(usage, 'prompt_tokens', None)
+    return prompt_tokens if isinstance(prompt_tokens, int) else None
+
+
+def _local_prompt(messages: list[dict[str, str]]) -> str:
+    """Flatten chat messages into a text prompt for the local model."""
+    transcript = '\n\n'.join(
+        f"{message['role']}: {message['content']}" for message in messages
+    )
+    return f'{transcript}\n\nassistant:'
+
+
+def agent_pool_stats() -> list[dict]:
+    """Return the statistics of every agent pool of the worker."""
+    with _pools_lock:
+        pools = [
+            pool
+            for by_prompt in _pools.values()
+            for pool in by_prompt.values()
+        ]
+    return [pool.stats() for pool in pools]
 
 
 class ConversationAgent:
@@ -17,76 +136,294 @@ class ConversationAgent:
     ):
         self.rag_service = rag_service or RAGService()
         self.llm = get_llm()
-        self.prompt = build_agent_prompt_conversation_agent(prompt_path)
+        self.prompt = _load_prompt(prompt_path)
+        self.prompt_version = hashlib.sha256(
+            json.dumps(self.prompt, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        # tools=[rag_search_tool, db_query_tool]
+        self.tools: list = []
 
-    def create_conversation_agent(self) -> Agent:
-        """Cria o agente de conversa usando o prompt já processado."""
-        return Agent(
-            role=self.prompt.get(
-                "role", "Agente de Conversa especialista em tintas Suvinil"
+        with _pools_lock:
+            by_prompt = _pools.setdefault(self.rag_service, {})
+            if prompt_path not in by_prompt:
+                # A fábrica não pode referenciar o agente (que referencia o
+                # serviço RAG): a chave fraca nunca seria coletada.
+                by_prompt[prompt_path] = AgentPool(
+                    partial(
+                        self._build_crew, self.persona(), self.tools, self.llm
+                    ),
+                    get_settings().CHAT_MAX_CONCURRENCY,
+                )
+            self.pool = by_prompt[prompt_path]
+
+    def persona(self) -> dict[str, str]:
+        """Papel, objetivo e história do agente definidos no prompt YAML."""
+        return {
+            'role': self.prompt.get(
+                'role', 'Agente de Conversa especialista em tintas Suvinil'
             ),
-            goal=self.prompt.get(
-                "objective",
-                "Interpretar intenções e responder naturalmente em PT-BR",
+            'goal': self.prompt.get(
+                'objective',
+                'Interpretar intenções e responder naturalmente em PT-BR',
             ),
-            backstory=self.prompt.get(
-                "backstory",
-                "Especialista em tintas Suvinil com contexto mantido.",
+            'backstory': self.prompt.get(
+                'backstory',
+                'Especialista em tintas Suvinil com contexto mantido.',
             ),
-            # tools=[rag_search_tool, db_query_tool],
-            tools=[],
-            llm=self.llm,
+        }
+
+    def create_conversation_agent(self) -> Agent:
+        """Cria o agente de conversa usando o prompt já processado."""
+        return self._new_agent(self.persona(), self.tools, self.llm)
+
+    @staticmethod
+    def _new_agent(persona: dict[str, str], tools: list, llm) -> Agent:
+        return Agent(
+            **persona,
+            tools=tools,
+            llm=llm,
             verbose=True,
             max_iter=3,
         )
 
-    def process_query(self, query: str) -> str:
-        """Process a user query with single task to minimize API calls."""
-        if not query or not query.strip():
-            return 'Por favor, faça uma pergunta para que eu possa ajudá-lo.'
-
-        agent = self.create_conversation_agent()
-
-        task = Task(
-            description=(
-                f"Analise '{query}'. Use tools apenas se necessário "
-                '(DB para dados estruturados, RAG para documentos). '
-                'Responda diretamente se possível, sem chamadas extras.'
-            ),
+    @staticmethod
+    def create_task(
+        agent: Agent,
+        query: str,
+        history: list[dict[str, str]] | None = None,
+    ) -> Task:
+        """Cria a tarefa de uma consulta para o agente."""
+        description = (
+            f"Analise '{query}'. Use tools apenas se necessário "
+            '(DB para dados estruturados, RAG para documentos). '
+            'Responda diretamente se possível, sem chamadas extras.'
+        )
+        if history:
+            description += '\n\nHistórico recente:\n' + '\n'.join(
+                f"{message['role']}: {message['content']}"
+                for message in history
+            )
+        return Task(
+            description=description,
             agent=agent,
             expected_output='Resposta final concisa à query.',
         )
 
+    @staticmethod
+    def _build_crew(
+        persona: dict[str, str], tools: list, llm
+    ) -> tuple[Agent, Crew]:
+        """Build an agent and its crew to be reused by many queries."""
+        agent = ConversationAgent._new_agent(persona, tools, llm)
         crew = Crew(
             agents=[agent],
-            tasks=[task],
+            tasks=[ConversationAgent.create_task(agent, '')],
             process=Process.sequential,
             verbose=1,
             cache=True,
-            memory=True,
+            # O Crew volta ao pool e atende outros usuários: sem memória
+            # entre consultas, o histórico vai só na descrição da tarefa.
+            memory=False,
+        )
+        return agent, crew
+
+    def route(self, query: str) -> str:
+        """
+        Choose between a single direct LLM call and the CrewAI crew.
+
+        The crew is only worth its orchestration overhead when the agent
+        has tools and the query asks for the structured data they provide
+        (prices, stock, listings); everything else is answered directly with
+        the RAG context.
+        """
+        mode = get_settings().CHAT_ROUTER_MODE
+        if mode != 'auto':
+            return mode
+        if not self.tools:
+            return 'direct'
+
+        normalized = normalize_query(query)
+        return (
+            'crew'
+            if any(hint in normalized for hint in TOOL_HINTS)
+            else 'direct'
+        )
+
+    def build_messages(
+        self, query: str, history: list[dict[str, str]] | None = None
+    ) -> list[dict[str, str]]:
+        """Mensagens do caminho direto: persona, contexto RAG e histórico."""
+        persona = self.persona()
+        system = (
+            f"{persona['role']}\n\nObjetivo: {persona['goal']}\n\n"
+            f"{persona['backstory']}"
+        )
+        context = self.rag_service.get_relevant_context(query)
+        if context:
+            system += (
+                '\n\nUse o contexto da base de conhecimento abaixo quando '
+                f'for relevante:\n{context}'
+            )
+
+        return [
+            {'role': 'system', 'content': system},
+            *(history or []),
+            {'role': 'user', 'content': query},
+        ]
+
+    def process_query(
+        self, query: str, history: list[dict[str, str]] | None = None
+    ) -> str:
+        """
+        Answer a query by the direct path or, if tools are needed, the crew.
+
+        Concurrent calls with the same normalized query and context
+        fingerprint wait for a single LLM call and share its answer.
+        """
+        if not query or not query.strip():
+            return EMPTY_QUERY_RESPONSE
+
+        key = (normalize_query(query), self.context_fingerprint(history))
+        response, _ = llm_flights.do(key, self._answer, query, history)
+        return response
+
+    def context_fingerprint(
+        self, history: list[dict[str, str]] | None = None
+    ) -> str:
+        """Hash of what besides the query shapes the answer."""
+        payload = json.dumps(
+            [
+                self.prompt_version,
+                self.rag_service.index_version,
+                history or [],
+            ],
+            sort_keys=True,
+            default=str,
         )
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
 
+    def _answer(self, query: str, history: list[dict[str, str]] | None) -> str:
+        """Run the routed LLM call of a query."""
+        started = time.perf_counter()
+        path = self.route(query)
         try:
+            if path == 'crew':
+                response, prompt_tokens = self._run_crew(query, history)
+            else:
+                response, prompt_tokens = self._run_direct(query, history)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                return get_local_llm().generate(query)
+            else:
+                raise
+
+        route_stats.record(
+            path, (time.perf_counter() - started) * 1000, prompt_tokens
+        )
+        return response or EMPTY_RESPONSE
+
+    def _run_direct(
+        self, query: str, history: list[dict[str, str]] | None
+    ) -> tuple[str, int | None]:
+        """Answer with a single LLM call."""
+        result = self._completion(self.build_messages(query, history))
+        usage = getattr(result, 'usage', None)
+        return (
+            str(result.choices[0].message.content or '').strip(),
+            getattr(usage, 'prompt_tokens', None),
+        )
+
+    def _run_crew(
+        self, query: str, history: list[dict[str, str]] | None
+    ) -> tuple[str, int | None]:
+        """Answer through the pooled CrewAI crew."""
+        started = time.perf_counter()
+        with self.pool.checkout() as (agent, crew):
+            crew.tasks = [self.create_task(agent, query, history)]
+            self.pool.record_setup((time.perf_counter() - started) * 1000)
+            # O uso de tokens acumula no Crew reutilizado: vale a diferença.
+            before = _prompt_tokens(crew.usage_metrics) or 0
+            # Cada chamada do agente passa pelo gateway (ver `GatewayLLM`).
             result = crew.kickoff()
 
-            if hasattr(result, 'raw'):
-                response = str(result.raw).strip()
-            else:
-                response = str(result).strip()
-            if not response:
-                return (
-                    'Desculpe, não consegui processar sua pergunta. '
-                    'Pode tentar reformulá-la?'
-                )
+        if hasattr(result, 'raw'):
+            response = str(result.raw).strip()
+        else:
+            response = str(result).strip()
+        prompt_tokens = _prompt_tokens(getattr(result, 'token_usage', None))
+        return response, (
+            prompt_tokens - before if prompt_tokens is not None else None
+        )
+
+    def _completion(self, messages: list[dict[str, str]], **kwargs: Any):
+        """Call the configured LLM through LiteLLM and the LLM gateway."""
+        return get_llm_gateway().call(
+            litellm.completion,
+            tokens=estimate_tokens(messages, kwargs.get('max_tokens')),
+            model=self.llm.model,
+            api_key=self.llm.api_key,
+            temperature=self.llm.temperature,
+            messages=messages,
+            **kwargs,
+        )
 
-            return response
+    def summarize(
+        self, previous: str | None, messages: list[dict[str, str]]
+    ) -> str:
+        """Fold older messages into the running conversation summary."""
+        transcript = '\n'.join(
+            f"{message['role']}: {message['content']}" for message in messages
+        )
+        prompt = (
+            'Atualize o resumo da conversa com as novas mensagens. Mantenha '
+            'fatos, preferências e decisões do usuário; seja conciso.\n\n'
+            f'Resumo atual: {previous or "(vazio)"}\n\n'
+            f'Novas mensagens:\n{transcript}'
+        )
+        result = self._completion(
+            [{'role': 'user', 'content': prompt}],
+            max_tokens=get_settings().CHAT_SUMMARY_MAX_TOKENS,
+        )
+        return str(result.choices[0].message.content or '').strip()
 
+    def stream_query(
+        self, query: str, history: list[dict[str, str]] | None = None
+    ) -> Iterator[str]:
+        """Stream the answer to a query token by token."""
+        if not query or not query.strip():
+            yield EMPTY_QUERY_RESPONSE
+            return
+
+        # O Crew só devolve a resposta completa (com o raciocínio ReAct);
+        # o streaming sempre usa o caminho direto.
+        started = time.perf_counter()
+        prompt_tokens = None
+        messages = self.build_messages(query, history)
+        streamed = False
+        try:
+            stream = self._completion(
+                messages,
+                stream=True,
+                stream_options={'include_usage': True},
+            )
+            for chunk in stream:
+                usage = getattr(chunk, 'usage', None)
+                if isinstance(getattr(usage, 'prompt_tokens', None), int):
+                    prompt_tokens = usage.prompt_tokens
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    streamed = True
+                    yield token
         except Exception as e:
-            if 'quota exceeded' in str(e).lower():
-                local_llm = get_llm(use_local_fallback=True)
-                result = local_llm(query)[0]['generated_text']
-                return str(result).strip()
-            else:
+            # Com parte da resposta já enviada, outra resposta completa
+            # seria emendada nela: o streaming termina com erro.
+            if streamed or not is_rate_limit_error(e):
                 raise
+            yield get_local_llm().generate(_local_prompt(messages))
+            return
 
-        return result
+        route_stats.record(
+            'stream', (time.perf_counter() - started) * 1000, prompt_tokens
+        )
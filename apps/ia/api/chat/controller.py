@@ -1,13 +1,21 @@
 """Controller for chat and conversation management."""
 
+import logging
+import time
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime
 from typing import Any
 
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy import Engine, and_, select
+from sqlalchemy.orm import Session, selectinload
+from starlette.concurrency import run_in_threadpool
 
-from apps.core.models.user import User
-from apps.ia.agents.conversation_agent import ConversationAgent
+from apps.core.api.authentication.controller import Principal
+from apps.core.clients.ai_clients import ai_clients, get_rag_service
+from apps.ia.agents.conversation_agent import (
+    EMPTY_RESPONSE,
+    ConversationAgent,
+)
 from apps.ia.api.chat.schemas import (
     ChatMessageSchema,
     ChatResponseSchema,
@@ -16,22 +24,41 @@ from apps.ia.api.chat.schemas import (
 )
 from apps.ia.models.conversation import Conversation
 from apps.ia.models.message import Message
+from apps.ia.services.chat_executor import (
+    ChatCapacityError,
+    record_latency,
+    run_chat,
+    stream_chat,
+)
+from apps.ia.services.context_builder import ConversationContext
 from apps.ia.services.rag_service import RAGService
+from apps.ia.services.response_cache import get_response_cache
 from apps.packpage.generic_controller import GenericController
 
+logger = logging.getLogger(__name__)
+
+
+async def _single_token(text: str) -> AsyncIterator[str]:
+    """Async iterator over a single, already complete answer."""
+    yield text
+
 
 class ChatController(GenericController):
     """Controller for chat operations."""
 
     def __init__(
-        self, conversation_agent: ConversationAgent | None = None
+        self,
+        conversation_agent: ConversationAgent | None = None,
+        rag_service: RAGService | None = None,
     ) -> None:
         """Initialize chat controller."""
         super().__init__(Conversation)
+        rag_service = rag_service or get_rag_service()
         if conversation_agent is None:
-            rag_service = RAGService()
-            conversation_agent = ConversationAgent(rag_service)
+            conversation_agent = ai_clients.get_conversation_agent(rag_service)
         self.conversation_agent = conversation_agent
+        self.response_cache = get_response_cache(rag_service)
+        self.context = ConversationContext.from_settings(self._summarize)
 
     def save(self, db_session: Session, obj: Conversation) -> Conversation:
         """Save a new conversation with additional processing."""
@@ -73,11 +100,264 @@ class ChatController(GenericController):
         self,
         session: Session,
         chat_data: ChatMessageSchema,
-        current_user: User,
+        current_user: Principal,
         request_ip: str,
     ) -> ChatResponseSchema:
         """Send a chat message and get AI response."""
+        conversation, user_message, history = self._start_exchange(
+            session, chat_data, current_user, request_ip
+        )
+        cached = self._cached_answer(chat_data.message, history)
+        if cached is None:
+            ai_response = self.conversation_agent.process_query(
+                chat_data.message, history
+            )
+            self._remember_answer(chat_data.message, history, ai_response)
+            cached = ai_response, None
+        ai_response, cache = cached
+        response = self._finish_exchange(
+            session,
+            conversation,
+            user_message,
+            ai_response,
+            current_user,
+            request_ip,
+            cache,
+        )
+        self.refresh_summary(session.get_bind(), conversation.id)
+        return response
+
+    async def send_message_async(
+        self,
+        session: Session,
+        chat_data: ChatMessageSchema,
+        current_user: Principal,
+        request_ip: str,
+    ) -> ChatResponseSchema:
+        """
+        Send a chat message without blocking the event loop.
+
+        The conversation summary is not refreshed here; the caller schedules
+        `refresh_summary_async` after the response is sent.
+        """
+        # Acesso ao banco no threadpool do Starlette; o LLM/crew no executor
+        # limitado de chat.
+        conversation, user_message, history = await run_in_threadpool(
+            self._start_exchange, session, chat_data, current_user, request_ip
+        )
+        started = time.perf_counter()
+        cached = await run_in_threadpool(
+            self._cached_answer, chat_data.message, history
+        )
+        if cached is None:
+            ai_response = await run_chat(
+                self.conversation_agent.process_query,
+                chat_data.message,
+                history,
+            )
+            await run_in_threadpool(
+                self._remember_answer, chat_data.message, history, ai_response
+            )
+            cached = ai_response, None
+        ai_response, cache = cached
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        record_latency(elapsed_ms, elapsed_ms)
+        return await run_in_threadpool(
+            self._finish_exchange,
+            session,
+            conversation,
+            user_message,
+            ai_response,
+            current_user,
+            request_ip,
+            cache,
+        )
+
+    async def stream_message(
+        self,
+        session: Session,
+        chat_data: ChatMessageSchema,
+        current_user: Principal,
+        request_ip: str,
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Stream the AI response as `(event, data)` pairs.
+
+        Emits `start` with the conversation, one `token` per chunk of the
+        answer (a single one for cached answers) and, once the assistant
+        message is stored, `done` with its id and the time to first token.
+        """
+
+        def start() -> tuple[int, int, list[dict[str, str]], str, Engine]:
+            conversation, user_message, history = self._start_exchange(
+                session, chat_data, current_user, request_ip
+            )
+            return (
+                conversation.id,
+                user_message.id,
+                history,
+                current_user.username,
+                session.get_bind(),
+            )
+
+        # A sessão da requisição é fechada antes do corpo do streaming; a
+        # resposta é gravada depois numa sessão própria.
+        (
+            conversation_id,
+            user_message_id,
+            history,
+            username,
+            bind,
+        ) = await run_in_threadpool(start)
+        started = time.perf_counter()
+        cached = await run_in_threadpool(
+            self._cached_answer, chat_data.message, history
+        )
+        if cached is None:
+            tokens = stream_chat(
+                self.conversation_agent.stream_query,
+                chat_data.message,
+                history,
+            )
+        else:
+            tokens = _single_token(cached[0])
+        yield 'start', {
+            'conversation_id': conversation_id,
+            'user_message_id': user_message_id,
+        }
+
+        chunks = []
+        ttft_ms = None
+        async for token in tokens:
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+            chunks.append(token)
+            yield 'token', {'text': token}
+
+        total_ms = (time.perf_counter() - started) * 1000
+        ttft_ms = total_ms if ttft_ms is None else ttft_ms
+        record_latency(ttft_ms, total_ms)
+        logger.info(
+            f'Chat em streaming: primeiro token em {ttft_ms:.0f} ms, '
+            f'resposta completa em {total_ms:.0f} ms'
+        )
+
+        ai_response = ''.join(chunks).strip() or EMPTY_RESPONSE
+        if cached is None:
+            await run_in_threadpool(
+                self._remember_answer, chat_data.message, history, ai_response
+            )
+        message_id = await run_in_threadpool(
+            self._save_streamed_response,
+            bind,
+            conversation_id,
+            ai_response,
+            username,
+            request_ip,
+        )
+        yield 'done', {
+            'conversation_id': conversation_id,
+            'message_id': message_id,
+            'user_message_id': user_message_id,
+            'cache': cached[1] if cached else None,
+            'ttft_ms': round(ttft_ms, 1),
+            'total_ms': round(total_ms, 1),
+        }
 
+    def refresh_summary(self, bind: Engine, conversation_id: int) -> None:
+        """Update the rolling summary of a conversation in its own session."""
+        try:
+            with Session(bind) as session:
+                conversation = session.get(Conversation, conversation_id)
+                if conversation is not None:
+                    self.context.refresh_summary(session, conversation)
+        except Exception as e:
+            logger.warning(
+                f'Falha ao resumir a conversa {conversation_id}: {str(e)}'
+            )
+
+    async def refresh_summary_async(
+        self, bind: Engine, conversation_id: int
+    ) -> None:
+        """Refresh the summary in the chat executor, after the response."""
+        try:
+            await run_chat(self.refresh_summary, bind, conversation_id)
+        except ChatCapacityError:
+            # Sem capacidade agora: o resumo é feito numa próxima mensagem.
+            logger.info(
+                f'Resumo da conversa {conversation_id} adiado por falta de '
+                'capacidade'
+            )
+
+    def _summarize(
+        self, previous: str | None, messages: list[dict[str, str]]
+    ) -> str:
+        """Summarize messages with the controller's conversation agent."""
+        return self.conversation_agent.summarize(previous, messages)
+
+    def _cached_answer(
+        self, query: str, history: list[dict[str, str]]
+    ) -> tuple[str, str] | None:
+        """Cached `(response, tier)` for a query, if it can be reused."""
+        # Respostas dependem do histórico; só perguntas sem contexto de
+        # conversa são compartilhadas entre usuários.
+        if history:
+            return None
+        try:
+            return self.response_cache.lookup(
+                query, self.conversation_agent.prompt_version
+            )
+        except Exception as e:
+            logger.warning(f'Falha ao consultar cache de respostas: {str(e)}')
+            return None
+
+    def _remember_answer(
+        self, query: str, history: list[dict[str, str]], response: str
+    ) -> None:
+        """Cache the response of a query asked without history."""
+        if history or not response or response == EMPTY_RESPONSE:
+            return
+        try:
+            self.response_cache.store(
+                query, self.conversation_agent.prompt_version, response
+            )
+        except Exception as e:
+            logger.warning(f'Falha ao gravar cache de respostas: {str(e)}')
+
+    def _save_streamed_response(
+        self,
+        bind: Engine,
+        conversation_id: int,
+        content: str,
+        username: str,
+        request_ip: str,
+    ) -> int:
+        """Store a streamed AI response in its own session."""
+        with Session(bind) as session:
+            message = Message(
+                txt_content=content,
+                str_role='assistant',
+                conversation_id=conversation_id,
+                str_status='active',
+                audit_user_ip=request_ip,
+                audit_user_login=username,
+            )
+            session.add(message)
+            session.get(
+                Conversation, conversation_id
+            ).dt_last_message_at = datetime.now(UTC)
+            session.commit()
+            return message.id
+
+    def _start_exchange(
+        self,
+        session: Session,
+        chat_data: ChatMessageSchema,
+        current_user: Principal,
+        request_ip: str,
+    ) -> tuple[Conversation, Message, list[dict[str, str]]]:
+        """Resolve the conversation, load its history and store the message."""
+        history = []
         if chat_data.conversation_id:
             conversation = self.get_user_conversation(
                 session, chat_data.conversation_id, current_user.id
@@ -87,6 +367,7 @@ class ChatController(GenericController):
                 raise ValueError(
                     'Conversa não encontrada ou não pertence ao usuário'
                 )
+            history = self.context.build(session, conversation)
         else:
             conversation = self._create_new_conversation(
                 session, current_user, request_ip, chat_data.message
@@ -95,9 +376,22 @@ class ChatController(GenericController):
         user_message = self._save_user_message(
             session, conversation, chat_data.message, current_user, request_ip
         )
+        # Confirma antes da chamada ao LLM para não manter uma conexão do
+        # pool presa durante a geração da resposta.
+        session.commit()
+        return conversation, user_message, history
 
-        ai_response = self.conversation_agent.process_query(chat_data.message)
-
+    def _finish_exchange(
+        self,
+        session: Session,
+        conversation: Conversation,
+        user_message: Message,
+        ai_response: str,
+        current_user: Principal,
+        request_ip: str,
+        cache: str | None = None,
+    ) -> ChatResponseSchema:
+        """Store the AI response and build the chat response."""
         ai_message = self._save_ai_message(
             session, conversation, ai_response, current_user, request_ip
         )
@@ -110,10 +404,15 @@ class ChatController(GenericController):
             conversation_id=conversation.id,
             message_id=ai_message.id,
             user_message_id=user_message.id,
+            cache=cache,
         )
 
     def _create_new_conversation(
-        self, session: Session, user: User, request_ip: str, first_message: str
+        self,
+        session: Session,
+        user: Principal,
+        request_ip: str,
+        first_message: str,
     ) -> Conversation:
         """Create a new conversation."""
         title = self._generate_conversation_title(first_message)
@@ -146,7 +445,7 @@ class ChatController(GenericController):
         session: Session,
         conversation: Conversation,
         content: str,
-        user: User,
+        user: Principal,
         request_ip: str,
     ) -> Message:
         """Save user message to database."""
@@ -168,7 +467,7 @@ class ChatController(GenericController):
         session: Session,
         conversation: Conversation,
         content: str,
-        user: User,
+        user: Principal,
         request_ip: str,
     ) -> Message:
         """Save AI response message to database."""
@@ -189,7 +488,7 @@ class ChatController(GenericController):
         self,
         session: Session,
         conversation_data: ConversationCreateSchema,
-        current_user: User,
+        current_user: Principal,
         request_ip: str,
     ) -> Conversation:
         """Create a new conversation."""
@@ -235,14 +534,22 @@ class ChatController(GenericController):
         self, session: Session, conversation_id: int, user_id: int
     ) -> Conversation | None:
         """Get conversation with messages."""
-        return self.get_user_conversation(session, conversation_id, user_id)
+        return session.scalar(
+            select(Conversation)
+            .options(selectinload(Conversation.messages))
+            .where(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id,
+                Conversation.str_status != 'deleted',
+            )
+        )
 
     def update_conversation(
         self,
         session: Session,
         conversation_id: int,
         conversation_data: ConversationUpdateSchema,
-        current_user: User,
+        current_user: Principal,
         request_ip: str,
     ) -> Conversation | None:
         """Update a conversation."""
@@ -1,13 +1,34 @@
 """Router for chat and conversation endpoints."""
 
-from typing import Annotated
+import json
+import logging
+import math
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
-from apps.core.api.authentication.controller import get_current_user
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+)
+from apps.core.clients.ai_clients import get_rag_service
 from apps.core.database.session import get_session
-from apps.core.models.user import User
+from apps.ia.agents.conversation_agent import (
+    agent_pool_stats,
+    llm_flights,
+    route_stats,
+)
 from apps.ia.api.chat.controller import ChatController
 from apps.ia.api.chat.schemas import (
     ChatMessageSchema,
@@ -18,15 +39,38 @@ from apps.ia.api.chat.schemas import (
     ConversationUpdateSchema,
     ConversationWithMessagesSchema,
 )
+from apps.ia.services.chat_executor import ChatCapacityError, chat_stats
+from apps.ia.services.rag_service import RAGService
+from apps.ia.services.response_cache import get_response_cache
 from apps.packpage.client_ip import get_client_ip
+from apps.packpage.llm import get_local_llm
+from apps.packpage.llm_gateway import LLMOverloadedError, get_llm_gateway
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 DbSession = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
-ChatControllerDep = Annotated[
-    ChatController, Depends(lambda: ChatController())
-]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+RAGServiceDep = Annotated[RAGService, Depends(get_rag_service)]
+
+
+def get_chat_controller(rag_service: RAGServiceDep) -> ChatController:
+    """Build a chat controller with the worker's shared agent."""
+    return ChatController(rag_service=rag_service)
+
+
+ChatControllerDep = Annotated[ChatController, Depends(get_chat_controller)]
+
+
+def _overloaded(error: LLMOverloadedError) -> HTTPException:
+    """503 telling the client when the LLM quota should allow a retry."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={'Retry-After': str(max(1, math.ceil(error.retry_after)))},
+    )
+
 
 # TODO: implements Validations and Permissions com o (validate_transaction_access)
 @router.post('/chat', response_model=ChatResponseSchema)
@@ -36,14 +80,30 @@ async def send_chat_message(
     session: DbSession,
     current_user: CurrentUser,
     chat_controller: ChatControllerDep,
+    background_tasks: BackgroundTasks,
 ):
     """Send a chat message and get AI response."""
     client_ip = get_client_ip(request)
 
     try:
-        return chat_controller.send_message(
+        get_llm_gateway().admit()
+        response = await chat_controller.send_message_async(
             session, chat_data, current_user, client_ip
         )
+        background_tasks.add_task(
+            chat_controller.refresh_summary_async,
+            session.get_bind(),
+            response.conversation_id,
+        )
+        return response
+    except LLMOverloadedError as e:
+        raise _overloaded(e) from e
+    except ChatCapacityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={'Retry-After': '1'},
+        ) from e
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
@@ -55,6 +115,80 @@ async def send_chat_message(
         ) from e
 
 
+def _sse(event: str, data: dict[str, Any]) -> str:
+    """Format a server-sent event."""
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+@router.post('/chat/stream')
+async def stream_chat_message(
+    request: Request,
+    chat_data: ChatMessageSchema,
+    session: DbSession,
+    current_user: CurrentUser,
+    chat_controller: ChatControllerDep,
+):
+    """Send a chat message and stream the AI response over SSE."""
+    client_ip = get_client_ip(request)
+    events = chat_controller.stream_message(
+        session, chat_data, current_user, client_ip
+    )
+
+    # Erros de validação e de capacidade ocorrem antes do primeiro evento
+    # e ainda podem virar respostas HTTP normais.
+    try:
+        get_llm_gateway().admit()
+        first_event = await anext(events)
+    except LLMOverloadedError as e:
+        raise _overloaded(e) from e
+    except ChatCapacityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={'Retry-After': '1'},
+        ) from e
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield _sse(*first_event)
+        try:
+            async for event in events:
+                yield _sse(*event)
+        except Exception as e:
+            logger.error(f'Erro no streaming do chat: {str(e)}', exc_info=True)
+            yield _sse('error', {'detail': 'Erro interno do servidor'})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        background=BackgroundTask(
+            chat_controller.refresh_summary_async,
+            session.get_bind(),
+            first_event[1]['conversation_id'],
+        ),
+    )
+
+
+@router.get('/chat/stats')
+async def get_chat_stats(
+    current_user: CurrentUser, rag_service: RAGServiceDep
+):
+    """Get chat concurrency, latency, cache and agent pool statistics."""
+    return {
+        **chat_stats(),
+        'routes': route_stats.stats(),
+        'coalescing': llm_flights.stats(),
+        'llm': get_llm_gateway().stats(),
+        'local_llm': get_local_llm().stats(),
+        'response_cache': get_response_cache(rag_service).stats(),
+        'agent_pools': agent_pool_stats(),
+    }
+
+
 @router.post('/conversations', response_model=ConversationSchema)
 async def create_conversation(
     request: Request,
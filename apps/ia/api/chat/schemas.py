@@ -77,6 +77,7 @@ class ChatResponseSchema(BaseModel):
     conversation_id: int
     message_id: int
     user_message_id: int
+    cache: str | None = None  # exact, semantic
 
 
 class ConversationListSchema(BaseModel):
@@ -7,8 +7,8 @@ from typing import Any
 
 from sqlalchemy.orm import Session
 
-from apps.core.models.user import User
-from apps.ia.agents.conversation_agent import ConversationAgent
+from apps.core.api.authentication.controller import Principal
+from apps.core.clients.ai_clients import ai_clients, get_rag_service
 from apps.ia.api.documents.schemas import DocumentUploadSchema
 from apps.ia.models.document import Document
 from apps.ia.services.rag_service import RAGService
@@ -23,19 +23,32 @@ class DocController(GenericController):
     ) -> None:
         """Initialize document controller."""
         super().__init__(Document)
-        self.rag_service = rag_service or RAGService()
+        self._rag_service = rag_service
         self.conversation_agent = None
         if init_agent:
             try:
-                self.conversation_agent = ConversationAgent(self.rag_service)
+                self.conversation_agent = ai_clients.get_conversation_agent(
+                    self.rag_service
+                )
             except ValueError:
                 self.conversation_agent = None
 
+    @property
+    def rag_service(self) -> RAGService:
+        """RAG service in use, defaulting to the worker's shared instance."""
+        if self._rag_service is None:
+            return get_rag_service()
+        return self._rag_service
+
+    @rag_service.setter
+    def rag_service(self, rag_service: RAGService) -> None:
+        self._rag_service = rag_service
+
     def upload_document(
         self,
         session: Session,
         document_data: DocumentUploadSchema,
-        current_user: User,
+        current_user: Principal,
         request_ip: str,
     ) -> Document:
         """Upload document to knowledge base."""
@@ -73,6 +86,11 @@ class DocController(GenericController):
         session.add(document)
         session.commit()
 
+        if self.rag_service.read_only:
+            # Pendente: o escritor indexa o documento pelo IndexSync e só
+            # então preenche dt_processed_at.
+            return document
+
         metadata = document_data.json_metadata or {}
         metadata.update(
             {
@@ -154,6 +172,7 @@ class DocController(GenericController):
                 pass
 
         self.delete(session, document_id)
+        self.rag_service.delete_document(document_id)
 
     def update_document_status(
         self, session: Session, document_id: int, status: str
@@ -165,7 +184,10 @@ class DocController(GenericController):
         if status == 'processed':
             document.dt_processed_at = datetime.now(UTC)
 
-        return self.update(session, document)
+        document = self.update(session, document)
+        if status == 'deleted':
+            self.rag_service.delete_document(document_id)
+        return document
 
     def search_documents_by_content(
         self, session: Session, search_term: str, limit: int = 10
@@ -5,27 +5,33 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from apps.core.api.authentication.controller import get_current_user
-from apps.core.database.session import get_session
-from apps.core.models.user import User
+from apps.core.api.authentication.controller import (
+    Principal,
+    get_current_user,
+)
+from apps.core.api.authorization.controller import validate_transaction_access
+from apps.core.api.transaction.enum_operation_code import EnumOperationCode
+from apps.core.database.session import engine, get_session
 from apps.ia.api.documents.controller import DocController
 from apps.ia.api.documents.schemas import (
     DocumentListSchema,
     DocumentSchema,
     DocumentUploadSchema,
+    IndexRebuildStatusSchema,
 )
+from apps.ia.services.index_rebuilder import RebuildProgress, rebuild_job
 from apps.packpage.client_ip import get_client_ip
 
 router = APIRouter()
-doc_controller = DocController()
+doc_controller = DocController(init_agent=False)
 
 
 DbSession = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 # TODO: implements Validations and Permissions com o (validate_transaction_access)
 @router.post('/documents', response_model=DocumentSchema)
-async def upload_document(
+def upload_document(
     request: Request,
     document_data: DocumentUploadSchema,
     session: DbSession,
@@ -174,3 +180,62 @@ async def search_documents_content(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail='Erro na busca de documentos',
         ) from e
+
+
+@router.post(
+    '/documents/index/rebuild',
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=IndexRebuildStatusSchema,
+)
+async def rebuild_knowledge_base_index(
+    session: DbSession,
+    current_user: CurrentUser,
+):
+    """Rebuild the knowledge base index from the stored documents."""
+    validate_transaction_access(
+        session, current_user, EnumOperationCode.OP_1070008.value
+    )
+
+    rag_service = doc_controller.rag_service
+    if rag_service.read_only:
+        # Só o worker escritor publica o índice; ele atende o pedido no
+        # próximo ciclo de sincronização.
+        rag_service.index_store.request_rebuild()
+        return RebuildProgress(status='requested').as_dict()
+
+    started = rebuild_job.start(
+        doc_controller.rag_service, lambda: Session(engine)
+    )
+    if not started:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Reconstrução do índice já está em andamento',
+        )
+
+    return rebuild_job.progress.as_dict()
+
+
+@router.get(
+    '/documents/index/rebuild', response_model=IndexRebuildStatusSchema
+)
+async def get_knowledge_base_index_rebuild_status(
+    session: DbSession,
+    current_user: CurrentUser,
+):
+    """Get the progress of the knowledge base index rebuild."""
+    validate_transaction_access(
+        session, current_user, EnumOperationCode.OP_1070008.value
+    )
+    return rebuild_job.progress.as_dict()
+
+
+@router.get('/documents/index/stats')
+async def get_knowledge_base_index_stats(
+    session: DbSession,
+    current_user: CurrentUser,
+):
+    """Get knowledge base index details and search cache counters."""
+    validate_transaction_access(
+        session, current_user, EnumOperationCode.OP_1070008.value
+    )
+    return doc_controller.rag_service.index_stats()
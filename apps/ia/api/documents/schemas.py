@@ -41,3 +41,19 @@ class DocumentListSchema(BaseModel):
     total: int
     page: int
     per_page: int
+
+
+class IndexRebuildStatusSchema(BaseModel):
+    """Schema for the knowledge base index rebuild status."""
+
+    status: str
+    total_documents: int
+    documents_processed: int
+    chunks_indexed: int
+    started_at: datetime | None
+    finished_at: datetime | None
+    elapsed_seconds: float
+    docs_per_second: float
+    chunks_per_second: float
+    generation: str | None
+    error: str | None
@@ -48,9 +48,17 @@ class Conversation(AbstractBaseModel):
         name='str_status',  # active, archived, deleted
     )
 
+    # Resumo incremental das mensagens que saíram da janela de histórico
+    txt_summary: Mapped[str | None] = mapped_column(
+        Text, nullable=True, name='txt_summary'
+    )
+    int_summary_message_id: Mapped[int | None] = mapped_column(
+        Integer, nullable=True, name='int_summary_message_id'
+    )
+
     # Relacionamentos
     user: Mapped['User'] = relationship(
-        'User', back_populates='conversations', lazy='subquery'
+        'User', back_populates='conversations', lazy='select'
     )
     messages: Mapped[list['Message']] = relationship(
         'Message',
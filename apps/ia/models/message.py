@@ -3,7 +3,15 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, text
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from apps.packpage.base_model import AbstractBaseModel
@@ -58,9 +66,11 @@ class Message(AbstractBaseModel):
 
     # Relacionamentos
     conversation: Mapped['Conversation'] = relationship(
-        'Conversation', back_populates='messages', lazy='subquery'
+        'Conversation', back_populates='messages', lazy='select'
     )
 
+    __table_args__ = (Index('idx_message_conversation', conversation_id, id),)
+
     def __repr__(self) -> str:
         """String representation of message."""
         content_preview = (
@@ -0,0 +1,270 @@
+"""Approximate nearest neighbour (ANN) indexes for the RAG vector store."""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+RECALL_K = 10
+RECALL_QUERIES = 200
+QUANTIZED_TYPES = {'sq8', 'pq', 'ivf_pq'}
+
+
+@dataclass
+class ANNConfig:
+    """Index type and build/search parameters of the vector index."""
+
+    index_type: str = 'flat'  # flat, sq8, pq, ivf_flat, ivf_pq, hnsw
+    min_vectors: int = 50_000
+    nlist: int = 0
+    nprobe: int = 16
+    pq_m: int = 16
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    train_sample: int = 50_000
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> 'ANNConfig':
+        """Build the configuration from the application settings."""
+        return cls(
+            index_type=settings.RAG_INDEX_TYPE,
+            min_vectors=settings.RAG_ANN_MIN_VECTORS,
+            nlist=settings.RAG_IVF_NLIST,
+            nprobe=settings.RAG_IVF_NPROBE,
+            pq_m=settings.RAG_PQ_M,
+            pq_nbits=settings.RAG_PQ_NBITS,
+            hnsw_m=settings.RAG_HNSW_M,
+            ef_construction=settings.RAG_HNSW_EF_CONSTRUCTION,
+            ef_search=settings.RAG_HNSW_EF_SEARCH,
+            train_sample=settings.RAG_ANN_TRAIN_SAMPLE,
+        )
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Return the configuration name of a FAISS index."""
+    if isinstance(index, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(index, faiss.IndexIVFPQ):
+        return 'ivf_pq'
+    if isinstance(index, faiss.IndexIVF):
+        return 'ivf_flat'
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return 'sq8'
+    if isinstance(index, faiss.IndexPQ):
+        return 'pq'
+    return 'flat'
+
+
+def apply_search_params(
+    index: faiss.Index,
+    config: ANNConfig,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+) -> None:
+    """Set `nprobe` (IVF) or `efSearch` (HNSW) on an index."""
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(nprobe or config.nprobe, index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search or config.ef_search
+
+
+def build_index(
+    vectors: np.ndarray, config: ANNConfig, index_type: str | None = None
+) -> faiss.Index:
+    """Build (and train on a sample, if needed) an index over `vectors`."""
+    index_type = index_type or config.index_type
+    count, dimension = vectors.shape
+
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+    elif index_type in {'sq8', 'pq'}:
+        if index_type == 'sq8':
+            index = faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_8bit
+            )
+        else:
+            index = faiss.IndexPQ(dimension, config.pq_m, config.pq_nbits)
+        index.train(_training_sample(vectors, config))
+    elif index_type in {'ivf_flat', 'ivf_pq'}:
+        nlist = config.nlist or int(4 * math.sqrt(count))
+        nlist = max(1, min(nlist, count))
+        quantizer = faiss.IndexFlatL2(dimension)
+        if index_type == 'ivf_pq':
+            index = faiss.IndexIVFPQ(
+                quantizer, dimension, nlist, config.pq_m, config.pq_nbits
+            )
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+
+        index.train(_training_sample(vectors, config))
+    else:
+        index = faiss.IndexFlatL2(dimension)
+
+    index.add(vectors)
+    apply_search_params(index, config)
+    return index
+
+
+def _training_sample(vectors: np.ndarray, config: ANNConfig) -> np.ndarray:
+    """Random sample of at most `train_sample` vectors."""
+    rng = np.random.default_rng(0)
+    count = len(vectors)
+    size = min(count, config.train_sample)
+    return vectors[rng.choice(count, size, replace=False)]
+
+
+def can_build(count: int, config: ANNConfig, index_type: str) -> bool:
+    """Whether there are enough vectors to train the index type."""
+    if index_type == 'ivf_pq':
+        return count >= max(2**config.pq_nbits, config.nlist)
+    if index_type == 'pq':
+        return count >= 2**config.pq_nbits
+    if index_type == 'ivf_flat':
+        return count >= max(1, config.nlist)
+    return True
+
+
+def exact_neighbours(
+    vectors: np.ndarray, queries: np.ndarray, k: int
+) -> np.ndarray:
+    """Exact top-k neighbour positions by brute force."""
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, min(k, len(vectors)))
+    return truth
+
+
+def recall_at_k(
+    index: faiss.Index, truth: np.ndarray, queries: np.ndarray
+) -> float:
+    """Fraction of the exact top-k neighbours that `index` returns."""
+    _, approx = index.search(queries, truth.shape[1])
+    hits = sum(
+        len(set(expected) & set(found[found >= 0]))
+        for expected, found in zip(truth, approx, strict=True)
+    )
+    return round(hits / truth.size, 4) if truth.size else 1.0
+
+
+def measure_recall(
+    index: faiss.Index,
+    vectors: np.ndarray,
+    config: ANNConfig,
+    k: int = RECALL_K,
+) -> dict[str, Any]:
+    """Report recall@k and latency for a sweep of nprobe/efSearch values."""
+    rng = np.random.default_rng(1)
+    queries = vectors[
+        rng.choice(len(vectors), min(RECALL_QUERIES, len(vectors)), False)
+    ]
+    truth = exact_neighbours(vectors, queries, k)
+
+    if isinstance(index, faiss.IndexIVF):
+        param = 'nprobe'
+        values = sorted({1, 4, 16, 64, config.nprobe})
+    elif isinstance(index, faiss.IndexHNSW):
+        param = 'ef_search'
+        values = sorted({16, 32, 64, 128, config.ef_search})
+    else:
+        return {'k': k, 'recall': recall_at_k(index, truth, queries)}
+
+    sweep = []
+    for value in values:
+        apply_search_params(index, config, **{param: value})
+        started = time.perf_counter()
+        recall = recall_at_k(index, truth, queries)
+        elapsed = time.perf_counter() - started
+        sweep.append(
+            {
+                param: value,
+                'recall': recall,
+                'ms_per_query': round(elapsed * 1000 / len(queries), 4),
+            }
+        )
+    apply_search_params(index, config)
+
+    configured = getattr(config, param)
+    return {
+        'k': k,
+        'recall': next(r['recall'] for r in sweep if r[param] == configured),
+        'sweep': sweep,
+    }
+
+
+def promote(vector_store: FAISS, config: ANNConfig) -> dict[str, Any]:
+    """Replace a flat index by the configured ANN index, same positions."""
+    flat = vector_store.index
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+
+    started = time.perf_counter()
+    index = build_index(vectors, config)
+    build_seconds = round(time.perf_counter() - started, 3)
+
+    report = {
+        'index_type': config.index_type,
+        'vectors': int(index.ntotal),
+        'build_seconds': build_seconds,
+        f'recall_at_{RECALL_K}': measure_recall(index, vectors, config),
+    }
+    vector_store.index = index
+    return report
+
+
+def vector_bytes_per_chunk(index: faiss.Index) -> float:
+    """Bytes used by one vector in the index, including graph links."""
+    if isinstance(index, faiss.IndexHNSW):
+        links = 2 * index.hnsw.nb_neighbors(0) * 4
+        return float(index.storage.sa_code_size() + links)
+    if isinstance(index, faiss.IndexIVF):
+        return float(index.code_size + 8)
+    return float(index.sa_code_size())
+
+
+def rerank(
+    query: list[float],
+    candidates: list[tuple[Any, float]],
+    vectors: list[list[float]],
+) -> list[tuple[Any, float]]:
+    """Reorder candidates by exact L2 distance to full-precision vectors."""
+    if not candidates:
+        return []
+
+    distances = np.sum(
+        (np.asarray(vectors, dtype=np.float32) - np.asarray(query)) ** 2,
+        axis=1,
+    )
+    order = np.argsort(distances, kind='stable')
+    return [(candidates[i][0], float(distances[i])) for i in order]
+
+
+def remove_chunks(
+    vector_store: FAISS, chunk_ids: list[str], config: ANNConfig
+) -> None:
+    """Delete chunks from the store, rebuilding indexes without removal."""
+    if not isinstance(vector_store.index, faiss.IndexHNSW):
+        vector_store.delete(chunk_ids)
+        return
+
+    # HNSW não suporta remove_ids: o grafo é reconstruído com os vetores
+    # restantes, mantendo a ordem das posições.
+    removed = set(chunk_ids)
+    positions = sorted(vector_store.index_to_docstore_id)
+    keep = [
+        position
+        for position in positions
+        if vector_store.index_to_docstore_id[position] not in removed
+    ]
+    vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+    vector_store.index = build_index(vectors[keep], config, 'hnsw')
+    vector_store.docstore.delete(chunk_ids)
+    vector_store.index_to_docstore_id = {
+        new_position: vector_store.index_to_docstore_id[old_position]
+        for new_position, old_position in enumerate(keep)
+    }
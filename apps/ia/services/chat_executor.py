@@ -0,0 +1,143 @@
+"""Bounded executor that runs the blocking chat (LLM/crew) work."""
+
+import asyncio
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from apps.packpage.settings import get_settings
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+_latencies: deque[tuple[float, float]] = deque(maxlen=1000)
+_END = object()
+
+
+class ChatCapacityError(Exception):
+    """Raised when the worker already has the maximum of chats queued."""
+
+
+def get_chat_executor() -> ThreadPoolExecutor:
+    """Process-wide executor limited to `CHAT_MAX_CONCURRENCY` threads."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_settings().CHAT_MAX_CONCURRENCY,
+                thread_name_prefix='chat',
+            )
+    return _executor
+
+
+def _release(_: Future) -> None:
+    global _in_flight
+    with _executor_lock:
+        _in_flight -= 1
+
+
+def _submit(func: Callable[..., Any], *args: Any) -> Future:
+    """Admit a call into the chat executor or raise `ChatCapacityError`."""
+    global _in_flight
+    settings = get_settings()
+    executor = get_chat_executor()
+    with _executor_lock:
+        if (
+            _in_flight
+            >= settings.CHAT_MAX_CONCURRENCY + settings.CHAT_MAX_QUEUE
+        ):
+            raise ChatCapacityError('Limite de conversas simultâneas atingido')
+        _in_flight += 1
+
+    # O contador é liberado quando a thread termina, mesmo que o cliente
+    # desconecte antes e a corrotina seja cancelada.
+    future = executor.submit(func, *args)
+    future.add_done_callback(_release)
+    return future
+
+
+async def run_chat(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run blocking chat work in the chat executor and await its result.
+
+    At most `CHAT_MAX_CONCURRENCY` calls run at once and up to
+    `CHAT_MAX_QUEUE` more wait for a thread; beyond that the call is
+    rejected with `ChatCapacityError` instead of piling up.
+    """
+    return await asyncio.wrap_future(_submit(func, *args))
+
+
+def stream_chat(
+    func: Callable[..., Iterator[str]], *args: Any
+) -> AsyncIterator[str]:
+    """
+    Run a blocking token iterator in the chat executor.
+
+    Admission happens immediately (so `ChatCapacityError` is raised before
+    any response is sent); the returned async iterator yields the tokens as
+    the executor thread produces them.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def produce() -> None:
+        try:
+            for token in func(*args):
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, token)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+
+    future = _submit(produce)
+
+    async def tokens() -> AsyncIterator[str]:
+        try:
+            while (token := await queue.get()) is not _END:
+                yield token
+            await asyncio.wrap_future(future)
+        finally:
+            # Cliente desconectado: a thread para no próximo token.
+            cancelled.set()
+
+    return tokens()
+
+
+def record_latency(ttft_ms: float, total_ms: float) -> None:
+    """Record the time to first token and total time of a chat."""
+    with _executor_lock:
+        _latencies.append((ttft_ms, total_ms))
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[int(fraction * (len(ordered) - 1))], 1)
+
+
+def chat_stats() -> dict[str, Any]:
+    """Return the chat limits, current usage and recent latencies."""
+    settings = get_settings()
+    with _executor_lock:
+        latencies = list(_latencies)
+
+    stats: dict[str, Any] = {
+        'in_flight': _in_flight,
+        'max_concurrency': settings.CHAT_MAX_CONCURRENCY,
+        'max_queue': settings.CHAT_MAX_QUEUE,
+        'recent_chats': len(latencies),
+    }
+    if latencies:
+        ttft = [ttft_ms for ttft_ms, _ in latencies]
+        total = [total_ms for _, total_ms in latencies]
+        stats.update(
+            {
+                'ttft_ms_p50': _percentile(ttft, 0.5),
+                'ttft_ms_p95': _percentile(ttft, 0.95),
+                'total_ms_p50': _percentile(total, 0.5),
+                'total_ms_p95': _percentile(total, 0.95),
+            }
+        )
+    return stats
@@ -0,0 +1,194 @@
+"""Memory-mapped storage of chunk text shared by every worker."""
+
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from itertools import islice
+from typing import Any
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+CHUNKS_PREFIX = 'chunks-'
+STALE_SECONDS = 3600
+SIZE_SAMPLE = 1000
+
+
+class ChunkTextStore(Docstore, AddableMixin):
+    """
+    Docstore that keeps chunk text and metadata in an append-only file.
+
+    Records are JSON blobs appended under an exclusive file lock and read
+    back through `mmap`, so the text lives in the page cache shared by all
+    workers instead of each process' heap. Only the `id -> (offset, length)`
+    map is held in memory and pickled with the index generation. Each new
+    store (e.g. after a rebuild) writes a new file, which is how the space
+    of deleted chunks is reclaimed.
+    """
+
+    def __init__(self, base_dir: str) -> None:
+        os.makedirs(base_dir, exist_ok=True)
+        self.path = os.path.join(
+            base_dir, f'{CHUNKS_PREFIX}{time.time_ns()}-{os.getpid()}.dat'
+        )
+        self._offsets: dict[str, tuple[int, int]] = {}
+        self._mmap: mmap.mmap | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {'path': self.path, '_offsets': self._offsets}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.path = state['path']
+        self._offsets = state['_offsets']
+        self._mmap = None
+        self._lock = threading.Lock()
+
+    def add(self, texts: dict[str, Document]) -> None:
+        """Append documents to the shared file."""
+        records = [
+            (
+                chunk_id,
+                json.dumps(
+                    {'t': doc.page_content, 'm': doc.metadata},
+                    ensure_ascii=False,
+                    default=str,
+                ).encode('utf-8'),
+            )
+            for chunk_id, doc in texts.items()
+        ]
+
+        with open(self.path, 'ab') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                offset = f.seek(0, os.SEEK_END)
+                for _, data in records:
+                    f.write(data)
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+        with self._lock:
+            for chunk_id, data in records:
+                self._offsets[chunk_id] = (offset, len(data))
+                offset += len(data)
+
+    def search(self, search: str) -> Document | str:
+        """Read a document by id."""
+        location = self._offsets.get(search)
+        if location is None:
+            return f'ID {search} not found.'
+
+        record = json.loads(self._read(*location))
+        return Document(
+            id=search, page_content=record['t'], metadata=record['m']
+        )
+
+    def delete(self, ids: list[str]) -> None:
+        """Forget documents; their bytes stay in the file until a rebuild."""
+        with self._lock:
+            for chunk_id in ids:
+                self._offsets.pop(chunk_id, None)
+
+    def items(self) -> Iterator[tuple[str, Document]]:
+        """Iterate over every stored document."""
+        for chunk_id in list(self._offsets):
+            doc = self.search(chunk_id)
+            if isinstance(doc, Document):
+                yield chunk_id, doc
+
+    def file_bytes(self) -> int:
+        """Size of the shared file on disk."""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def prune_stale_files(self) -> None:
+        """Remove chunk files of replaced stores no longer in use."""
+        base_dir = os.path.dirname(self.path)
+        # Outros workers podem ainda ler um arquivo anterior até recarregar
+        # o índice; só os parados há mais de uma hora são removidos.
+        cutoff = time.time() - STALE_SECONDS
+        for name in os.listdir(base_dir):
+            path = os.path.join(base_dir, name)
+            if (
+                name.startswith(CHUNKS_PREFIX)
+                and path != self.path
+                and os.path.getmtime(path) < cutoff
+            ):
+                os.remove(path)
+
+    def _read(self, offset: int, length: int) -> bytes:
+        with self._lock:
+            if self._mmap is None or offset + length > len(self._mmap):
+                # O arquivo cresce com novos uploads; remapeia sob demanda.
+                if self._mmap is not None:
+                    self._mmap.close()
+                with open(self.path, 'rb') as f:
+                    self._mmap = mmap.mmap(
+                        f.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+            return self._mmap[offset : offset + length]
+
+
+def docstore_items(docstore: Docstore) -> Iterator[tuple[str, Document]]:
+    """Iterate over the documents of any supported docstore."""
+    if isinstance(docstore, InMemoryDocstore):
+        return iter(list(docstore._dict.items()))
+    return docstore.items()
+
+
+def text_bytes_per_chunk(docstore: Docstore) -> dict[str, float]:
+    """Estimate per-process and shared bytes used per chunk of text."""
+    if isinstance(docstore, ChunkTextStore):
+        count = len(docstore)
+        if not count:
+            return {
+                'process_bytes_per_chunk': 0.0,
+                'shared_bytes_per_chunk': 0.0,
+            }
+
+        sample = list(islice(docstore._offsets.items(), SIZE_SAMPLE))
+        entry_size = sum(
+            sys.getsizeof(chunk_id)
+            + sys.getsizeof(location)
+            + sum(sys.getsizeof(value) for value in location)
+            for chunk_id, location in sample
+        ) / len(sample)
+        return {
+            'process_bytes_per_chunk': round(
+                sys.getsizeof(docstore._offsets) / count + entry_size, 1
+            ),
+            'shared_bytes_per_chunk': round(docstore.file_bytes() / count, 1),
+        }
+
+    sample = list(islice(docstore._dict.values(), SIZE_SAMPLE))
+    if not sample:
+        return {'process_bytes_per_chunk': 0.0, 'shared_bytes_per_chunk': 0.0}
+
+    size = sum(
+        sys.getsizeof(doc.page_content)
+        + sys.getsizeof(doc.metadata)
+        + sum(sys.getsizeof(value) for value in doc.metadata.values())
+        for doc in sample
+    )
+    return {
+        'process_bytes_per_chunk': round(size / len(sample), 1),
+        'shared_bytes_per_chunk': 0.0,
+    }
@@ -0,0 +1,27 @@
+"""Document chunking helpers that are cheap to import in worker processes."""
+
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+DocumentRow = tuple[str, dict[str, Any]]
+
+
+def split_documents(
+    rows: list[DocumentRow], chunk_size: int, chunk_overlap: int
+) -> list[DocumentRow]:
+    """Split `(text, metadata)` rows into chunks with the RAG splitter."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+    )
+    documents = [
+        Document(page_content=text, metadata=metadata)
+        for text, metadata in rows
+    ]
+    return [
+        (chunk.page_content, chunk.metadata)
+        for chunk in splitter.split_documents(documents)
+    ]
@@ -0,0 +1,161 @@
+"""Conversation history for the agent: recent window plus rolling summary."""
+
+import logging
+from collections.abc import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from apps.ia.models.conversation import Conversation
+from apps.ia.models.message import Message
+from apps.packpage.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+ChatMessage = dict[str, str]
+Summarizer = Callable[[str | None, list[ChatMessage]], str]
+
+MIN_TRUNCATED_CHARS = 100
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, the same 4 chars/token used for RAG context."""
+    return len(text) // 4 + 1
+
+
+class ConversationContext:
+    """
+    Builds the history sent to the agent within a fixed token budget.
+
+    Messages older than the last `window_messages` are folded into
+    `Conversation.txt_summary` by `refresh_summary` once `summary_every` of
+    them are pending. The prompt gets the summary plus the messages not yet
+    summarized (at most `window_messages + summary_every`), loaded with one
+    query on the `(conversation_id, id)` index and trimmed to
+    `token_budget`, so the prompt cost of a conversation stays fixed.
+    """
+
+    def __init__(
+        self,
+        window_messages: int,
+        token_budget: int,
+        summary_every: int,
+        summarizer: Summarizer,
+    ) -> None:
+        self.window_messages = window_messages
+        self.token_budget = token_budget
+        self.summary_every = max(1, summary_every)
+        self.summarizer = summarizer
+
+    @classmethod
+    def from_settings(cls, summarizer: Summarizer) -> 'ConversationContext':
+        """Build the context configuration from the application settings."""
+        settings = get_settings()
+        return cls(
+            window_messages=settings.CHAT_HISTORY_MESSAGES,
+            token_budget=settings.CHAT_HISTORY_TOKEN_BUDGET,
+            summary_every=2 * settings.CHAT_SUMMARY_EVERY_TURNS,
+            summarizer=summarizer,
+        )
+
+    def build(
+        self, session: Session, conversation: Conversation
+    ) -> list[ChatMessage]:
+        """Summary and most recent messages that fit in the token budget."""
+        budget = self.token_budget
+        summary = conversation.txt_summary
+        if summary:
+            budget -= estimate_tokens(summary)
+
+        history = []
+        rows = self._recent(
+            session,
+            conversation,
+            self.window_messages + self.summary_every,
+            conversation.int_summary_message_id or 0,
+        )
+        for row in rows:
+            cost = estimate_tokens(row.txt_content)
+            if cost <= budget:
+                history.append(
+                    {'role': row.str_role, 'content': row.txt_content}
+                )
+                budget -= cost
+                continue
+
+            # Mensagem antiga demais para o orçamento: mantém só o final.
+            remaining_chars = budget * 4
+            if remaining_chars > MIN_TRUNCATED_CHARS:
+                history.append(
+                    {
+                        'role': row.str_role,
+                        'content': row.txt_content[-remaining_chars:],
+                    }
+                )
+            break
+
+        history.reverse()
+        if summary:
+            history.insert(
+                0,
+                {
+                    'role': 'system',
+                    'content': f'Resumo da conversa até aqui: {summary}',
+                },
+            )
+        return history
+
+    def refresh_summary(
+        self, session: Session, conversation: Conversation
+    ) -> bool:
+        """Fold messages that left the window into the rolling summary."""
+        window = self._recent(session, conversation, self.window_messages)
+        if len(window) < self.window_messages:
+            return False
+
+        pending = session.execute(
+            select(Message.id, Message.str_role, Message.txt_content)
+            .where(
+                Message.conversation_id == conversation.id,
+                Message.str_status == 'active',
+                Message.id > (conversation.int_summary_message_id or 0),
+                Message.id < window[-1].id,
+            )
+            .order_by(Message.id)
+        ).all()
+        if len(pending) < self.summary_every:
+            return False
+
+        conversation.txt_summary = self.summarizer(
+            conversation.txt_summary,
+            [
+                {'role': row.str_role, 'content': row.txt_content}
+                for row in pending
+            ],
+        )
+        conversation.int_summary_message_id = pending[-1].id
+        session.commit()
+        logger.info(
+            f'Resumo da conversa {conversation.id} atualizado com '
+            f'{len(pending)} mensagens'
+        )
+        return True
+
+    def _recent(
+        self,
+        session: Session,
+        conversation: Conversation,
+        limit: int,
+        after_id: int = 0,
+    ) -> list:
+        """Last active messages of a conversation, newest first."""
+        return session.execute(
+            select(Message.id, Message.str_role, Message.txt_content)
+            .where(
+                Message.conversation_id == conversation.id,
+                Message.str_status == 'active',
+                Message.id > after_id,
+            )
+            .order_by(Message.id.desc())
+            .limit(limit)
+        ).all()
@@ -0,0 +1,289 @@
+"""Concurrent LLM enrichment of product CSVs into the RAG index."""
+
+import hashlib
+import itertools
+import logging
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+import pandas as pd
+
+from apps.ia.services.rag_service import RAGService, ReadOnlyIndexError
+from apps.packpage.llm_gateway import BATCH, estimate_tokens, get_llm_gateway
+from apps.packpage.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# (row_index, texto, metadados, enriquecida)
+EnrichedRow = tuple[int, str, dict[str, Any], bool]
+
+
+@dataclass
+class EnrichmentProgress:
+    """Progress, throughput and ETA of a CSV enrichment."""
+
+    status: str = 'idle'  # idle, running, completed, failed
+    csv_path: str | None = None
+    total_rows: int = 0
+    rows_resumed: int = 0
+    rows_processed: int = 0
+    rows_failed: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    eta_seconds: float | None = None
+    error: str | None = None
+
+    def update_throughput(self, started: float) -> None:
+        """Refresh elapsed time, rows/s and the estimated time left."""
+        self.elapsed_seconds = round(time.monotonic() - started, 3)
+        if self.elapsed_seconds > 0:
+            self.rows_per_second = round(
+                self.rows_processed / self.elapsed_seconds, 2
+            )
+        remaining = max(
+            0, self.total_rows - self.rows_resumed - self.rows_processed
+        )
+        self.eta_seconds = (
+            round(remaining / self.rows_per_second, 1)
+            if self.rows_per_second
+            else None
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert the progress to a dictionary."""
+        return asdict(self)
+
+
+def _enrichment_prompt(row: dict[str, Any]) -> str:
+    return f"""Enriqueça as seguintes informações sobre \
+esta tinta Suvinil:
+
+                    Dados originais: {row}
+
+                    Por favor, forneça uma descrição detalhada e técnica \
+                    desta tinta, incluindo:
+                    - Características técnicas específicas
+                    - Aplicações recomendadas
+                    - Benefícios únicos
+                    - Cuidados de aplicação
+
+                    Responda de forma estruturada e profissional."""
+
+
+class CSVEnricher:
+    """
+    Enriches the rows of a CSV with the LLM and indexes them in batches.
+
+    Rows are enriched by `max_workers` threads (through the LLM gateway, at
+    batch priority) and finished rows are embedded `batch_size` at a time
+    while the next ones are still being enriched. When the index is
+    persisted, it is checkpointed every `checkpoint_every` batches (or
+    RAG_CHECKPOINT_INTERVAL_SECONDS). Every chunk carries the hash of the
+    CSV content and its row index, so a new run over the same file skips
+    the rows the index already holds and a restart drops them first.
+    """
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        csv_path: str,
+        max_workers: int | None = None,
+        batch_size: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.rag_service = rag_service
+        self.csv_path = csv_path
+        self.max_workers = max_workers or settings.RAG_ENRICH_WORKERS
+        self.batch_size = batch_size or settings.RAG_ENRICH_BATCH_SIZE
+        self.checkpoint_every = max(
+            1, settings.RAG_ENRICH_CHECKPOINT_EVERY_BATCHES
+        )
+        self.checkpoint_interval = settings.RAG_CHECKPOINT_INTERVAL_SECONDS
+        self.progress = EnrichmentProgress(csv_path=csv_path)
+        self.csv_hash = self._csv_hash()
+        self._unsaved_rows = 0
+        self._unsaved_batches = 0
+        self._last_save = time.monotonic()
+
+    def run(self, restart: bool = False) -> EnrichmentProgress:
+        """Enrich and index every row not indexed by a previous run."""
+        started = time.monotonic()
+        self.progress = EnrichmentProgress(
+            status='running',
+            csv_path=self.csv_path,
+            started_at=datetime.now(UTC),
+        )
+        try:
+            # Falha antes das chamadas ao LLM: o leitor não pode indexar.
+            if self.rag_service.read_only:
+                raise ReadOnlyIndexError()
+            df = pd.read_csv(self.csv_path)
+            if restart:
+                # As linhas voltam a ser indexadas: as anteriores saem do
+                # índice em vez de ficarem duplicadas.
+                self.rag_service.delete_chunks(csv_hash=self.csv_hash)
+            done = self._indexed_rows()
+            self.progress.total_rows = len(df)
+            self.progress.rows_resumed = len(done & set(df.index))
+
+            logger.info(
+                f'Processando {len(df)} registros do CSV: {self.csv_path} '
+                f'({self.progress.rows_resumed} já indexados)'
+            )
+            rows = (
+                (idx, row.to_dict())
+                for idx, row in df.iterrows()
+                if idx not in done
+            )
+            self._last_save = time.monotonic()
+            try:
+                self._process(rows, started)
+            finally:
+                # Também após uma falha: os lotes já indexados não se perdem.
+                self._save_checkpoint()
+
+            self.progress.status = 'completed'
+            logger.info(
+                f'Carregamento concluído: {self.progress.rows_processed} '
+                f'documentos adicionados '
+                f'({self.progress.rows_per_second} linhas/s)'
+            )
+        except Exception as e:
+            self.progress.status = 'failed'
+            self.progress.error = str(e)
+            logger.error(
+                f'Erro ao carregar e enriquecer dados do CSV '
+                f'{self.csv_path}: {str(e)}',
+                exc_info=True,
+            )
+            raise
+        finally:
+            self.progress.finished_at = datetime.now(UTC)
+            self.progress.update_throughput(started)
+        return self.progress
+
+    def _process(self, rows, started: float) -> None:
+        """Keep the LLM workers busy while finished rows are indexed."""
+        pending: set[Future] = set()
+        finished: list[EnrichedRow] = []
+        window = 2 * self.max_workers
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix='csv-enrich'
+        ) as executor:
+            while True:
+                for idx, row in itertools.islice(rows, window - len(pending)):
+                    pending.add(executor.submit(self._enrich_row, idx, row))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                finished.extend(future.result() for future in done)
+                if len(finished) >= self.batch_size:
+                    self._index_batch(finished, started)
+                    finished = []
+
+        if finished:
+            self._index_batch(finished, started)
+
+    def _enrich_row(self, idx: int, row: dict[str, Any]) -> EnrichedRow:
+        """Enrich one row, keeping its original data if the LLM fails."""
+        metadata = {
+            'source': self.csv_path,
+            'csv_hash': self.csv_hash,
+            'row_index': idx,
+            'product_name': row.get('nome', f'produto_{idx}'),
+        }
+        try:
+            prompt = _enrichment_prompt(row)
+            # Prioridade de lote: o chat interativo passa à frente.
+            enriched_desc = (
+                get_llm_gateway()
+                .call(
+                    self.rag_service.llm.invoke,
+                    prompt,
+                    priority=BATCH,
+                    tokens=estimate_tokens(prompt),
+                )
+                .content
+            )
+        except Exception as e:
+            logger.error(f'Erro ao processar linha {idx}: {str(e)}')
+            # Adicionar dados originais mesmo sem enriquecimento
+            return (
+                idx,
+                str(row),
+                {**metadata, 'enriched': False, 'error': str(e)},
+                False,
+            )
+
+        combined_text = f"""
+                    PRODUTO: {row.get("nome", "N/A")}
+
+                    DADOS ORIGINAIS:
+                    {row}
+
+                    DESCRIÇÃO ENRIQUECIDA:
+                    {enriched_desc}
+                    """
+        return idx, combined_text, {**metadata, 'enriched': True}, True
+
+    def _index_batch(self, rows: list[EnrichedRow], started: float) -> None:
+        """Embed a batch of rows, checkpointing every few batches."""
+        rows.sort(key=lambda row: row[0])
+        # Salvar o índice inteiro a cada lote deixaria a carga quadrática.
+        self.rag_service.add_documents(
+            [text for _, text, _, _ in rows],
+            [metadata for _, _, metadata, _ in rows],
+            checkpoint=False,
+        )
+        self._unsaved_rows += len(rows)
+        self._unsaved_batches += 1
+        if (
+            self._unsaved_batches >= self.checkpoint_every
+            or time.monotonic() - self._last_save >= self.checkpoint_interval
+        ):
+            self._save_checkpoint()
+
+        self.progress.rows_processed += len(rows)
+        self.progress.rows_failed += sum(
+            1 for _, _, _, enriched in rows if not enriched
+        )
+        self.progress.update_throughput(started)
+        logger.info(
+            f'Enriquecimento do CSV: '
+            f'{self.progress.rows_resumed + self.progress.rows_processed}/'
+            f'{self.progress.total_rows} linhas, '
+            f'{self.progress.rows_per_second} linhas/s, '
+            f'ETA {self.progress.eta_seconds}s'
+        )
+
+    def _save_checkpoint(self) -> None:
+        """Persist the index holding the rows added since last time."""
+        rows, self._unsaved_rows = self._unsaved_rows, 0
+        self._unsaved_batches = 0
+        self._last_save = time.monotonic()
+        if rows:
+            self.rag_service.checkpoint()
+
+    def _indexed_rows(self) -> set[int]:
+        """Rows of this CSV content already in the index."""
+        return {
+            doc.metadata.get('row_index')
+            for doc in self.rag_service.documents
+            if doc.metadata.get('csv_hash') == self.csv_hash
+        }
+
+    def _csv_hash(self) -> str:
+        """Hash identifying the CSV content, whatever its path."""
+        with open(self.csv_path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()[:16]
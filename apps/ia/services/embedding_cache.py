@@ -0,0 +1,251 @@
+"""Persistent, memory-mapped cache of chunk embeddings."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+KEY_SIZE = 32
+META_FILE = 'meta.json'
+VECTORS_FILE = 'vectors.f32'
+KEYS_FILE = 'keys.bin'
+TICKS_FILE = 'ticks.u64'
+LOCK_FILE = 'writer.lock'
+
+
+def chunk_key(text: str) -> bytes:
+    """SHA-256 digest identifying a chunk's content."""
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by chunk content hash, one directory per model.
+
+    Vectors live in a fixed-capacity float32 memory-mapped file; slot `i`
+    holds the vector whose SHA-256 key is stored at `keys[i]` (the offset
+    index) and the logical clock of its last use at `ticks[i]`, used for LRU
+    eviction. Only the writer inserts entries: the process holding the
+    cache's own writer lock or, when `writable` is given, the caller's
+    choice (the RAG index writer). Other workers open the files read-only,
+    validate the slot key on every hit and `refresh` to see new entries.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_name: str,
+        max_entries: int,
+        writable: bool | None = None,
+    ) -> None:
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.cache_dir = os.path.join(cache_dir, safe_name)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index: OrderedDict[bytes, int] = OrderedDict()
+        self._vectors: np.memmap | None = None
+        self._keys: np.memmap | None = None
+        self._ticks: np.memmap | None = None
+        self._tick = 0
+        self._lock_file = None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.writable = (
+            self._acquire_writer_lock() if writable is None else writable
+        )
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        """Return the cached vector of each text, or None on a miss."""
+        results: list[list[float] | None] = []
+        with self._lock:
+            for text in texts:
+                key = chunk_key(text)
+                slot = self._index.get(key)
+                vector = None
+                if slot is not None and bytes(self._keys[slot]) == key:
+                    vector = self._vectors[slot].tolist()
+                    # O escritor pode ter reaproveitado o slot durante a cópia.
+                    if bytes(self._keys[slot]) != key:
+                        vector = None
+                if vector is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+
+                self.hits += 1
+                results.append(vector)
+                if self.writable:
+                    self._index.move_to_end(key)
+                    self._touch(slot)
+        return results
+
+    def put_many(self, texts: list[str], vectors: list[list[float]]) -> None:
+        """Store vectors, evicting the least recently used entries."""
+        if not self.writable or not texts:
+            return
+
+        with self._lock:
+            if self._vectors is None:
+                self._create(len(vectors[0]))
+            if len(vectors[0]) != self._vectors.shape[1]:
+                logger.warning('Dimensão de embedding diferente do cache')
+                return
+
+            for text, vector in zip(texts, vectors, strict=True):
+                key = chunk_key(text)
+                if key in self._index:
+                    continue
+
+                if len(self._index) < self.max_entries:
+                    slot = len(self._index)
+                else:
+                    _, slot = self._index.popitem(last=False)
+
+                # Leitores validam a chave antes e depois de copiar o vetor:
+                # o slot fica sem chave enquanto o vetor é trocado.
+                self._keys[slot] = 0
+                self._vectors[slot] = np.asarray(vector, dtype=np.float32)
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._touch(slot)
+                self._index[key] = slot
+
+    def flush(self) -> None:
+        """Flush the memory-mapped files to disk."""
+        if not self.writable:
+            return
+        with self._lock:
+            for array in (self._vectors, self._keys, self._ticks):
+                if array is not None:
+                    array.flush()
+
+    def refresh(self) -> None:
+        """Reopen the files to see the entries the writer added."""
+        if self.writable:
+            return
+        with self._lock:
+            self._index = OrderedDict()
+            self._vectors = self._keys = self._ticks = None
+            self._open()
+
+    def stats(self) -> dict[str, float]:
+        """Return hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._index),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _touch(self, slot: int) -> None:
+        self._tick += 1
+        self._ticks[slot] = self._tick
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def _acquire_writer_lock(self) -> bool:
+        """Try to become the single writer of the cache directory."""
+        if fcntl is None:
+            return True
+
+        self._lock_file = open(self._path(LOCK_FILE), 'a+')  # noqa: SIM115
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    def _open(self) -> None:
+        """Open existing cache files and rebuild the in-memory index."""
+        try:
+            with open(self._path(META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        if (
+            meta.get('model') != self.model_name
+            or meta.get('max_entries') != self.max_entries
+        ):
+            if self.writable:
+                logger.info('Configuração do cache mudou; recriando cache')
+            return
+
+        mode = 'r+' if self.writable else 'r'
+        shape = (self.max_entries, meta['dimension'])
+        self._vectors = np.memmap(
+            self._path(VECTORS_FILE), dtype=np.float32, mode=mode, shape=shape
+        )
+        self._keys = np.memmap(
+            self._path(KEYS_FILE),
+            dtype=np.uint8,
+            mode=mode,
+            shape=(self.max_entries, KEY_SIZE),
+        )
+        self._ticks = np.memmap(
+            self._path(TICKS_FILE),
+            dtype=np.uint64,
+            mode=mode,
+            shape=(self.max_entries,),
+        )
+
+        used = np.flatnonzero(self._keys.any(axis=1))
+        for slot in used[np.argsort(self._ticks[used], kind='stable')]:
+            self._index[bytes(self._keys[slot])] = int(slot)
+        self._tick = int(self._ticks.max()) if len(used) else 0
+
+    def _create(self, dimension: int) -> None:
+        """Create empty cache files for a new embedding dimension."""
+        self._vectors = np.memmap(
+            self._path(VECTORS_FILE),
+            dtype=np.float32,
+            mode='w+',
+            shape=(self.max_entries, dimension),
+        )
+        self._keys = np.memmap(
+            self._path(KEYS_FILE),
+            dtype=np.uint8,
+            mode='w+',
+            shape=(self.max_entries, KEY_SIZE),
+        )
+        self._ticks = np.memmap(
+            self._path(TICKS_FILE),
+            dtype=np.uint64,
+            mode='w+',
+            shape=(self.max_entries,),
+        )
+        self._index.clear()
+        self._tick = 0
+
+        meta = {
+            'model': self.model_name,
+            'dimension': dimension,
+            'max_entries': self.max_entries,
+        }
+        tmp_path = f'{self._path(META_FILE)}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path(META_FILE))
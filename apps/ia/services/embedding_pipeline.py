@@ -0,0 +1,148 @@
+"""Micro-batching embedding pipeline shared by concurrent uploads."""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from langchain.embeddings.base import Embeddings
+
+from apps.packpage.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_embedding_executor() -> ThreadPoolExecutor:
+    """Bounded, process-wide executor that runs the encoder."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_settings().RAG_EMBED_WORKERS,
+                thread_name_prefix='rag-embedding',
+            )
+    return _executor
+
+
+class EmbeddingPipeline:
+    """
+    Collects embedding requests into micro-batches.
+
+    Each `submit` call (typically one document's chunks) gets its own future.
+    Pending requests are flushed to the encoder when they reach `batch_size`
+    texts or after `max_wait_ms`, so chunks of many concurrent uploads share
+    a single `embed_documents` call running in the embedding executor.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int | None = None,
+        max_wait_ms: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.embeddings = embeddings
+        self.batch_size = batch_size or settings.RAG_EMBED_BATCH_SIZE
+        self.max_wait = (
+            max_wait_ms
+            if max_wait_ms is not None
+            else settings.RAG_EMBED_MAX_WAIT_MS
+        ) / 1000
+        self.batches_encoded = 0
+        self.texts_encoded = 0
+
+        self._pending: list[tuple[list[str], Future]] = []
+        self._pending_texts = 0
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue texts for embedding; the future resolves to their vectors."""
+        future: Future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+
+        with self._lock:
+            self._pending.append((list(texts), future))
+            self._pending_texts += len(texts)
+
+            batch = None
+            if self._pending_texts >= self.batch_size:
+                batch = self._drain()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if batch:
+            get_embedding_executor().submit(self._encode, batch)
+        return future
+
+    def flush(self) -> None:
+        """Send every pending request to the encoder now."""
+        with self._lock:
+            batch = self._drain()
+
+        if batch:
+            get_embedding_executor().submit(self._encode, batch)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts, blocking until their micro-batch is encoded."""
+        return self.submit(texts).result()
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def stats(self) -> dict[str, float]:
+        """Return batching counters."""
+        return {
+            'batches_encoded': self.batches_encoded,
+            'texts_encoded': self.texts_encoded,
+            'avg_batch_size': (
+                round(self.texts_encoded / self.batches_encoded, 2)
+                if self.batches_encoded
+                else 0.0
+            ),
+        }
+
+    def _drain(self) -> list[tuple[list[str], Future]]:
+        """Take every pending request (must hold the lock)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending
+        self._pending = []
+        self._pending_texts = 0
+        return batch
+
+    def _encode(self, batch: list[tuple[list[str], Future]]) -> None:
+        """Encode a micro-batch and resolve the futures of its requests."""
+        texts = [text for item_texts, _ in batch for text in item_texts]
+        try:
+            vectors: list[list[float]] = []
+            for start in range(0, len(texts), self.batch_size):
+                vectors.extend(
+                    self.embeddings.embed_documents(
+                        texts[start : start + self.batch_size]
+                    )
+                )
+        except Exception as e:
+            logger.error(f'Erro ao gerar embeddings: {str(e)}', exc_info=True)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.batches_encoded += 1
+            self.texts_encoded += len(texts)
+
+        offset = 0
+        for item_texts, future in batch:
+            future.set_result(vectors[offset : offset + len(item_texts)])
+            offset += len(item_texts)
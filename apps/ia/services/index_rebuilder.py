@@ -0,0 +1,448 @@
+"""Rebuild of the RAG vector index from the `ia_documents` table."""
+
+import json
+import logging
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from langchain_community.vectorstores import FAISS
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from apps.ia.models.document import Document
+from apps.ia.services.chunk_store import docstore_items
+from apps.ia.services.chunking import DocumentRow, split_documents
+from apps.ia.services.rag_service import RAGService
+from apps.packpage.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], Session]
+
+
+@dataclass
+class RebuildProgress:
+    """Progress and throughput of an index rebuild."""
+
+    status: str = 'idle'  # idle, requested, running, completed, failed
+    total_documents: int = 0
+    documents_processed: int = 0
+    chunks_indexed: int = 0
+    chunks_kept: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    elapsed_seconds: float = 0.0
+    docs_per_second: float = 0.0
+    chunks_per_second: float = 0.0
+    generation: str | None = None
+    error: str | None = None
+
+    def update_throughput(self, started: float) -> None:
+        """Refresh elapsed time and docs/s and chunks/s rates."""
+        self.elapsed_seconds = round(time.monotonic() - started, 3)
+        if self.elapsed_seconds > 0:
+            self.docs_per_second = round(
+                self.documents_processed / self.elapsed_seconds, 2
+            )
+            self.chunks_per_second = round(
+                self.chunks_indexed / self.elapsed_seconds, 2
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert the progress to a dictionary."""
+        return asdict(self)
+
+
+def _document_metadata(document_id: int, title: str, raw: str | None) -> dict:
+    """Build the chunk metadata the same way `DocController` does."""
+    metadata = {}
+    if raw:
+        try:
+            metadata = json.loads(raw)
+        except json.JSONDecodeError:
+            metadata = {}
+    if not isinstance(metadata, dict):
+        metadata = {}
+
+    metadata.update(
+        {
+            'doc_id': document_id,
+            'title': title,
+            'source': f'document_{document_id}',
+        }
+    )
+    return metadata
+
+
+def live_document_ids(session_factory: SessionFactory) -> set[int]:
+    """Ids of every indexable document."""
+    with session_factory() as session:
+        return set(
+            session.scalars(
+                select(Document.id).where(Document.str_status != 'deleted')
+            )
+        )
+
+
+def load_documents(
+    session_factory: SessionFactory, document_ids: list[int]
+) -> list[DocumentRow]:
+    """Load the text and chunk metadata of the given documents."""
+    with session_factory() as session:
+        rows = session.execute(
+            select(
+                Document.id,
+                Document.str_title,
+                Document.txt_content,
+                Document.json_metadata,
+            )
+            .where(Document.id.in_(document_ids))
+            .order_by(Document.id)
+        ).all()
+
+    return [
+        (
+            row.txt_content,
+            _document_metadata(row.id, row.str_title, row.json_metadata),
+        )
+        for row in rows
+    ]
+
+
+def mark_processed(
+    session_factory: SessionFactory, document_ids: list[int]
+) -> None:
+    """Record that pending documents were indexed."""
+    with session_factory() as session:
+        session.execute(
+            update(Document)
+            .where(
+                Document.id.in_(document_ids),
+                Document.dt_processed_at.is_(None),
+            )
+            .values(dt_processed_at=datetime.now(UTC))
+        )
+        session.commit()
+
+
+def iter_document_batches(
+    session_factory: SessionFactory, batch_size: int, after_id: int = 0
+) -> Iterator[tuple[int, list[DocumentRow]]]:
+    """Stream indexable documents in keyset-paginated batches."""
+    last_id = after_id
+    while True:
+        with session_factory() as session:
+            rows = session.execute(
+                select(
+                    Document.id,
+                    Document.str_title,
+                    Document.txt_content,
+                    Document.json_metadata,
+                )
+                .where(Document.id > last_id, Document.str_status != 'deleted')
+                .order_by(Document.id)
+                .limit(batch_size)
+            ).all()
+
+        if not rows:
+            return
+
+        last_id = rows[-1].id
+        yield last_id, [
+            (
+                row.txt_content,
+                _document_metadata(row.id, row.str_title, row.json_metadata),
+            )
+            for row in rows
+        ]
+
+
+class IndexRebuilder:
+    """
+    Builds a fresh FAISS index from the database and swaps it into a
+    `RAGService`.
+
+    Documents are read in keyset-paginated batches, chunked in a process
+    pool while the previous batch is being embedded, and embedded in large
+    batches. Chunks of the current index that did not come from the table
+    (CSV enrichment, texts added directly) are carried over. The new index
+    is built off to the side, so searches keep using the current one until
+    the swap.
+    """
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        session_factory: SessionFactory,
+        batch_size: int | None = None,
+        embed_batch_size: int | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.rag_service = rag_service
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.RAG_REBUILD_BATCH_SIZE
+        self.embed_batch_size = (
+            embed_batch_size or settings.RAG_EMBED_BATCH_SIZE
+        )
+        self.max_workers = max_workers or settings.RAG_REBUILD_WORKERS
+        self.progress = RebuildProgress()
+        self._vector_store: FAISS | None = None
+        self._doc_ids: set[int] = set()
+        self._kept_ids: set[str] = set()
+
+    def run(self) -> RebuildProgress:
+        """Rebuild the index and swap it into the RAG service."""
+        started = time.monotonic()
+        self.progress.status = 'running'
+        self.progress.started_at = datetime.now(UTC)
+        try:
+            with self.session_factory() as session:
+                self.progress.total_documents = session.scalar(
+                    select(func.count(Document.id)).where(
+                        Document.str_status != 'deleted'
+                    )
+                )
+
+            last_id = self._index_batches(started)
+            self._keep_chunks()
+
+            # Documentos enviados durante a reconstrução entram no índice
+            # novo com o lock do serviço adquirido, antes da troca.
+            with self.rag_service.lock:
+                for _, rows in iter_document_batches(
+                    self.session_factory, self.batch_size, last_id
+                ):
+                    self._index_chunks(
+                        split_documents(rows, *self._chunk_config()), rows
+                    )
+                self._keep_chunks()
+                self._drop_deleted_documents()
+                self.progress.generation = self.rag_service.swap_index(
+                    self._vector_store, self._doc_ids
+                )
+
+            self.progress.status = 'completed'
+        except Exception as e:
+            logger.error(
+                f'Falha na reconstrução do índice RAG: {str(e)}', exc_info=True
+            )
+            self.progress.status = 'failed'
+            self.progress.error = str(e)
+        finally:
+            self.progress.finished_at = datetime.now(UTC)
+            self.progress.update_throughput(started)
+
+        logger.info(
+            f'Reconstrução do índice RAG {self.progress.status}: '
+            f'{self.progress.documents_processed} documentos, '
+            f'{self.progress.chunks_indexed} chunks '
+            f'({self.progress.docs_per_second} docs/s, '
+            f'{self.progress.chunks_per_second} chunks/s)'
+        )
+        return self.progress
+
+    def _keep_chunks(self) -> None:
+        """Copy the current index's chunks that are not from the table."""
+        vector_store = self.rag_service.vector_store
+        if vector_store is None:
+            return
+
+        tombstones = self.rag_service.tombstones
+        chunks = [
+            (chunk_id, doc)
+            for chunk_id, doc in docstore_items(vector_store.docstore)
+            if doc.metadata.get('doc_id') is None
+            and chunk_id not in tombstones
+            and chunk_id not in self._kept_ids
+        ]
+        for start in range(0, len(chunks), self.embed_batch_size):
+            batch = chunks[start : start + self.embed_batch_size]
+            texts = [doc.page_content for _, doc in batch]
+            vectors = self.rag_service.embed_documents(texts)
+            self._add_embeddings(
+                list(zip(texts, vectors, strict=True)),
+                [doc.metadata for _, doc in batch],
+                [chunk_id for chunk_id, _ in batch],
+            )
+            self._kept_ids.update(chunk_id for chunk_id, _ in batch)
+            self.progress.chunks_kept += len(batch)
+
+    def _drop_deleted_documents(self) -> None:
+        """Remove documents deleted while the rebuild was running."""
+        deleted = self._doc_ids - live_document_ids(self.session_factory)
+        if not deleted or self._vector_store is None:
+            return
+
+        self._vector_store.delete(
+            [
+                chunk_id
+                for chunk_id, doc in docstore_items(
+                    self._vector_store.docstore
+                )
+                if doc.metadata.get('doc_id') in deleted
+            ]
+        )
+        self._doc_ids -= deleted
+
+    def _chunk_config(self) -> tuple[int, int]:
+        """Splitter configuration of the target RAG service."""
+        return self.rag_service.chunk_size, self.rag_service.chunk_overlap
+
+    def _index_batches(self, started: float) -> int:
+        """Chunk and embed every document batch; return the last id read."""
+        last_id = 0
+        batches = iter_document_batches(self.session_factory, self.batch_size)
+
+        if self.max_workers <= 1:
+            for batch_last_id, rows in batches:
+                self._index_chunks(
+                    split_documents(rows, *self._chunk_config()), rows
+                )
+                self.progress.update_throughput(started)
+                last_id = batch_last_id
+            return last_id
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=context
+        ) as pool:
+            pending: tuple[int, list[DocumentRow], list[Future]] | None = None
+            for batch_last_id, rows in batches:
+                futures = [
+                    pool.submit(split_documents, part, *self._chunk_config())
+                    for part in self._partition(rows)
+                ]
+                if pending is not None:
+                    self._consume(pending, started)
+                pending = (batch_last_id, rows, futures)
+                last_id = batch_last_id
+
+            if pending is not None:
+                self._consume(pending, started)
+
+        return last_id
+
+    def _consume(
+        self,
+        pending: tuple[int, list[DocumentRow], list[Future]],
+        started: float,
+    ) -> None:
+        """Wait for a chunked batch and embed it."""
+        _, rows, futures = pending
+        chunks = [chunk for future in futures for chunk in future.result()]
+        self._index_chunks(chunks, rows)
+        self.progress.update_throughput(started)
+
+    def _partition(self, rows: list[DocumentRow]) -> list[list[DocumentRow]]:
+        """Split a batch into one slice per pool worker."""
+        size = max(1, -(-len(rows) // self.max_workers))
+        return [rows[i : i + size] for i in range(0, len(rows), size)]
+
+    def _index_chunks(
+        self, chunks: list[DocumentRow], rows: list[DocumentRow]
+    ) -> None:
+        """Embed chunks in large batches and add them to the new index."""
+        for start in range(0, len(chunks), self.embed_batch_size):
+            batch = chunks[start : start + self.embed_batch_size]
+            texts = [text for text, _ in batch]
+            metadatas = [metadata for _, metadata in batch]
+            vectors = self.rag_service.embed_documents(texts)
+            self._add_embeddings(
+                list(zip(texts, vectors, strict=True)), metadatas
+            )
+            self.progress.chunks_indexed += len(batch)
+
+        self._doc_ids.update(metadata['doc_id'] for _, metadata in rows)
+        self.progress.documents_processed += len(rows)
+
+    def _add_embeddings(
+        self,
+        text_embeddings: list[tuple[str, list[float]]],
+        metadatas: list[dict],
+        ids: list[str] | None = None,
+    ) -> None:
+        """Add embedded chunks to the new index, creating it if needed."""
+        if self._vector_store is None:
+            self._vector_store = FAISS.from_embeddings(
+                text_embeddings,
+                self.rag_service.embeddings,
+                metadatas=metadatas,
+                ids=ids,
+            )
+        else:
+            self._vector_store.add_embeddings(
+                text_embeddings, metadatas=metadatas, ids=ids
+            )
+
+
+class IndexRebuildJob:
+    """Runs at most one index rebuild at a time in a background thread."""
+
+    def __init__(self) -> None:
+        self.progress = RebuildProgress()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether a rebuild is in progress."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(
+        self, rag_service: RAGService, session_factory: SessionFactory
+    ) -> bool:
+        """Start a rebuild; return False if one is already running."""
+        with self._lock:
+            if self.running:
+                return False
+
+            rebuilder = IndexRebuilder(rag_service, session_factory)
+            self.progress = rebuilder.progress
+            self.progress.status = 'running'
+            self.progress.started_at = datetime.now(UTC)
+
+            self._thread = threading.Thread(
+                target=rebuilder.run, name='rag-index-rebuild', daemon=True
+            )
+            self._thread.start()
+            return True
+
+
+rebuild_job = IndexRebuildJob()
+
+
+def rebuild_index(
+    index_dir: str, session_factory: SessionFactory
+) -> RebuildProgress | None:
+    """Rebuild the index in `index_dir`, or ask its writer process to."""
+    service = RAGService(index_dir=index_dir, role='auto')
+    if service.read_only:
+        # Outro processo é o escritor do índice: ele executa a reconstrução.
+        service.index_store.request_rebuild()
+        logger.info('Reconstrução solicitada ao processo escritor do índice')
+        return None
+
+    # Os chunks que não vêm da tabela são copiados da geração atual.
+    service.load_index()
+    return IndexRebuilder(service, session_factory).run()
+
+
+if __name__ == '__main__':
+    from apps.core.database.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    result = rebuild_index(
+        get_settings().RAG_INDEX_DIR, lambda: Session(engine)
+    )
+    if result is not None:
+        logger.info(
+            f'Reconstrução do índice: '
+            f'{json.dumps(result.as_dict(), default=str)}'
+        )
@@ -0,0 +1,190 @@
+"""On-disk persistence of the RAG vector index."""
+
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
+from typing import Any
+
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = 'writer.lock'
+REBUILD_FILE = 'REBUILD_REQUESTED'
+GENERATION_PREFIX = 'gen-'
+TMP_PREFIX = '.tmp-'
+
+
+class IndexStore:
+    """
+    Persists FAISS index generations under a base directory.
+
+    Each checkpoint is written to a temporary directory, renamed to a new
+    generation and only then published by atomically replacing the `CURRENT`
+    pointer file, so a crash never leaves a half-written index in use. Only
+    the process holding the writer lock publishes; the others load
+    generations memory-mapped and read-only.
+    """
+
+    def __init__(self, base_dir: str, keep_generations: int = 2) -> None:
+        self.base_dir = base_dir
+        self.keep_generations = max(1, keep_generations)
+        self._lock_file = None
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def acquire_writer_lock(self) -> bool:
+        """Try to become the single writer of the index directory."""
+        if self._lock_file is not None or fcntl is None:
+            return True
+
+        lock_file = open(  # noqa: SIM115
+            os.path.join(self.base_dir, LOCK_FILE), 'a+'
+        )
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        return True
+
+    def request_rebuild(self) -> None:
+        """Ask the writer process to rebuild the index."""
+        self._write_file(os.path.join(self.base_dir, REBUILD_FILE), '')
+
+    def take_rebuild_request(self) -> bool:
+        """Consume a pending rebuild request, if any."""
+        try:
+            os.remove(os.path.join(self.base_dir, REBUILD_FILE))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def current_generation(self) -> str | None:
+        """Return the name of the published generation, if any."""
+        current_file = os.path.join(self.base_dir, CURRENT_FILE)
+        try:
+            with open(current_file, encoding='utf-8') as f:
+                generation = f.read().strip()
+        except FileNotFoundError:
+            return None
+
+        if not generation or not os.path.isdir(
+            os.path.join(self.base_dir, generation)
+        ):
+            return None
+        return generation
+
+    def generation_path(self, generation: str) -> str:
+        """Return the directory of a generation."""
+        return os.path.join(self.base_dir, generation)
+
+    def read_manifest(self, generation: str | None = None) -> dict | None:
+        """Read the manifest of a generation (the published one by default)."""
+        generation = generation or self.current_generation()
+        if generation is None:
+            return None
+
+        manifest_path = os.path.join(
+            self.generation_path(generation), MANIFEST_FILE
+        )
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            logger.warning(f'Manifesto inválido na geração {generation}')
+            return None
+
+    def load(
+        self, generation: str, embeddings: Embeddings, mmap: bool = False
+    ) -> FAISS:
+        """Load a generation, optionally memory-mapping the index file."""
+        path = self.generation_path(generation)
+        flags = 0
+        if mmap:
+            # IO_FLAG_MMAP_IFC mapeia os códigos de índices flat/SQ/PQ/IVF
+            # sem cópia; o grafo HNSW continua sendo lido para a memória.
+            flags = (
+                getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP)
+                | faiss.IO_FLAG_READ_ONLY
+            )
+        index = faiss.read_index(os.path.join(path, 'index.faiss'), flags)
+
+        with open(os.path.join(path, 'index.pkl'), 'rb') as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    def publish(self, vector_store: FAISS, manifest: dict[str, Any]) -> str:
+        """Write a new generation and make it the current one."""
+        generation = f'{GENERATION_PREFIX}{time.time_ns()}-{os.getpid()}'
+        tmp_dir = os.path.join(self.base_dir, f'{TMP_PREFIX}{generation}')
+
+        try:
+            vector_store.save_local(tmp_dir)
+            manifest = {**manifest, 'generation': generation}
+            self._write_file(
+                os.path.join(tmp_dir, MANIFEST_FILE),
+                json.dumps(manifest, ensure_ascii=False, indent=2),
+            )
+            os.replace(tmp_dir, self.generation_path(generation))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self._write_file(os.path.join(self.base_dir, CURRENT_FILE), generation)
+        self._prune(generation)
+        return generation
+
+    def reset(self) -> None:
+        """Unpublish the current generation (empty knowledge base)."""
+        current_file = os.path.join(self.base_dir, CURRENT_FILE)
+        if os.path.exists(current_file):
+            os.remove(current_file)
+
+    def _write_file(self, path: str, content: str) -> None:
+        """Atomically write a text file (temporary file + rename)."""
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _prune(self, current: str) -> None:
+        """Remove old generations and leftovers of interrupted writes."""
+        generations = sorted(
+            name
+            for name in os.listdir(self.base_dir)
+            if name.startswith(GENERATION_PREFIX)
+        )
+        stale = [
+            name
+            for name in generations[: -self.keep_generations]
+            if name != current
+        ]
+        # Diretórios temporários recentes podem pertencer a outro worker
+        # ainda gravando; só os abandonados há mais de uma hora são removidos.
+        cutoff = time.time() - 3600
+        stale.extend(
+            name
+            for name in os.listdir(self.base_dir)
+            if name.startswith(TMP_PREFIX)
+            and os.path.getmtime(os.path.join(self.base_dir, name)) < cutoff
+        )
+        for name in stale:
+            shutil.rmtree(
+                os.path.join(self.base_dir, name), ignore_errors=True
+            )
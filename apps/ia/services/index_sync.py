@@ -0,0 +1,124 @@
+"""Keeps the RAG index of every uvicorn worker in sync with the database."""
+
+import logging
+import threading
+
+from apps.ia.services.index_rebuilder import (
+    SessionFactory,
+    live_document_ids,
+    load_documents,
+    mark_processed,
+    rebuild_job,
+)
+from apps.ia.services.rag_service import RAGService
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSync:
+    """
+    Background loop shared by the writer and reader workers of an index.
+
+    The writer indexes documents uploaded through other workers, drops the
+    deleted ones, runs requested rebuilds and publishes a new generation
+    once the checkpoint thresholds are reached. Readers only hot-swap to
+    the generation the writer published.
+    """
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        session_factory: SessionFactory,
+        interval: float,
+        batch_size: int = 100,
+    ) -> None:
+        self.rag_service = rag_service
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._missing: set[int] = set()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the sync loop in a daemon thread."""
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='rag-index-sync', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sync loop and wait for the current tick."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+
+    def tick(self) -> None:
+        """Run one sync step for the worker's role."""
+        if self.rag_service.read_only:
+            self.rag_service.refresh_index()
+            return
+
+        if self.rag_service.index_store.take_rebuild_request():
+            rebuild_job.start(self.rag_service, self.session_factory)
+        if rebuild_job.running:
+            return
+
+        self.sync_documents()
+        self.rag_service.maybe_checkpoint()
+
+    def sync_documents(self) -> tuple[int, int]:
+        """Index documents missing from the index and drop deleted ones."""
+        live_ids = live_document_ids(self.session_factory)
+        indexed = {
+            doc_id
+            for doc_id in self.rag_service.doc_ids
+            if isinstance(doc_id, int)
+        }
+
+        # Um upload no próprio escritor fica no banco antes de entrar no
+        # índice: só é indexado aqui se continuar ausente no ciclo seguinte.
+        missing = live_ids - indexed
+        to_add = sorted(missing & self._missing)
+        self._missing = missing - set(to_add)
+
+        for start in range(0, len(to_add), self.batch_size):
+            batch = to_add[start : start + self.batch_size]
+            rows = load_documents(self.session_factory, batch)
+            self.rag_service.add_documents(
+                [text for text, _ in rows],
+                [metadata for _, metadata in rows],
+            )
+            # Uploads recebidos por leitores ficam pendentes até aqui.
+            mark_processed(self.session_factory, batch)
+
+        deleted = [
+            doc_id
+            for doc_id in list(self.rag_service.chunk_ids)
+            if isinstance(doc_id, int) and doc_id not in live_ids
+        ]
+        for doc_id in deleted:
+            self.rag_service.delete_document(doc_id)
+
+        if to_add or deleted:
+            logger.info(
+                f'Índice RAG sincronizado: {len(to_add)} documentos '
+                f'adicionados, {len(deleted)} removidos'
+            )
+        return len(to_add), len(deleted)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(
+                    f'Falha na sincronização do índice RAG: {str(e)}',
+                    exc_info=True,
+                )
+            self._stop.wait(self.interval)
@@ -2,43 +2,121 @@
 
 import logging
 import os
-from typing import Any
+import threading
+import time
+from concurrent.futures import Future
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
 import numpy as np
-import pandas as pd
 from langchain.embeddings.base import Embeddings
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from apps.ia.services.ann_index import (
+    QUANTIZED_TYPES,
+    ANNConfig,
+    apply_search_params,
+    can_build,
+    index_type_of,
+    promote,
+    remove_chunks,
+    rerank,
+    vector_bytes_per_chunk,
+)
+from apps.ia.services.chunk_store import (
+    ChunkTextStore,
+    docstore_items,
+    text_bytes_per_chunk,
+)
+from apps.ia.services.embedding_cache import EmbeddingCache
+from apps.ia.services.embedding_pipeline import EmbeddingPipeline
+from apps.ia.services.index_store import IndexStore
+from apps.ia.services.query_cache import LRUCache, normalize_query
 from apps.packpage.settings import get_settings
 
+if TYPE_CHECKING:
+    from apps.ia.services.csv_enricher import EnrichmentProgress
+
 logger = logging.getLogger(__name__)
 
 
+class ReadOnlyIndexError(Exception):
+    """Raised when a reader process is asked to change the RAG index."""
+
+    def __init__(self):
+        super().__init__(
+            'Processo leitor do índice RAG: só o processo escritor '
+            'adiciona documentos'
+        )
+
+
 class RAGService:
     """Service for document processing, embedding and semantic search using RAG."""
 
-    def __init__(self, embeddings=None, db_url=None):
-        """Initialize RAG service with embeddings and vector store."""
+    def __init__(
+        self, embeddings=None, db_url=None, index_dir=None, role='writer'
+    ):
+        """
+        Initialize RAG service with embeddings and vector store.
+
+        With an `index_dir`, `role` decides who publishes index generations:
+        'writer' always does, 'reader' only loads them (memory-mapped,
+        read-only) and 'auto' becomes the writer if it gets the directory's
+        writer lock.
+        """
         self.settings = get_settings()
         self.embeddings = embeddings or self._setup_embeddings()
+        self.embedding_model_name = getattr(
+            self.embeddings, 'model_name', type(self.embeddings).__name__
+        )
+        self.embedding_pipeline = EmbeddingPipeline(self.embeddings)
         self.vector_store: FAISS | None = None
+        self.chunk_size = 1000
+        self.chunk_overlap = 200
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             length_function=len,
         )
-        self.documents: list[Document] = []
+        self.doc_ids: set[int] = set()
+        self.chunk_ids: dict[int, list[str]] = {}
+        self.tombstones: set[str] = set()
         self.llm = self.settings.llm
 
+        self.ann_config = ANNConfig.from_settings(self.settings)
+        self.ann_report: dict[str, Any] | None = None
+        self.index_version = 0
+        self.query_embedding_cache = LRUCache(
+            self.settings.RAG_QUERY_CACHE_SIZE,
+            self.settings.RAG_QUERY_CACHE_TTL_SECONDS,
+        )
+        self.search_cache = LRUCache(
+            self.settings.RAG_SEARCH_CACHE_SIZE,
+            self.settings.RAG_QUERY_CACHE_TTL_SECONDS,
+        )
+
+        self.lock = threading.RLock()
+        self.index_store = IndexStore(index_dir) if index_dir else None
+        self.generation: str | None = None
+        self._seen_generation: str | None = None
+        self.read_only = False
+        if self.index_store is not None and role != 'writer':
+            self.read_only = (
+                role == 'reader' or not self.index_store.acquire_writer_lock()
+            )
+        self.embedding_cache = self._setup_embedding_cache()
+        self._pending_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+
     def _setup_embeddings(self) -> Embeddings:
         """Setup local HuggingFace embeddings."""
         try:
             return HuggingFaceEmbeddings(
-                model_name='sentence-transformers/all-MiniLM-L6-v2',
+                model_name=self.settings.RAG_EMBEDDING_MODEL,
                 model_kwargs={'device': 'cpu'},
             )
         except Exception as e:
@@ -65,10 +143,83 @@ class RAGService:
 
             return SimpleEmbeddings()
 
+    def _setup_embedding_cache(self) -> EmbeddingCache | None:
+        """Open the persistent embedding cache, when configured."""
+        cache_dir = self.settings.RAG_EMBEDDING_CACHE_DIR
+        if not cache_dir:
+            return None
+
+        # Com diretório de índice, só o escritor do índice grava no cache.
+        writable = None if self.index_store is None else not self.read_only
+        try:
+            return EmbeddingCache(
+                cache_dir,
+                self.embedding_model_name,
+                self.settings.RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+                writable=writable,
+            )
+        except Exception as e:
+            logger.error(
+                f'Falha ao abrir cache de embeddings: {str(e)}', exc_info=True
+            )
+            return None
+
+    def submit_embeddings(self, texts: list[str]) -> Future:
+        """Embed texts, reusing cached vectors and encoding only misses."""
+        if self.embedding_cache is None:
+            return self.embedding_pipeline.submit(texts)
+
+        cached = self.embedding_cache.get_many(texts)
+        missing = [
+            text
+            for text, vector in zip(texts, cached, strict=True)
+            if vector is None
+        ]
+        future: Future = Future()
+        if not missing:
+            future.set_result(cached)
+            return future
+
+        def merge(encoded: Future) -> None:
+            try:
+                vectors = encoded.result()
+                self.embedding_cache.put_many(missing, vectors)
+            except Exception as e:
+                future.set_exception(e)
+                return
+
+            computed = iter(vectors)
+            future.set_result(
+                [
+                    vector if vector is not None else next(computed)
+                    for vector in cached
+                ]
+            )
+
+        self.embedding_pipeline.submit(missing).add_done_callback(merge)
+        return future
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts through the cache, blocking until done."""
+        return self.submit_embeddings(texts).result()
+
     def add_documents(
-        self, texts: list[str], metadatas: list[dict[str, Any]] | None = None
+        self,
+        texts: list[str],
+        metadatas: list[dict[str, Any]] | None = None,
+        checkpoint: bool = True,
     ) -> None:
-        """Add documents to the RAG knowledge base."""
+        """
+        Add documents to the RAG knowledge base.
+
+        With `checkpoint=False` the caller decides when to persist the
+        index, e.g. a bulk load checkpointing every few batches. Readers
+        raise `ReadOnlyIndexError`: only `ia_documents` rows reach the
+        writer (through `IndexSync`), anything else would be lost.
+        """
+        if self.read_only:
+            raise ReadOnlyIndexError()
+
         try:
             if metadatas is None:
                 metadatas = [{'source': f'doc_{uuid4()}'} for _ in texts]
@@ -78,19 +229,62 @@ class RAGService:
                 for text, metadata in zip(texts, metadatas, strict=True)
             ]
 
-            chunked_docs = []
+            # Um future por documento: os chunks de uploads concorrentes
+            # são agrupados em micro-lotes pelo pipeline de embeddings.
+            pending = []
             for doc in documents:
                 chunks = self.text_splitter.split_documents([doc])
+                future = self.submit_embeddings(
+                    [chunk.page_content for chunk in chunks]
+                )
+                pending.append((chunks, future))
+
+            chunked_docs = []
+            text_embeddings = []
+            for chunks, future in pending:
+                vectors = future.result()
                 chunked_docs.extend(chunks)
+                text_embeddings.extend(
+                    (chunk.page_content, vector)
+                    for chunk, vector in zip(chunks, vectors, strict=True)
+                )
+            chunk_metadatas = [chunk.metadata for chunk in chunked_docs]
+            chunk_ids = [str(uuid4()) for _ in chunked_docs]
+            for chunk, chunk_id in zip(chunked_docs, chunk_ids, strict=True):
+                chunk.id = chunk_id
+
+            with self.lock:
+                if self.vector_store is None:
+                    self.vector_store = FAISS.from_embeddings(
+                        text_embeddings,
+                        self.embeddings,
+                        metadatas=chunk_metadatas,
+                        ids=chunk_ids,
+                    )
+                    self._adopt_docstore(self.vector_store)
+                else:
+                    self.vector_store.add_embeddings(
+                        text_embeddings,
+                        metadatas=chunk_metadatas,
+                        ids=chunk_ids,
+                    )
 
-            self.documents.extend(chunked_docs)
+                for chunk in chunked_docs:
+                    doc_id = chunk.metadata.get('doc_id')
+                    if doc_id is not None:
+                        self.chunk_ids.setdefault(doc_id, []).append(chunk.id)
 
-            if self.vector_store is None:
-                self.vector_store = FAISS.from_documents(
-                    chunked_docs, self.embeddings
+                self.doc_ids.update(
+                    metadata['doc_id']
+                    for metadata in metadatas
+                    if metadata.get('doc_id') is not None
                 )
-            else:
-                self.vector_store.add_documents(chunked_docs)
+                self._pending_checkpoint += len(texts)
+                self._maybe_promote()
+                self._bump_index_version()
+
+            if checkpoint:
+                self.maybe_checkpoint()
 
         except Exception as e:
             logger.error(
@@ -107,21 +301,103 @@ class RAGService:
 
         self.add_documents([text], [metadata])
 
+    def embed_query(self, query: str) -> list[float]:
+        """Embed a search query, reusing recent embeddings."""
+        key = normalize_query(query)
+        vector = self.query_embedding_cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(query)
+            self.query_embedding_cache.set(key, vector)
+        return vector
+
     def similarity_search(self, query: str, k: int = 3) -> list[Document]:
         """Perform similarity search in the knowledge base."""
-        if self.vector_store is None or not query.strip() or k <= 0:
-            return []
-
-        return self.vector_store.similarity_search(query, k=k)
+        return self._cached_search(query, k, with_score=False)
 
     def similarity_search_with_score(
         self, query: str, k: int = 3
     ) -> list[tuple]:
         """Perform similarity search with relevance scores."""
-        if self.vector_store is None or not query.strip() or k <= 0:
+        return self._cached_search(query, k, with_score=True)
+
+    def _cached_search(self, query: str, k: int, with_score: bool) -> list:
+        """Search the index, caching results per index version."""
+        vector_store = self.vector_store
+        if vector_store is None or not query.strip() or k <= 0:
             return []
 
-        return self.vector_store.similarity_search_with_score(query, k=k)
+        key = (normalize_query(query), k, with_score, self.index_version)
+        results = self.search_cache.get(key)
+        if results is None:
+            # Chunks removidos continuam no índice até a compactação; a busca
+            # pede resultados extras para descartá-los.
+            tombstones = self.tombstones
+            embedding = self.embed_query(query)
+            fetch_k = k + len(tombstones)
+            rerank_factor = self.settings.RAG_RERANK_FACTOR
+            # Os vetores float32 vêm do cache de embeddings: sem ele, a
+            # reordenação reprocessaria os candidatos a cada busca.
+            reranked = (
+                rerank_factor > 1
+                and self.embedding_cache is not None
+                and index_type_of(vector_store.index) in QUANTIZED_TYPES
+            )
+            if reranked:
+                fetch_k *= rerank_factor
+
+            scored = vector_store.similarity_search_with_score_by_vector(
+                embedding, k=fetch_k
+            )
+            results = [
+                (doc, score)
+                for doc, score in scored
+                if doc.id not in tombstones
+            ]
+            if reranked:
+                vectors = self.embedding_cache.get_many(
+                    [doc.page_content for doc, _ in results]
+                )
+                # Com algum candidato fora do cache fica a ordem quantizada.
+                if all(vector is not None for vector in vectors):
+                    results = rerank(embedding, results, vectors)
+            results = results[:k]
+            if not with_score:
+                results = [doc for doc, _ in results]
+            self.search_cache.set(key, results)
+        return list(results)
+
+    def index_stats(self) -> dict[str, Any]:
+        """Return index details and hit/miss counters of the RAG caches."""
+        vector_store = self.vector_store
+        return {
+            'index_version': self.index_version,
+            'index': {
+                'type': (
+                    index_type_of(vector_store.index) if vector_store else None
+                ),
+                'vectors': vector_store.index.ntotal if vector_store else 0,
+                'tombstones': len(self.tombstones),
+                'ann_report': self.ann_report,
+                'vector_bytes_per_chunk': (
+                    vector_bytes_per_chunk(vector_store.index)
+                    if vector_store
+                    else 0.0
+                ),
+                **(
+                    text_bytes_per_chunk(vector_store.docstore)
+                    if vector_store
+                    else {}
+                ),
+            },
+            'query_embeddings': self.query_embedding_cache.stats(),
+            'search_results': self.search_cache.stats(),
+            'chunk_embeddings': (
+                self.embedding_cache.stats()
+                if self.embedding_cache is not None
+                else None
+            ),
+            'embedding_pipeline': self.embedding_pipeline.stats(),
+        }
 
     def get_relevant_context(self, query: str, max_tokens: int = 2000) -> str:
         """Get relevant context for a query, respecting token limits."""
@@ -146,12 +422,35 @@ class RAGService:
 
     def clear_knowledge_base(self) -> None:
         """Clear all documents from the knowledge base."""
-        self.documents.clear()
-        self.vector_store = None
+        with self.lock:
+            self.doc_ids.clear()
+            self.chunk_ids.clear()
+            self.tombstones.clear()
+            self.ann_report = None
+            self.vector_store = None
+            self._pending_checkpoint = 0
+            self._bump_index_version()
+            if self.index_store is not None and not self.read_only:
+                self.index_store.reset()
+
+    @property
+    def documents(self) -> list[Document]:
+        """Chunks currently searchable, read from the docstore."""
+        if self.vector_store is None:
+            return []
+        return [
+            doc
+            for chunk_id, doc in docstore_items(self.vector_store.docstore)
+            if chunk_id not in self.tombstones
+        ]
 
     def get_document_count(self) -> int:
         """Get the number of documents in the knowledge base."""
-        return len(self.documents)
+        if self.vector_store is None:
+            return 0
+        return len(self.vector_store.index_to_docstore_id) - len(
+            self.tombstones
+        )
 
     def save_vector_store(self, path: str) -> None:
         """Save the vector store to disk."""
@@ -165,79 +464,271 @@ class RAGService:
                 path, self.embeddings, allow_dangerous_deserialization=True
             )
 
-    def enrich_and_load_data(self, csv_path: str) -> None:
-        """Reuse LLM para enriquecer CSV."""
-        try:
-            df = pd.read_csv(csv_path)
-            enriched_texts = []
-            enriched_metadatas = []
-
-            logger.info(f'Processando {len(df)} registros do CSV: {csv_path}')
-
-            for idx, row in df.iterrows():
-                try:
-                    prompt = f"""Enriqueça as seguintes informações sobre \
-esta tinta Suvinil:
-
-                    Dados originais: {row.to_dict()}
-
-                    Por favor, forneça uma descrição detalhada e técnica \
-                    desta tinta, incluindo:
-                    - Características técnicas específicas
-                    - Aplicações recomendadas
-                    - Benefícios únicos
-                    - Cuidados de aplicação
-
-                    Responda de forma estruturada e profissional."""
-
-                    enriched_desc = self.llm.invoke(prompt).content
-
-                    combined_text = f"""
-                    PRODUTO: {row.get("nome", "N/A")}
-
-                    DADOS ORIGINAIS:
-                    {row.to_dict()}
-
-                    DESCRIÇÃO ENRIQUECIDA:
-                    {enriched_desc}
-                    """
-
-                    enriched_texts.append(combined_text)
-                    enriched_metadatas.append(
-                        {
-                            'source': csv_path,
-                            'row_index': idx,
-                            'product_name': row.get('nome', f'produto_{idx}'),
-                            'enriched': True,
-                        }
-                    )
+    def swap_index(
+        self, vector_store: FAISS | None, doc_ids: set[int]
+    ) -> str | None:
+        """Replace the whole index by one built elsewhere and persist it."""
+        with self.lock:
+            if vector_store is None:
+                self.clear_knowledge_base()
+                return None
+
+            self._set_vector_store(vector_store)
+            self.doc_ids = set(doc_ids)
+            self._pending_checkpoint = len(self.doc_ids) or 1
+            self._maybe_promote()
+            self._bump_index_version()
+            return self.checkpoint()
+
+    def delete_document(self, doc_id: int) -> int:
+        """Remove a document's chunks from search; return how many."""
+        with self.lock:
+            self.doc_ids.discard(doc_id)
+            chunk_ids = self.chunk_ids.pop(doc_id, [])
+            if not chunk_ids:
+                return 0
+
+            self.tombstones.update(chunk_ids)
+            self._pending_checkpoint += 1
+            self._bump_index_version()
+            if self._needs_compaction():
+                self.compact()
+
+        self.maybe_checkpoint()
+        return len(chunk_ids)
+
+    def delete_chunks(self, **metadata: Any) -> int:
+        """Remove the chunks whose metadata has all the given values."""
+        with self.lock:
+            if self.vector_store is None:
+                return 0
+
+            chunk_ids = [
+                chunk_id
+                for chunk_id, doc in docstore_items(self.vector_store.docstore)
+                if chunk_id not in self.tombstones
+                and all(
+                    doc.metadata.get(key) == value
+                    for key, value in metadata.items()
+                )
+            ]
+            if not chunk_ids:
+                return 0
+
+            self.tombstones.update(chunk_ids)
+            self._pending_checkpoint += 1
+            self._bump_index_version()
+            if self._needs_compaction():
+                self.compact()
+
+        self.maybe_checkpoint()
+        return len(chunk_ids)
+
+    def compact(self) -> int:
+        """Physically remove tombstoned chunks from the vector index."""
+        with self.lock:
+            if (
+                self.vector_store is None
+                or not self.tombstones
+                or self.read_only
+            ):
+                return 0
+
+            removed = len(self.tombstones)
+            remove_chunks(
+                self.vector_store, list(self.tombstones), self.ann_config
+            )
+            self.tombstones = set()
+            self._bump_index_version()
+
+        logger.info(f'Índice RAG compactado: {removed} chunks removidos')
+        return removed
+
+    def _needs_compaction(self) -> bool:
+        """Whether tombstones passed the compaction threshold."""
+        total = self.vector_store.index.ntotal if self.vector_store else 0
+        return len(self.tombstones) >= min(
+            self.settings.RAG_COMPACTION_MIN_TOMBSTONES,
+            total * self.settings.RAG_COMPACTION_TOMBSTONE_RATIO,
+        )
 
-                    logger.debug(f'Processado produto {idx + 1}/{len(df)}')
-
-                except Exception as e:
-                    logger.error(f'Erro ao processar linha {idx}: {str(e)}')
-                    # Adicionar dados originais mesmo sem enriquecimento
-                    enriched_texts.append(str(row.to_dict()))
-                    enriched_metadatas.append(
-                        {
-                            'source': csv_path,
-                            'row_index': idx,
-                            'product_name': row.get('nome', f'produto_{idx}'),
-                            'enriched': False,
-                            'error': str(e),
-                        }
-                    )
+    def _maybe_promote(self) -> None:
+        """Promote a large flat index to the configured ANN index."""
+        config = self.ann_config
+        if (
+            self.read_only
+            or self.vector_store is None
+            or config.index_type == 'flat'
+            or index_type_of(self.vector_store.index) != 'flat'
+        ):
+            return
+
+        count = self.vector_store.index.ntotal
+        if count < config.min_vectors or not can_build(
+            count, config, config.index_type
+        ):
+            return
+
+        self.ann_report = promote(self.vector_store, config)
+        self._pending_checkpoint += 1
+        logger.info(
+            f'Índice RAG promovido para {config.index_type}: '
+            f'{self.ann_report}'
+        )
 
-            # Adicionar todos os documentos enriquecidos ao RAG
-            self.add_documents(enriched_texts, enriched_metadatas)
+    def _adopt_docstore(self, vector_store: FAISS) -> None:
+        """Move chunk text to the shared memory-mapped store, if enabled."""
+        store_dir = self.settings.RAG_CHUNK_STORE_DIR
+        if (
+            not store_dir
+            or self.read_only
+            or isinstance(vector_store.docstore, ChunkTextStore)
+        ):
+            return
+
+        chunk_store = ChunkTextStore(store_dir)
+        chunk_store.add(dict(docstore_items(vector_store.docstore)))
+        vector_store.docstore = chunk_store
+
+    def _set_vector_store(
+        self, vector_store: FAISS, tombstones: set[str] | None = None
+    ) -> None:
+        """Adopt a complete vector store (must hold the lock)."""
+        apply_search_params(vector_store.index, self.ann_config)
+        self._adopt_docstore(vector_store)
+        self.vector_store = vector_store
+        self.tombstones = tombstones or set()
+        self.chunk_ids = {}
+        for chunk_id, doc in docstore_items(vector_store.docstore):
+            doc_id = doc.metadata.get('doc_id')
+            if doc_id is not None and chunk_id not in self.tombstones:
+                self.chunk_ids.setdefault(doc_id, []).append(chunk_id)
+
+    def _bump_index_version(self) -> None:
+        """Invalidate cached search results (must hold the lock)."""
+        self.index_version += 1
+        self.search_cache.clear()
+
+    def maybe_checkpoint(self) -> None:
+        """Checkpoint the index when the document or time threshold is hit."""
+        if self.index_store is None or not self._pending_checkpoint:
+            return
+
+        elapsed = time.monotonic() - self._last_checkpoint
+        if (
+            self._pending_checkpoint >= self.settings.RAG_CHECKPOINT_EVERY_DOCS
+            or elapsed >= self.settings.RAG_CHECKPOINT_INTERVAL_SECONDS
+        ):
+            try:
+                self.checkpoint()
+            except Exception as e:
+                logger.error(
+                    f'Falha ao salvar checkpoint do índice RAG: {str(e)}',
+                    exc_info=True,
+                )
 
-            logger.info(
-                f'Carregamento concluído: {len(enriched_texts)} documentos adicionados'
+    def checkpoint(self) -> str | None:
+        """Persist the index as a new generation in the index directory."""
+        if self.index_store is None or self.read_only:
+            return None
+
+        with self.lock:
+            if self.vector_store is None or not self._pending_checkpoint:
+                return None
+
+            if self._needs_compaction():
+                self.compact()
+            manifest = {
+                'embedding_model': self.embedding_model_name,
+                'doc_ids': sorted(self.doc_ids, key=str),
+                # Removidos ainda não compactados continuam fora da busca.
+                'tombstones': sorted(self.tombstones),
+                'chunk_count': self.get_document_count(),
+                'index_type': index_type_of(self.vector_store.index),
+                'ann_report': self.ann_report,
+                'created_at': datetime.now(UTC).isoformat(),
+            }
+            # Os leitores recarregam o cache ao ver a nova geração.
+            if self.embedding_cache is not None:
+                self.embedding_cache.flush()
+            generation = self.index_store.publish(self.vector_store, manifest)
+            if isinstance(self.vector_store.docstore, ChunkTextStore):
+                self.vector_store.docstore.prune_stale_files()
+            self.generation = generation
+            self._pending_checkpoint = 0
+            self._last_checkpoint = time.monotonic()
+
+        logger.info(f'Checkpoint do índice RAG salvo: {generation}')
+        return generation
+
+    def load_index(self) -> bool:
+        """Load the latest persisted generation from the index directory."""
+        if self.index_store is None:
+            return False
+
+        generation = self.index_store.current_generation()
+        manifest = self.index_store.read_manifest(generation)
+        if generation is None or manifest is None:
+            return False
+
+        if manifest.get('embedding_model') != self.embedding_model_name:
+            logger.warning(
+                f'Índice RAG {generation} gerado com '
+                f"{manifest.get('embedding_model')}, modelo atual é "
+                f'{self.embedding_model_name}; ignorando índice salvo'
             )
+            return False
 
-        except Exception as e:
-            logger.error(
-                f'Erro ao carregar e enriquecer dados do CSV {csv_path}: {str(e)}',
-                exc_info=True,
+        vector_store = self.index_store.load(
+            generation, self.embeddings, mmap=self.read_only
+        )
+
+        with self.lock:
+            self._set_vector_store(
+                vector_store, set(manifest.get('tombstones', []))
             )
-            raise
+            self.generation = generation
+            self.doc_ids = set(manifest.get('doc_ids', []))
+            self.ann_report = manifest.get('ann_report')
+            self._pending_checkpoint = 0
+            self._last_checkpoint = time.monotonic()
+            self._maybe_promote()
+            self._bump_index_version()
+
+        logger.info(
+            f'Índice RAG {generation} carregado: '
+            f'{self.get_document_count()} chunks, '
+            f'{len(self.doc_ids)} documentos'
+        )
+        return True
+
+    def refresh_index(self) -> bool:
+        """Hot-swap to a generation published by the writer, if newer."""
+        if self.index_store is None:
+            return False
+
+        generation = self.index_store.current_generation()
+        if generation is None and self.generation is not None:
+            # O escritor esvaziou a base de conhecimento.
+            self.clear_knowledge_base()
+            self.generation = None
+            return True
+        if generation is None or generation in {
+            self.generation,
+            self._seen_generation,
+        }:
+            return False
+
+        self._seen_generation = generation
+        loaded = self.load_index()
+        if loaded and self.embedding_cache is not None:
+            self.embedding_cache.refresh()
+        return loaded
+
+    def enrich_and_load_data(
+        self, csv_path: str, restart: bool = False
+    ) -> 'EnrichmentProgress':
+        """Reuse LLM para enriquecer CSV, retomando execuções interrompidas."""
+        from apps.ia.services.csv_enricher import CSVEnricher
+
+        return CSVEnricher(self, csv_path).run(restart=restart)
@@ -0,0 +1,142 @@
+"""Exact and semantic cache of conversation agent responses."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from apps.ia.services.query_cache import LRUCache, normalize_query
+from apps.ia.services.rag_service import RAGService
+from apps.packpage.settings import get_settings
+
+_caches: WeakKeyDictionary = WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+class ResponseCache:
+    """
+    Two-tier cache in front of the conversation agent.
+
+    The exact tier is keyed by the normalized query, the prompt version and
+    the knowledge base (index) version. The semantic tier compares the
+    query's MiniLM embedding with those of cached queries of the same
+    versions and reuses the answer above a cosine similarity threshold.
+    Both tiers expire entries after `ttl_seconds` and evict the least
+    recently used beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        max_entries: int,
+        ttl_seconds: float,
+        threshold: float,
+    ) -> None:
+        self.rag_service = rag_service
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.exact = LRUCache(max_entries, ttl_seconds)
+        self.semantic_hits = 0
+        self._semantic: OrderedDict[
+            Hashable, tuple[float, Hashable, np.ndarray, str]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(
+        self, query: str, prompt_version: Hashable
+    ) -> tuple[str, str] | None:
+        """Return `(response, tier)` for a cached answer, or None."""
+        if self.max_entries <= 0:
+            return None
+
+        versions = (prompt_version, self.rag_service.index_version)
+        response = self.exact.get((normalize_query(query), *versions))
+        if response is not None:
+            return response, 'exact'
+
+        vector = self._embed(query)
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_score = None, self.threshold
+            for key, (expiry, entry_versions, entry_vector, _) in list(
+                self._semantic.items()
+            ):
+                if expiry <= now:
+                    del self._semantic[key]
+                    continue
+                if entry_versions != versions:
+                    continue
+                score = float(np.dot(vector, entry_vector))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                return None
+            self._semantic.move_to_end(best_key)
+            self.semantic_hits += 1
+            return self._semantic[best_key][3], 'semantic'
+
+    def store(
+        self, query: str, prompt_version: Hashable, response: str
+    ) -> None:
+        """Cache the response of a query in both tiers."""
+        if self.max_entries <= 0:
+            return
+
+        versions = (prompt_version, self.rag_service.index_version)
+        key = (normalize_query(query), *versions)
+        self.exact.set(key, response)
+
+        vector = self._embed(query)
+        with self._lock:
+            self._semantic[key] = (
+                time.monotonic() + self.ttl_seconds,
+                versions,
+                vector,
+                response,
+            )
+            self._semantic.move_to_end(key)
+            while len(self._semantic) > self.max_entries:
+                self._semantic.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        self.exact.clear()
+        with self._lock:
+            self._semantic.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return the size and hit counters of both tiers."""
+        return {
+            'exact': self.exact.stats(),
+            'semantic_entries': len(self._semantic),
+            'semantic_hits': self.semantic_hits,
+            'semantic_threshold': self.threshold,
+        }
+
+    def _embed(self, query: str) -> np.ndarray:
+        """Unit-length embedding of a query, for cosine similarity."""
+        vector = np.asarray(self.rag_service.embed_query(query), np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def get_response_cache(rag_service: RAGService) -> ResponseCache:
+    """Return the worker's response cache bound to a RAG service."""
+    with _caches_lock:
+        cache = _caches.get(rag_service)
+        if cache is None:
+            settings = get_settings()
+            cache = ResponseCache(
+                rag_service,
+                settings.CHAT_RESPONSE_CACHE_SIZE,
+                settings.CHAT_RESPONSE_CACHE_TTL_SECONDS,
+                settings.CHAT_SEMANTIC_CACHE_THRESHOLD,
+            )
+            _caches[rag_service] = cache
+        return cache
@@ -0,0 +1,60 @@
+"""Single-flight deduplication of identical concurrent calls."""
+
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Any
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time and shares its outcome.
+
+    The first caller of a key (the leader) runs the function; callers of
+    the same key arriving while it runs wait for and receive its result, or
+    its exception, instead of repeating the work.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.coalesced = 0
+        self._flights: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self, key: Hashable, func: Callable[..., Any], *args: Any
+    ) -> tuple[Any, bool]:
+        """Return `(result, shared)`, `shared` if another caller ran it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Future()
+                self.calls += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            return flight.result(), True
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def stats(self) -> dict[str, int]:
+        """Return the calls made, the calls coalesced and those running."""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights),
+            }
@@ -1,11 +1,16 @@
 from crewai.tools import tool
 
-from apps.ia.services.rag_service import RAGService
+from apps.core.clients.ai_clients import get_rag_service
 
 
 @tool('Enriquecer CSV')
 def enrich_csv_tool(csv_path: str) -> str:
     """Processa e enriquece CSV com IA, persistindo dados."""
-    rag_service = RAGService()
-    rag_service.enrich_and_load_data(csv_path)
-    return f'CSV {csv_path} enriquecido e carregado com sucesso.'
+    rag_service = get_rag_service()
+    progress = rag_service.enrich_and_load_data(csv_path)
+    return (
+        f'CSV {csv_path} enriquecido e carregado com sucesso: '
+        f'{progress.rows_processed} linhas novas, '
+        f'{progress.rows_resumed} já indexadas, '
+        f'{progress.rows_per_second} linhas/s.'
+    )
@@ -2,6 +2,7 @@
 
 from crewai.tools import tool
 
+from apps.core.clients.ai_clients import get_rag_service
 from apps.ia.services.rag_service import RAGService
 
 
@@ -17,8 +18,8 @@ def rag_search_function(query: str) -> str:
         str: Contexto relevante encontrado na base de conhecimento
     """
     try:
-        # Criar instância do RAG service
-        rag_service = RAGService()
+        # Serviço RAG compartilhado pelo worker (modelo e índice já carregados)
+        rag_service = get_rag_service()
 
         # Buscar documentos relevantes
         docs = rag_service.similarity_search(query, k=3)
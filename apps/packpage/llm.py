@@ -1,29 +1,203 @@
 """Project settings, including LLM configuration with Groq."""
 
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from functools import lru_cache
+from typing import Any
 
 from crewai import LLM
 from transformers import pipeline
 
+from apps.packpage.llm_gateway import (
+    LLMOverloadedError,
+    estimate_tokens,
+    get_llm_gateway,
+)
 from apps.packpage.settings import get_settings
 
+logger = logging.getLogger(__name__)
+
+
+class GatewayLLM(LLM):
+    """
+    CrewAI LLM whose calls go through the LLM gateway.
+
+    A crew run makes one call per agent iteration, so each one waits for
+    its own request and tokens instead of the whole kickoff being charged
+    as a single call.
+    """
+
+    def call(self, messages, *args: Any, **kwargs: Any) -> Any:
+        return get_llm_gateway().call(
+            super().call,
+            messages,
+            *args,
+            tokens=estimate_tokens(messages),
+            **kwargs,
+        )
+
 
 @lru_cache(maxsize=1)
-def get_llm(use_local_fallback: bool = False):
-    """Returns the LLM configured with Groq or local fallback."""
+def get_llm():
+    """Returns the LLM configured with Groq."""
     settings = get_settings()
     api_key = settings.GROQ_API_KEY
     if not api_key:
         raise ValueError('GROQ_API_KEY not found in settings')
 
-    if use_local_fallback:
-        return pipeline(
-            'text-generation', model='microsoft/phi-2', device='cpu'
-        )
-
-    llm = LLM(
+    llm = GatewayLLM(
         model='groq/llama-3.1-8b-instant',
         api_key=api_key,
         temperature=0.7,
     )
     return llm
+
+
+class LocalLLM:
+    """
+    Local text-generation model used when the Groq quota is exhausted.
+
+    The pipeline is loaded once per worker, at startup when `preload` is
+    called or else on the first fallback, and generations run in a
+    dedicated executor of `max_concurrency` threads with at most
+    `max_queue` more waiting, so concurrent fallbacks cannot exhaust the
+    worker's memory. `cpu_threads` sets torch's thread count, which is
+    process-wide: once the model loads it also applies to the embedding
+    model and any other torch work in the worker.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_concurrency: int,
+        max_queue: int,
+        max_new_tokens: int,
+        timeout: float,
+        cpu_threads: int = 0,
+    ) -> None:
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_new_tokens = max_new_tokens
+        self.timeout = timeout
+        self.cpu_threads = cpu_threads
+        self.load_seconds: float | None = None
+        self.generations = 0
+        self.rejected = 0
+        self._pipeline = None
+        self._in_flight = 0
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix='local-llm'
+        )
+
+    @classmethod
+    def from_settings(cls) -> 'LocalLLM':
+        """Build the local model configuration from the settings."""
+        settings = get_settings()
+        return cls(
+            model=settings.LOCAL_LLM_MODEL,
+            max_concurrency=settings.LOCAL_LLM_MAX_CONCURRENCY,
+            max_queue=settings.LOCAL_LLM_MAX_QUEUE,
+            max_new_tokens=settings.LOCAL_LLM_MAX_NEW_TOKENS,
+            timeout=settings.LOCAL_LLM_TIMEOUT_SECONDS,
+            cpu_threads=settings.LOCAL_LLM_CPU_THREADS,
+        )
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the model is already in memory."""
+        return self._pipeline is not None
+
+    def load(self):
+        """Load the pipeline once; concurrent callers wait for the same load."""
+        if self._pipeline is None:
+            with self._load_lock:
+                if self._pipeline is None:
+                    started = time.perf_counter()
+                    if self.cpu_threads > 0:
+                        # Vale para todo o processo, inclusive os embeddings.
+                        import torch
+
+                        torch.set_num_threads(self.cpu_threads)
+                    self._pipeline = pipeline(
+                        'text-generation', model=self.model, device='cpu'
+                    )
+                    self.load_seconds = time.perf_counter() - started
+                    logger.info(
+                        f'Modelo local {self.model} carregado em '
+                        f'{self.load_seconds:.1f}s'
+                    )
+        return self._pipeline
+
+    def preload(self) -> threading.Thread:
+        """Load the model in a background thread, e.g. at startup."""
+        thread = threading.Thread(
+            target=self._preload, name='local-llm-preload', daemon=True
+        )
+        thread.start()
+        return thread
+
+    def generate(self, prompt: str) -> str:
+        """Generate an answer, waiting at most `timeout` seconds."""
+        with self._lock:
+            if self._in_flight >= self.max_concurrency + self.max_queue:
+                self.rejected += 1
+                raise LLMOverloadedError(self.timeout)
+            self._in_flight += 1
+
+        future = self._executor.submit(self._generate, prompt)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as e:
+            # A geração continua ocupando a thread; só o chamador desiste.
+            raise LLMOverloadedError(self.timeout) from e
+
+    def stats(self) -> dict[str, Any]:
+        """Return the load state, limits and usage of the local model."""
+        return {
+            'model': self.model,
+            'loaded': self.loaded,
+            'load_seconds': round(self.load_seconds, 1)
+            if self.load_seconds is not None
+            else None,
+            'in_flight': self._in_flight,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'generations': self.generations,
+            'rejected': self.rejected,
+        }
+
+    def _generate(self, prompt: str) -> str:
+        result = self.load()(
+            prompt,
+            max_new_tokens=self.max_new_tokens,
+            return_full_text=False,
+        )
+        with self._lock:
+            self.generations += 1
+        return str(result[0]['generated_text']).strip()
+
+    def _preload(self) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(
+                f'Falha ao pré-carregar o modelo local: {str(e)}',
+                exc_info=True,
+            )
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+
+@lru_cache(maxsize=1)
+def get_local_llm() -> LocalLLM:
+    """Return the worker's local fallback model."""
+    return LocalLLM.from_settings()
@@ -0,0 +1,279 @@
+"""Rate-limit aware gateway for calls to the Groq LLM."""
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from apps.packpage.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Prioridades: chat interativo é atendido antes do enriquecimento em lote.
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch'}
+
+
+class LLMOverloadedError(Exception):
+    """Raised when an interactive LLM call would wait too long for quota."""
+
+    def __init__(self, retry_after: float):
+        super().__init__('Limite de uso do modelo de linguagem atingido')
+        self.retry_after = retry_after
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an LLM client error is a rate limit (HTTP 429) response."""
+    response = getattr(error, 'response', None)
+    if 429 in {
+        getattr(error, 'status_code', None),
+        getattr(response, 'status_code', None),
+    }:
+        return True
+    message = str(error).lower()
+    return 'rate limit' in message or 'quota exceeded' in message
+
+
+def _retry_after(error: Exception) -> float:
+    """Seconds asked by the `Retry-After` header of an error, or 0."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    try:
+        return float((headers or {}).get('retry-after', 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def estimate_tokens(
+    messages: list[dict[str, Any]] | str, max_tokens: int | None = None
+) -> int:
+    """Tokens a call may use: the prompt (~4 chars each) plus the answer."""
+    if isinstance(messages, str):
+        chars = len(messages)
+    else:
+        chars = sum(len(str(message.get('content'))) for message in messages)
+    return chars // 4 + (
+        max_tokens or get_settings().LLM_DEFAULT_COMPLETION_TOKENS
+    )
+
+
+class TokenBucket:
+    """Bucket refilled continuously up to a per-minute capacity."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Add what was refilled since the last update."""
+        self.level = min(
+            self.capacity, self.level + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)."""
+        self.refill(now)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        """Consume `amount`; the level may go negative (debt)."""
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        """Return (or, if negative, charge) tokens after a call."""
+        self.level = min(self.capacity, self.level + amount)
+
+    def drain(self) -> None:
+        """Empty the bucket, after the server reported a rate limit."""
+        self.level = min(self.level, 0.0)
+
+
+class LLMGateway:
+    """
+    Schedules LLM calls within the provider's requests and tokens per minute.
+
+    Calls wait for both token buckets in priority order (interactive before
+    batch, FIFO within a priority). A 429 response drains the buckets and
+    the call is retried with full-jitter exponential backoff. Interactive
+    calls give up with `LLMOverloadedError` after `max_wait` seconds, and
+    `admit` lets the API reject a chat up front when the queue is already
+    longer than that.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        max_wait: float,
+        default_tokens: int,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self.default_tokens = default_tokens
+        self.calls = 0
+        self.retries = 0
+        self.shed = 0
+        self._waiting: list[tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_settings(cls) -> 'LLMGateway':
+        """Build the gateway from the application settings."""
+        settings = get_settings()
+        return cls(
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_base=settings.LLM_BACKOFF_BASE_SECONDS,
+            backoff_max=settings.LLM_BACKOFF_MAX_SECONDS,
+            max_wait=settings.LLM_MAX_WAIT_SECONDS,
+            default_tokens=settings.LLM_DEFAULT_COMPLETION_TOKENS,
+        )
+
+    def call(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        priority: int = INTERACTIVE,
+        tokens: int | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Run an LLM call once quota allows, retrying rate limits."""
+        tokens = tokens or self.default_tokens
+        timeout = self.max_wait if priority == INTERACTIVE else None
+        for attempt in itertools.count():
+            self.acquire(priority, tokens, timeout)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(
+                    f'Limite de requisições do LLM atingido; nova tentativa '
+                    f'em {delay:.1f}s ({attempt + 1}/{self.max_retries})'
+                )
+                with self._condition:
+                    self.retries += 1
+                    self.requests.drain()
+                    self.tokens.drain()
+                time.sleep(delay)
+                continue
+
+            self._settle(tokens, result)
+            return result
+
+    def acquire(
+        self, priority: int, tokens: int, timeout: float | None = None
+    ) -> None:
+        """Wait for one request and `tokens` tokens, in priority order."""
+        ticket = (priority, next(self._sequence))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        tokens = min(tokens, self.tokens.capacity)
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = max(
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(tokens, now),
+                        )
+                        if wait <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            self.calls += 1
+                            return
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self.shed += 1
+                            raise LLMOverloadedError(wait or self.max_wait)
+                        wait = (
+                            remaining if wait is None else min(wait, remaining)
+                        )
+                    self._condition.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    def estimated_wait(self, priority: int = INTERACTIVE) -> float:
+        """Seconds a new call of `priority` would wait for quota."""
+        with self._condition:
+            ahead = sum(
+                1 for waiting, _ in self._waiting if waiting <= priority
+            )
+            now = time.monotonic()
+            return max(
+                self.requests.wait_time(ahead + 1, now),
+                self.tokens.wait_time((ahead + 1) * self.default_tokens, now),
+            )
+
+    def admit(self, priority: int = INTERACTIVE) -> None:
+        """Raise `LLMOverloadedError` if a new call would wait too long."""
+        wait = self.estimated_wait(priority)
+        if wait > self.max_wait:
+            with self._condition:
+                self.shed += 1
+            raise LLMOverloadedError(wait)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the queue, the quota left and the call counters."""
+        with self._condition:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiting:
+                queued[PRIORITY_NAMES.get(priority, str(priority))] += 1
+            return {
+                'queued': queued,
+                'requests_available': round(self.requests.level, 1),
+                'tokens_available': round(self.tokens.level),
+                'calls': self.calls,
+                'retries': self.retries,
+                'shed': self.shed,
+            }
+
+    def _settle(self, tokens: int, result: Any) -> None:
+        """Correct the token bucket with the usage the provider reported."""
+        usage = getattr(result, 'usage', None)
+        used = getattr(usage, 'total_tokens', None)
+        if not isinstance(used, int):
+            return
+        with self._condition:
+            self.tokens.give_back(tokens - used)
+            self._condition.notify_all()
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, at least the `Retry-After`."""
+        ceiling = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return min(
+            self.backoff_max,
+            max(random.uniform(0, ceiling), _retry_after(error)),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_llm_gateway() -> LLMGateway:
+    """Return the worker's LLM gateway."""
+    return LLMGateway.from_settings()
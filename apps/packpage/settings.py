@@ -1,5 +1,6 @@
 """Settings management for the application using Pydantic."""
 from functools import lru_cache
+from typing import Literal
 
 from langchain_groq import ChatGroq
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -19,10 +20,93 @@ class Settings(BaseSettings):
     )
 
     DB_URL: str
+    # Pool por worker: workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW) deve
+    # caber no max_connections do Postgres (ou no pool do PgBouncer).
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_PGBOUNCER: bool = False
     GROQ_API_KEY: str
     GROQ_MODEL: str = 'llama3-70b-8192'
     SECURITY_ALGORITHM: str = 'HS256'
     SECURITY_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    SECURITY_PERMISSION_CACHE_TTL_SECONDS: int = 60
+    SECURITY_USER_CACHE_SIZE: int = 10_000
+    # Cache por worker: em outros workers, um usuário removido ou renomeado
+    # continua autenticando com tokens antigos por até este prazo.
+    SECURITY_USER_CACHE_TTL_SECONDS: int = 15
+
+    # LLM (limites do Groq para o modelo configurado)
+    LLM_REQUESTS_PER_MINUTE: int = 30
+    LLM_TOKENS_PER_MINUTE: int = 6000
+    LLM_DEFAULT_COMPLETION_TOKENS: int = 512
+    LLM_MAX_RETRIES: int = 3
+    LLM_BACKOFF_BASE_SECONDS: float = 1
+    LLM_BACKOFF_MAX_SECONDS: float = 30
+    LLM_MAX_WAIT_SECONDS: float = 10
+
+    # LLM local (fallback quando a cota do Groq acaba)
+    LOCAL_LLM_MODEL: str = 'microsoft/phi-2'
+    LOCAL_LLM_PRELOAD: bool = False
+    LOCAL_LLM_MAX_CONCURRENCY: int = 1
+    LOCAL_LLM_MAX_QUEUE: int = 4
+    LOCAL_LLM_MAX_NEW_TOKENS: int = 256
+    LOCAL_LLM_TIMEOUT_SECONDS: float = 60
+    # torch.set_num_threads é global no processo: também limita os
+    # embeddings do RAG e o restante do torch no worker. 0 = padrão do torch.
+    LOCAL_LLM_CPU_THREADS: int = 0
+
+    # CHAT
+    CHAT_MAX_CONCURRENCY: int = 8
+    CHAT_MAX_QUEUE: int = 32
+    CHAT_ROUTER_MODE: Literal['auto', 'direct', 'crew'] = 'auto'
+    CHAT_HISTORY_MESSAGES: int = 6
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500
+    CHAT_SUMMARY_EVERY_TURNS: int = 4
+    CHAT_SUMMARY_MAX_TOKENS: int = 256
+    CHAT_RESPONSE_CACHE_SIZE: int = 1024
+    CHAT_RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    CHAT_SEMANTIC_CACHE_THRESHOLD: float = 0.95
+
+    # RAG
+    RAG_EMBEDDING_MODEL: str = 'sentence-transformers/all-MiniLM-L6-v2'
+    RAG_INDEX_DIR: str | None = None
+    RAG_INDEX_ROLE: Literal['auto', 'writer', 'reader'] = 'auto'
+    RAG_INDEX_SYNC_SECONDS: float = 5
+    RAG_CHECKPOINT_EVERY_DOCS: int = 20
+    RAG_CHECKPOINT_INTERVAL_SECONDS: int = 300
+    RAG_REBUILD_BATCH_SIZE: int = 200
+    RAG_REBUILD_WORKERS: int = 4
+    RAG_EMBED_BATCH_SIZE: int = 256
+    RAG_EMBED_MAX_WAIT_MS: int = 20
+    RAG_EMBED_WORKERS: int = 2
+    RAG_ENRICH_WORKERS: int = 4
+    RAG_ENRICH_BATCH_SIZE: int = 32
+    RAG_ENRICH_CHECKPOINT_EVERY_BATCHES: int = 10
+    RAG_EMBEDDING_CACHE_DIR: str | None = None
+    RAG_EMBEDDING_CACHE_MAX_ENTRIES: int = 100_000
+    RAG_QUERY_CACHE_SIZE: int = 1024
+    RAG_SEARCH_CACHE_SIZE: int = 1024
+    RAG_QUERY_CACHE_TTL_SECONDS: int = 3600
+    RAG_COMPACTION_MIN_TOMBSTONES: int = 256
+    RAG_COMPACTION_TOMBSTONE_RATIO: float = 0.2
+    RAG_INDEX_TYPE: Literal[
+        'flat', 'sq8', 'pq', 'ivf_flat', 'ivf_pq', 'hnsw'
+    ] = 'flat'
+    RAG_ANN_MIN_VECTORS: int = 50_000
+    RAG_ANN_TRAIN_SAMPLE: int = 50_000
+    RAG_IVF_NLIST: int = 0
+    RAG_IVF_NPROBE: int = 16
+    RAG_PQ_M: int = 16
+    RAG_PQ_NBITS: int = 8
+    RAG_HNSW_M: int = 32
+    RAG_HNSW_EF_CONSTRUCTION: int = 200
+    RAG_HNSW_EF_SEARCH: int = 64
+    RAG_RERANK_FACTOR: int = 0
+    RAG_CHUNK_STORE_DIR: str | None = None
 
     # SECRETS
     SECURITY_API_SECRET_KEY: str
@@ -31,6 +31,7 @@ app_models = [
     'apps.core.models.transaction',
     'apps.core.models.assignment',
     'apps.core.models.authorization',
+    'apps.core.models.user_permission',
     'apps.core.models.paint',
     'apps.ia.models.conversation',
     'apps.ia.models.message',
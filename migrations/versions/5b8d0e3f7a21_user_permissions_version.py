@@ -0,0 +1,33 @@
+"""user_permissions_version
+
+Revision ID: 5b8d0e3f7a21
+Revises: c41e8a5f2d73
+Create Date: 2026-10-18 16:41:52.107384
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8d0e3f7a21'
+down_revision: Union[str, None] = 'c41e8a5f2d73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                'int_permissions_version',
+                sa.Integer(),
+                server_default=sa.text('0'),
+                nullable=False,
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('int_permissions_version')
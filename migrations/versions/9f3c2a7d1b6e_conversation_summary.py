@@ -0,0 +1,37 @@
+"""conversation_summary
+
+Revision ID: 9f3c2a7d1b6e
+Revises: 43d1a491b9b4
+Create Date: 2026-10-18 10:12:41.208317
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3c2a7d1b6e'
+down_revision: Union[str, None] = '43d1a491b9b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('ia_conversations') as batch_op:
+        batch_op.add_column(sa.Column('txt_summary', sa.Text(), nullable=True))
+        batch_op.add_column(
+            sa.Column('int_summary_message_id', sa.Integer(), nullable=True)
+        )
+    op.create_index(
+        'idx_message_conversation',
+        'ia_messages',
+        ['conversation_id', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_message_conversation', table_name='ia_messages')
+    with op.batch_alter_table('ia_conversations') as batch_op:
+        batch_op.drop_column('int_summary_message_id')
+        batch_op.drop_column('txt_summary')
@@ -0,0 +1,43 @@
+"""user_permission
+
+Revision ID: c41e8a5f2d73
+Revises: 9f3c2a7d1b6e
+Create Date: 2026-10-18 14:03:17.482915
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e8a5f2d73'
+down_revision: Union[str, None] = '9f3c2a7d1b6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_permission',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('str_operation_code', sa.String(length=7), nullable=False),
+        sa.Column('int_grants', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'str_operation_code'),
+    )
+    # Carga inicial a partir das atribuições e autorizações existentes.
+    op.execute(
+        """
+        INSERT INTO user_permission
+            (user_id, str_operation_code, int_grants)
+        SELECT a.user_id, t.str_operation_code, COUNT(*)
+        FROM assignment a
+        JOIN "authorization" au ON au.role_id = a.role_id
+        JOIN "transaction" t ON t.id = au.transaction_id
+        GROUP BY a.user_id, t.str_operation_code
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_permission')
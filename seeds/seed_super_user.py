@@ -1,4 +1,5 @@
 """Seed script to create a super user with all permissions."""
+from apps.core.api.authorization.permissions import refresh_user_permissions
 from apps.core.database.session import get_session
 from apps.core.models.assignment import Assignment
 from apps.core.models.authorization import Authorization
@@ -81,6 +82,9 @@ def seed_super_user():
                 db_session.add(authorization)
         db_session.commit()
 
+        # 5. Materialize the administrator's permissions
+        refresh_user_permissions(db_session, [admin_user.id])
+
 
 if __name__ == '__main__':
     seed_super_user()
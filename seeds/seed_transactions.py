@@ -282,6 +282,13 @@ def seed_transactions():
                 'audit_user_ip': '0.0.0.0',
                 'audit_user_login': 'system',
             },
+            {
+                'operation_code': EnumOperationCode.OP_1070008.value,
+                'name': 'Rebuild Index - via Document',
+                'description': 'Rebuild the knowledge base index from Documents',
+                'audit_user_ip': '0.0.0.0',
+                'audit_user_login': 'system',
+            },
             {
                 'operation_code': EnumOperationCode.OP_1080001.value,
                 'name': 'Paint - Create',
@@ -9,6 +9,8 @@ from sqlalchemy import Engine, create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from apps.core.api.authentication.controller import principal_cache
+from apps.core.api.authorization.controller import permission_cache
 from apps.core.api.paint.paint_enums import (
     Environment,
     FinishType,
@@ -28,6 +30,7 @@ from apps.ia.models.conversation import Conversation
 from apps.ia.models.document import Document
 from apps.ia.models.message import Message
 from apps.packpage.base_model import Base
+from apps.packpage.llm_gateway import get_llm_gateway
 from tests.factory.assignment_factory import (
     AssignmentFactory,
     create_assignment,
@@ -88,6 +91,38 @@ def session():
     Base.metadata.drop_all(engine)
 
 
+@pytest.fixture
+def sql_statements(session):
+    """Record the SQL statements sent to the test database."""
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+@pytest.fixture(autouse=True)
+def llm_gateway():
+    """Give every test its own LLM gateway, with full rate-limit buckets."""
+    get_llm_gateway.cache_clear()
+    yield get_llm_gateway()
+    get_llm_gateway.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """Keep cached users and permissions from leaking between databases."""
+    permission_cache.invalidate()
+    principal_cache.clear()
+    yield
+    permission_cache.invalidate()
+    principal_cache.clear()
+
+
 @event.listens_for(Engine, 'connect')
 def set_sqlite_pragma(dbapi_connection, _connection_record):
     """
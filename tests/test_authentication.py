@@ -1,5 +1,9 @@
+from unittest.mock import patch
+
 from jose import jwt
 
+from apps.core.api.authentication import controller as auth_controller
+from apps.core.api.authorization.permissions import refresh_user_permissions
 from apps.core.utils.security import create_access_token
 
 
@@ -76,3 +80,64 @@ def test_get_current_user_with_empty_username(client, user):
     )
     assert response.status_code == 401
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_get_current_user_caches_principal_by_token_version(
+    client, session, user
+):
+    def login():
+        response = client.post(
+            '/auth/token',
+            data={'username': user.username, 'password': user.clear_password},
+        )
+        return response.json()['access_token']
+
+    token = old_token = login()
+    claims = jwt.decode(token, 'TESTE_SECRET', algorithms=['HS256'])
+    assert claims['uid'] == user.id
+    assert claims['pv'] == 0
+
+    with patch.object(
+        auth_controller,
+        'load_principal',
+        wraps=auth_controller.load_principal,
+    ) as loader, patch(
+        'apps.core.api.user.router.validate_transaction_access'
+    ):
+        for _ in range(3):
+            response = client.get(
+                f'/users/{user.id}',
+                headers={'Authorization': f'Bearer {token}'},
+            )
+            assert response.status_code == 200
+        assert loader.call_count == 1
+
+        # Novas permissões geram tokens com outra versão.
+        refresh_user_permissions(session, [user.id])
+        token = login()
+        assert (
+            jwt.decode(token, 'TESTE_SECRET', algorithms=['HS256'])['pv'] == 1
+        )
+        response = client.get(
+            f'/users/{user.id}',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert response.status_code == 200
+        assert loader.call_count == 2
+
+        # Tokens anteriores usam a entrada recarregada.
+        response = client.get(
+            f'/users/{user.id}',
+            headers={'Authorization': f'Bearer {old_token}'},
+        )
+        assert response.status_code == 200
+        assert loader.call_count == 2
+
+        # Tokens sem `uid` ainda são aceitos, consultando o banco.
+        legacy = create_access_token(data={'sub': user.username})
+        response = client.get(
+            f'/users/{user.id}',
+            headers={'Authorization': f'Bearer {legacy}'},
+        )
+        assert response.status_code == 200
+        assert loader.call_count == 3
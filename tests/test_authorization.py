@@ -1,8 +1,21 @@
 from unittest.mock import patch
 
+import pytest
 from sqlalchemy import select
 
+from apps.core.api.authorization import controller as authorization_controller
+from apps.core.api.authorization.controller import (
+    validate_transaction_access,
+)
+from apps.core.api.authorization.permissions import refresh_user_permissions
+from apps.core.models.assignment import Assignment
 from apps.core.models.authorization import Authorization
+from apps.core.models.role import Role
+from apps.core.models.user_permission import UserPermission
+from apps.packpage.exceptions import (
+    AmbiguousAuthorizationException,
+    IllegalAccessException,
+)
 
 
 def test_authorization_db_structure(session, role, trasaction):
@@ -235,3 +248,74 @@ def test_update_authorization_not_found(client, token):
         assert response.status_code == 404
         assert 'Authorization with ID' in response.json()['detail']
         assert mocked_access_validation.assert_called_once
+
+
+def test_validate_transaction_access_uses_cached_permissions(
+    client, session, token, user, role, trasaction
+):
+    session.add(
+        Assignment(
+            user_id=user.id,
+            role_id=role.id,
+            audit_user_ip='localhost',
+            audit_user_login='tester',
+        )
+    )
+    session.commit()
+    op_code = trasaction.operation_code
+
+    with patch.object(
+        authorization_controller,
+        'load_user_permissions',
+        wraps=authorization_controller.load_user_permissions,
+    ) as loader:
+        with pytest.raises(IllegalAccessException):
+            validate_transaction_access(session, user, op_code)
+
+        # A concessão feita pela API invalida o cache.
+        with patch(
+            'apps.core.api.authorization.router.validate_transaction_access'
+        ):
+            response = client.post(
+                '/authorization/',
+                headers={'Authorization': f'Bearer {token}'},
+                json={'role_id': role.id, 'transaction_id': trasaction.id},
+            )
+        assert response.status_code == 201
+
+        validate_transaction_access(session, user, op_code)
+        validate_transaction_access(session, user, op_code)
+        assert loader.call_count == 2
+
+    # Um segundo papel com a mesma transação torna o acesso ambíguo.
+    other_role = Role(
+        name='ROLE_OTHER',
+        description='ROLE_OTHER',
+        audit_user_ip='localhost',
+        audit_user_login='tester',
+    )
+    session.add(other_role)
+    session.flush()
+    session.add_all(
+        [
+            Assignment(
+                user_id=user.id,
+                role_id=other_role.id,
+                audit_user_ip='localhost',
+                audit_user_login='tester',
+            ),
+            Authorization(
+                role_id=other_role.id,
+                transaction_id=trasaction.id,
+                audit_user_ip='localhost',
+                audit_user_login='tester',
+            ),
+        ]
+    )
+    session.commit()
+    # Alterações fora da API só aparecem depois da ressincronização.
+    validate_transaction_access(session, user, op_code)
+    refresh_user_permissions(session)
+    assert session.get(UserPermission, (user.id, op_code)).grants == 2
+    with pytest.raises(AmbiguousAuthorizationException):
+        validate_transaction_access(session, user, op_code)
@@ -14,6 +14,7 @@ from apps.ia.api.chat.schemas import (
 )
 from apps.ia.models.conversation import Conversation
 from apps.ia.models.message import Message
+from apps.ia.services.context_builder import ConversationContext
 from apps.ia.services.rag_service import RAGService
 
 
@@ -195,6 +196,289 @@ def test_send_message_existing_conversation(
     )
 
 
+def test_run_chat_rejects_when_full():
+    """Test the chat executor rejecting calls beyond its capacity."""
+    import asyncio
+    import threading
+
+    from apps.ia.services.chat_executor import (
+        ChatCapacityError,
+        chat_stats,
+        run_chat,
+    )
+    from apps.packpage.settings import get_settings
+
+    settings = get_settings().model_copy(
+        update={'CHAT_MAX_CONCURRENCY': 1, 'CHAT_MAX_QUEUE': 0}
+    )
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(run_chat(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(ChatCapacityError):
+            await run_chat(str, 'rejeitado')
+        release.set()
+        return await first
+
+    with patch(
+        'apps.ia.services.chat_executor.get_settings', return_value=settings
+    ):
+        assert asyncio.run(scenario()) is True
+        assert chat_stats()['in_flight'] == 0
+
+
+@patch('apps.ia.agents.conversation_agent.litellm.completion')
+def test_conversation_agent_stream_query(mock_completion):
+    """Test streaming the agent answer from the LLM chunks."""
+
+    def chunk(text):
+        return Mock(choices=[Mock(delta=Mock(content=text))])
+
+    mock_completion.return_value = iter(
+        [chunk('Olá'), chunk(None), chunk('!')]
+    )
+    agent = ConversationAgent(Mock())
+
+    assert list(agent.stream_query('Oi')) == ['Olá', '!']
+    kwargs = mock_completion.call_args.kwargs
+    assert kwargs['stream'] is True
+    assert kwargs['messages'][-1] == {'role': 'user', 'content': 'Oi'}
+    assert list(agent.stream_query('  ')) == [
+        'Por favor, faça uma pergunta para que eu possa ajudá-lo.'
+    ]
+
+
+@patch('apps.ia.agents.conversation_agent.Crew')
+def test_conversation_agent_reuses_pooled_crew(mock_crew_class):
+    """Test queries reusing a pooled crew and only creating a new Task."""
+    mock_crew_class.side_effect = lambda **kwargs: Mock(
+        kickoff=Mock(return_value='Resposta')
+    )
+    rag_service = Mock()
+    agent = ConversationAgent(rag_service)
+    other = ConversationAgent(rag_service)
+
+    with patch.object(ConversationAgent, 'route', return_value='crew'):
+        assert agent.process_query('Qual tinta usar?') == 'Resposta'
+        assert other.process_query('E no banheiro?') == 'Resposta'
+    assert mock_crew_class.call_count == 1
+
+    # Consultas simultâneas nunca compartilham o mesmo Crew.
+    with agent.pool.checkout() as first, agent.pool.checkout() as second:
+        assert first[1] is not second[1]
+        assert 'banheiro' in first[1].tasks[0].description
+
+    stats = agent.pool.stats()
+    assert stats['crews_built'] == 2
+    assert stats['queries'] == 2
+    assert stats['setup_ms_avg'] < stats['build_ms_avg']
+
+
+@patch('apps.ia.agents.conversation_agent.litellm.completion')
+def test_conversation_agent_direct_path(mock_completion):
+    """Test simple queries answered by one LLM call with RAG context."""
+    from apps.ia.agents.conversation_agent import route_stats
+
+    mock_completion.return_value = Mock(
+        choices=[Mock(message=Mock(content=' Use tinta acrílica. '))],
+        usage=Mock(prompt_tokens=321),
+    )
+    rag_service = Mock()
+    rag_service.get_relevant_context.return_value = 'Tinta acrílica fosca'
+    agent = ConversationAgent(rag_service)
+    history = [
+        {'role': 'user', 'content': 'Vou pintar a sala'},
+        {'role': 'assistant', 'content': 'Ótimo!'},
+    ]
+
+    assert agent.route('Qual tinta para a sala?') == 'direct'
+    response = agent.process_query('Qual tinta para a sala?', history)
+
+    assert response == 'Use tinta acrílica.'
+    messages = mock_completion.call_args.kwargs['messages']
+    assert 'Tinta acrílica fosca' in messages[0]['content']
+    assert messages[1:3] == history
+    assert messages[-1] == {
+        'role': 'user',
+        'content': 'Qual tinta para a sala?',
+    }
+    assert route_stats.stats()['direct']['prompt_tokens_avg'] > 0
+
+
+def test_conversation_agent_routes_tool_queries_only_with_tools():
+    """Test structured-data queries escalated only when tools exist."""
+    agent = ConversationAgent(Mock())
+
+    assert agent.tools == []
+    assert agent.route('Qual o preço da tinta acrílica?') == 'direct'
+
+    agent.tools = [Mock()]
+    assert agent.route('Qual o preço da tinta acrílica?') == 'crew'
+    assert agent.route('Como limpar a parede?') == 'direct'
+
+
+@patch('apps.ia.agents.conversation_agent.Crew')
+def test_conversation_agent_crew_prompt_tokens_per_query(mock_crew_class):
+    """Test a reused crew recording only each query's prompt tokens."""
+    crew = Mock(usage_metrics=None)
+
+    def kickoff():
+        total = crew.usage_metrics.prompt_tokens if crew.usage_metrics else 0
+        crew.usage_metrics = Mock(prompt_tokens=total + 100)
+        return Mock(raw='Resposta', token_usage=crew.usage_metrics)
+
+    crew.kickoff.side_effect = kickoff
+    mock_crew_class.return_value = crew
+    agent = ConversationAgent(Mock())
+
+    assert agent._run_crew('Qual tinta usar?', None) == ('Resposta', 100)
+    assert agent._run_crew('E no banheiro?', None) == ('Resposta', 100)
+    assert mock_crew_class.call_count == 1
+
+
+def test_conversation_agent_pool_released_with_rag_service():
+    """Test the agent pool not keeping its RAG service alive."""
+    import gc
+    import weakref
+
+    from apps.ia.agents.conversation_agent import _pools
+
+    def use_agent() -> weakref.ref:
+        rag_service = Mock()
+        agent = ConversationAgent(rag_service)
+        with agent.pool.checkout():
+            assert rag_service in _pools
+        return weakref.ref(rag_service)
+
+    service_ref = use_agent()
+    gc.collect()
+    assert service_ref() is None
+
+
+def test_conversation_agent_coalesces_identical_queries():
+    """Test concurrent identical queries sharing one LLM call."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from apps.ia.agents.conversation_agent import llm_flights
+
+    agent = ConversationAgent(Mock(index_version=1))
+    release = threading.Event()
+
+    def answer(query, history):
+        release.wait(5)
+        return 'Use tinta acrílica.'
+
+    coalesced = llm_flights.stats()['coalesced']
+    with (
+        patch.object(agent, '_answer', side_effect=answer) as mock_answer,
+        ThreadPoolExecutor(max_workers=5) as executor,
+    ):
+        futures = [
+            executor.submit(agent.process_query, query)
+            for query in ['Qual tinta usar?', '  qual TINTA usar?'] * 2
+            + ['Qual tinta usar?']
+        ]
+        deadline = time.monotonic() + 5
+        while (
+            llm_flights.stats()['coalesced'] < coalesced + 4
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+        release.set()
+        responses = [future.result() for future in futures]
+
+    assert responses == ['Use tinta acrílica.'] * 5
+    assert mock_answer.call_count == 1
+    assert llm_flights.stats()['coalesced'] == coalesced + 4
+    assert llm_flights.stats()['in_flight'] == 0
+
+    history = [{'role': 'user', 'content': 'Vou pintar a sala'}]
+    assert agent.context_fingerprint(history) != agent.context_fingerprint()
+
+
+def test_send_message_passes_recent_history(
+    session, conversation_with_messages, user
+):
+    """Test the agent receiving the conversation history, oldest first."""
+    mock_agent = Mock()
+    mock_agent.process_query.return_value = 'Claro!'
+    controller = ChatController(conversation_agent=mock_agent)
+
+    controller.send_message(
+        session,
+        ChatMessageSchema(
+            message='Pode detalhar?',
+            conversation_id=conversation_with_messages.id,
+        ),
+        user,
+        '127.0.0.1',
+    )
+
+    query, history = mock_agent.process_query.call_args.args
+    assert query == 'Pode detalhar?'
+    assert history[:2] == [
+        {'role': 'user', 'content': 'Primeira mensagem do usuário'},
+        {'role': 'assistant', 'content': 'Resposta do assistente'},
+    ]
+
+
+def test_conversation_context_window_and_summary(
+    session, conversation_with_messages
+):
+    """Test the history window, token budget and rolling summary."""
+    conversation = conversation_with_messages
+    for index, role in enumerate(('assistant', 'user', 'assistant')):
+        session.add(
+            Message(
+                txt_content=f'Mensagem {index} ' + 'x' * 400,
+                str_role=role,
+                conversation_id=conversation.id,
+                str_status='active',
+                audit_user_ip='127.0.0.1',
+                audit_user_login='test_user',
+            )
+        )
+    session.commit()
+    summarizer = Mock(return_value='Usuário quer pintar a sala.')
+    context = ConversationContext(
+        window_messages=2,
+        token_budget=1000,
+        summary_every=2,
+        summarizer=summarizer,
+    )
+
+    assert len(context.build(session, conversation)) == 4
+    assert context.refresh_summary(session, conversation)
+    previous, pending = summarizer.call_args.args
+    assert previous is None
+    assert [message['content'] for message in pending[:3]] == [
+        'Primeira mensagem do usuário',
+        'Resposta do assistente',
+        'Segunda mensagem do usuário',
+    ]
+    assert len(pending) == 4
+    assert conversation.txt_summary == 'Usuário quer pintar a sala.'
+    assert not context.refresh_summary(session, conversation)
+
+    history = context.build(session, conversation)
+    assert history[0] == {
+        'role': 'system',
+        'content': 'Resumo da conversa até aqui: Usuário quer pintar a sala.',
+    }
+    assert [message['content'][:10] for message in history[1:]] == [
+        'Mensagem 1',
+        'Mensagem 2',
+    ]
+
+    context.token_budget = 130
+    history = context.build(session, conversation)
+    assert len(history) == 2
+    assert history[1]['content'].startswith('Mensagem 2')
+
+
 def test_update_conversation(session, conversation, user):
     """Test updating a conversation."""
     controller = ChatController()
@@ -365,3 +649,198 @@ def test_conversation_title_edge_cases():
     title = controller._generate_conversation_title(many_words.strip())
     expected_words = ('palavra ' * 8).strip()
     assert title.startswith(expected_words[:8])
+
+
+def test_llm_gateway_priority_and_rate_limit_retry():
+    """Test interactive calls served first and 429s retried with backoff."""
+    import threading
+    import time
+
+    from apps.packpage.llm_gateway import BATCH, INTERACTIVE, LLMGateway
+
+    gateway = LLMGateway(
+        requests_per_minute=600,
+        tokens_per_minute=60_000,
+        max_retries=2,
+        backoff_base=0.01,
+        backoff_max=0.05,
+        max_wait=5,
+        default_tokens=10,
+    )
+    gateway.requests.take(gateway.requests.level + 2)
+    order = []
+
+    def call(name, priority):
+        gateway.call(order.append, name, priority=priority)
+
+    def wait_queued(name, count):
+        deadline = time.monotonic() + 5
+        while (
+            gateway.stats()['queued'][name] < count
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=call, args=('lote', BATCH))]
+    threads[0].start()
+    wait_queued('batch', 1)
+    threads.append(threading.Thread(target=call, args=('chat', INTERACTIVE)))
+    threads[1].start()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['chat', 'lote']
+
+    class RateLimitError(Exception):
+        status_code = 429
+
+    llm_call = Mock(
+        side_effect=[
+            RateLimitError('Rate limit reached'),
+            Mock(usage=Mock(total_tokens=4)),
+        ]
+    )
+    result = gateway.call(llm_call, tokens=100)
+
+    assert result.usage.total_tokens == 4
+    assert llm_call.call_count == 2
+    stats = gateway.stats()
+    assert stats['retries'] == 1
+    assert stats['calls'] == 4
+
+    llm_call = Mock(side_effect=ValueError('inválido'))
+    with pytest.raises(ValueError):
+        gateway.call(llm_call)
+    assert llm_call.call_count == 1
+
+
+def test_crew_llm_calls_go_through_gateway(llm_gateway):
+    """Test every LLM call of a crew run waiting for the gateway's quota."""
+    from crewai import LLM
+
+    from apps.packpage.llm import GatewayLLM
+
+    llm = GatewayLLM(model='groq/llama-3.1-8b-instant', api_key='x')
+    with patch.object(LLM, 'call', return_value='Pensamento') as parent:
+        for _ in range(3):
+            assert llm.call([{'role': 'user', 'content': 'Oi'}]) == (
+                'Pensamento'
+            )
+
+    assert parent.call_count == 3
+    assert llm_gateway.stats()['calls'] == 3
+
+
+@patch('apps.packpage.llm.pipeline')
+def test_local_llm_loads_once_and_bounds_concurrency(mock_pipeline):
+    """Test the local fallback model loaded once and its bounded queue."""
+    import threading
+
+    from apps.packpage.llm import LocalLLM
+    from apps.packpage.llm_gateway import LLMOverloadedError
+
+    release = threading.Event()
+
+    def generate(prompt, **kwargs):
+        release.wait(5)
+        return [{'generated_text': f' resposta para {prompt} '}]
+
+    mock_pipeline.return_value = Mock(side_effect=generate)
+    local_llm = LocalLLM(
+        model='modelo-local',
+        max_concurrency=1,
+        max_queue=1,
+        max_new_tokens=32,
+        timeout=5,
+    )
+    assert local_llm.preload().join(5) is None
+    assert local_llm.loaded
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(local_llm.generate('tinta'))
+        )
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    while local_llm.stats()['in_flight'] < 2:
+        release.wait(0.005)
+    with pytest.raises(LLMOverloadedError):
+        local_llm.generate('tinta')
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ['resposta para tinta'] * 2
+    mock_pipeline.assert_called_once_with(
+        'text-generation', model='modelo-local', device='cpu'
+    )
+    assert mock_pipeline.return_value.call_args.kwargs == {
+        'max_new_tokens': 32,
+        'return_full_text': False,
+    }
+    stats = local_llm.stats()
+    assert stats['generations'] == 2
+    assert stats['rejected'] == 1
+
+
+@patch('apps.ia.agents.conversation_agent.get_local_llm')
+def test_conversation_agent_falls_back_on_rate_limit(mock_get_local_llm):
+    """Test the local model answering once the Groq retries run out."""
+
+    class RateLimitError(Exception):
+        status_code = 429
+
+    mock_get_local_llm.return_value.generate.return_value = 'Resposta local'
+    agent = ConversationAgent(Mock())
+
+    with patch.object(
+        agent, '_run_direct', side_effect=RateLimitError('Rate limit')
+    ):
+        assert agent.process_query('Qual tinta usar?') == 'Resposta local'
+    mock_get_local_llm.return_value.generate.assert_called_once_with(
+        'Qual tinta usar?'
+    )
+
+
+@patch('apps.ia.agents.conversation_agent.get_local_llm')
+@patch('apps.ia.agents.conversation_agent.litellm.completion')
+def test_conversation_agent_stream_falls_back_only_before_tokens(
+    mock_completion, mock_get_local_llm
+):
+    """Test the local fallback never spliced after streamed tokens."""
+
+    class RateLimitError(Exception):
+        status_code = 429
+
+    def chunk(text):
+        return Mock(choices=[Mock(delta=Mock(content=text))], usage=None)
+
+    def interrupted_stream():
+        yield chunk('Use tinta')
+        raise RateLimitError('Rate limit')
+
+    generate = mock_get_local_llm.return_value.generate
+    generate.return_value = 'Resposta local'
+    rag_service = Mock()
+    rag_service.get_relevant_context.return_value = 'Tinta acrílica fosca'
+    agent = ConversationAgent(rag_service)
+    history = [{'role': 'user', 'content': 'Vou pintar a sala'}]
+
+    mock_completion.side_effect = RateLimitError('Rate limit')
+    assert list(agent.stream_query('Qual tinta?', history)) == [
+        'Resposta local'
+    ]
+    prompt = generate.call_args.args[0]
+    assert 'Tinta acrílica fosca' in prompt
+    assert 'user: Vou pintar a sala' in prompt
+    assert prompt.endswith('user: Qual tinta?\n\nassistant:')
+
+    mock_completion.side_effect = None
+    mock_completion.return_value = interrupted_stream()
+    tokens = agent.stream_query('Qual tinta?', history)
+    assert next(tokens) == 'Use tinta'
+    with pytest.raises(RateLimitError):
+        next(tokens)
+    assert generate.call_count == 1
@@ -5,14 +5,14 @@ from unittest.mock import Mock, patch
 from fastapi import status
 
 
-@patch('apps.ia.api.chat.controller.ConversationAgent')
+@patch('apps.core.clients.ai_clients.ai_clients.get_conversation_agent')
 def test_send_chat_message_new_conversation(
-    mock_agent_class, client, token, user
+    mock_get_agent, client, token, user
 ):
     """Test sending a chat message to create a new conversation."""
     mock_agent = Mock()
     mock_agent.process_query.return_value = 'Olá! Como posso ajudar você hoje?'
-    mock_agent_class.return_value = mock_agent
+    mock_get_agent.return_value = mock_agent
 
     chat_data = {
         'message': 'Olá, preciso de ajuda com FastAPI',
@@ -36,14 +36,14 @@ def test_send_chat_message_new_conversation(
     assert isinstance(data['conversation_id'], int)
 
 
-@patch('apps.ia.api.chat.controller.ConversationAgent')
+@patch('apps.core.clients.ai_clients.ai_clients.get_conversation_agent')
 def test_send_chat_message_existing_conversation(
-    mock_agent_class, client, token, user, conversation
+    mock_get_agent, client, token, user, conversation
 ):
     """Test sending a message to an existing conversation."""
     mock_agent = Mock()
     mock_agent.process_query.return_value = 'Entendi sua pergunta!'
-    mock_agent_class.return_value = mock_agent
+    mock_get_agent.return_value = mock_agent
 
     chat_data = {
         'message': 'Você pode me explicar melhor?',
@@ -63,6 +63,127 @@ def test_send_chat_message_existing_conversation(
     assert data['response'] == 'Entendi sua pergunta!'
 
 
+@patch('apps.ia.services.chat_executor._in_flight', 10_000)
+@patch('apps.core.clients.ai_clients.ai_clients.get_conversation_agent')
+def test_send_chat_message_over_capacity(mock_get_agent, client, token):
+    """Test the chat endpoint shedding load when the executor is full."""
+    response = client.post(
+        '/ia/chat',
+        json={'message': 'Olá, preciso de ajuda'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == '1'
+    mock_get_agent.return_value.process_query.assert_not_called()
+
+
+@patch('apps.core.clients.ai_clients.ai_clients.get_conversation_agent')
+def test_send_chat_message_llm_quota_exhausted(
+    mock_get_agent, client, token, llm_gateway
+):
+    """Test the chat endpoint shedding load when the LLM quota is used up."""
+    llm_gateway.requests.take(llm_gateway.requests.capacity * 2)
+
+    response = client.post(
+        '/ia/chat',
+        json={'message': 'Olá, preciso de ajuda'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert int(response.headers['Retry-After']) > 10
+    mock_get_agent.return_value.process_query.assert_not_called()
+    assert llm_gateway.stats()['shed'] == 1
+
+
+@patch('apps.core.clients.ai_clients.ai_clients.get_conversation_agent')
+def test_stream_chat_message(mock_get_agent, client, token, session):
+    """Test streaming a chat response over server-sent events."""
+    import json
+
+    from apps.ia.models.message import Message
+
+    mock_agent = Mock()
+    mock_agent.stream_query.return_value = iter(
+        ['Use ', 'tinta ', 'acrílica.']
+    )
+    mock_get_agent.return_value = mock_agent
+
+    response = client.post(
+        '/ia/chat/stream',
+        json={'message': 'Qual tinta para parede externa?'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = [
+        (
+            block.split('\n')[0].removeprefix('event: '),
+            json.loads(block.split('\n')[1].removeprefix('data: ')),
+        )
+        for block in response.text.strip().split('\n\n')
+    ]
+    assert [event for event, _ in events] == [
+        'start',
+        'token',
+        'token',
+        'token',
+        'done',
+    ]
+    done = events[-1][1]
+    assert done['conversation_id'] == events[0][1]['conversation_id']
+    assert done['ttft_ms'] <= done['total_ms']
+
+    message = session.get(Message, done['message_id'])
+    assert message.str_role == 'assistant'
+    assert message.txt_content == 'Use tinta acrílica.'
+
+    response = client.get(
+        '/ia/chat/stats', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.json()['recent_chats'] >= 1
+    assert 'ttft_ms_p50' in response.json()
+
+
+def test_stream_chat_message_invalid_conversation_id(client, token):
+    """Test the streaming endpoint rejecting an unknown conversation."""
+    response = client.post(
+        '/ia/chat/stream',
+        json={'message': 'Olá', 'conversation_id': 99999},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@patch('apps.core.clients.ai_clients.ai_clients.get_conversation_agent')
+def test_send_chat_message_response_cache(mock_get_agent, client, token):
+    """Test repeated questions being answered from the response cache."""
+    mock_agent = Mock()
+    mock_agent.process_query.return_value = 'Use tinta anti-mofo.'
+    mock_get_agent.return_value = mock_agent
+
+    responses = [
+        client.post(
+            '/ia/chat',
+            json={'message': message},
+            headers={'Authorization': f'Bearer {token}'},
+        ).json()
+        for message in (
+            'Qual tinta usar no banheiro?',
+            'qual tinta  usar no BANHEIRO?',
+        )
+    ]
+
+    assert responses[0]['cache'] is None
+    assert responses[1]['cache'] == 'exact'
+    assert responses[1]['response'] == 'Use tinta anti-mofo.'
+    assert responses[1]['conversation_id'] != responses[0]['conversation_id']
+    mock_agent.process_query.assert_called_once()
+
+
 def test_send_chat_message_unauthorized(client):
     """Test sending a chat message without authentication."""
     chat_data = {
@@ -285,12 +406,12 @@ def test_update_conversation_invalid_data(client, token, conversation):
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
-@patch('apps.ia.api.chat.controller.ConversationAgent')
-def test_full_conversation_flow(mock_agent_class, client, token, user):
+@patch('apps.core.clients.ai_clients.ai_clients.get_conversation_agent')
+def test_full_conversation_flow(mock_get_agent, client, token, user):
     """Test complete conversation flow: create, send messages, update."""
     mock_agent = Mock()
     mock_agent.process_query.return_value = 'Resposta da IA'
-    mock_agent_class.return_value = mock_agent
+    mock_get_agent.return_value = mock_agent
 
     conversation_data = {
         'title': 'Conversa Completa',
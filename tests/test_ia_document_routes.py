@@ -390,3 +390,104 @@ def test_document_api_error_handling(client, token):
 
         assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert 'erro' in response.json()['detail'].lower()
+
+
+def test_rebuild_index_started(client, token):
+    """Test starting the knowledge base index rebuild."""
+    with patch(
+        'apps.ia.api.documents.router.validate_transaction_access'
+    ), patch('apps.ia.api.documents.router.rebuild_job') as mock_job:
+        mock_job.start.return_value = True
+        mock_job.progress.as_dict.return_value = {
+            'status': 'running',
+            'total_documents': 0,
+            'documents_processed': 0,
+            'chunks_indexed': 0,
+            'started_at': None,
+            'finished_at': None,
+            'elapsed_seconds': 0.0,
+            'docs_per_second': 0.0,
+            'chunks_per_second': 0.0,
+            'generation': None,
+            'error': None,
+        }
+
+        response = client.post(
+            '/ia/documents/index/rebuild',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()['status'] == 'running'
+    mock_job.start.assert_called_once()
+
+
+def test_rebuild_index_already_running(client, token):
+    """Test starting a rebuild while another one is running."""
+    with patch(
+        'apps.ia.api.documents.router.validate_transaction_access'
+    ), patch('apps.ia.api.documents.router.rebuild_job') as mock_job:
+        mock_job.start.return_value = False
+
+        response = client.post(
+            '/ia/documents/index/rebuild',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+def test_rebuild_index_status(client, token):
+    """Test reading the knowledge base index rebuild status."""
+    with patch('apps.ia.api.documents.router.validate_transaction_access'):
+        response = client.get(
+            '/ia/documents/index/rebuild',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['status'] in {
+        'idle',
+        'running',
+        'completed',
+        'failed',
+    }
+
+
+def test_rebuild_index_requires_permission(client, token):
+    """Test rebuilding the index without the transaction authorization."""
+    response = client.post(
+        '/ia/documents/index/rebuild',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_index_stats(client, token):
+    """Test reading the knowledge base cache counters."""
+    with patch(
+        'apps.ia.api.documents.router.validate_transaction_access'
+    ), patch('apps.ia.api.documents.router.doc_controller') as mock_ctrl:
+        mock_ctrl.rag_service.index_stats.return_value = {
+            'index_version': 3,
+            'search_results': {'hits': 2, 'misses': 1},
+        }
+
+        response = client.get(
+            '/ia/documents/index/stats',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['index_version'] == 3
+
+
+def test_index_stats_requires_permission(client, token):
+    """Test reading the index stats without the transaction authorization."""
+    response = client.get(
+        '/ia/documents/index/stats',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -187,7 +187,7 @@ def test_doc_controller_initialization():
 @patch('apps.ia.api.documents.controller.RAGService')
 def test_upload_document_success(mock_rag_service, session, user):
     """Test successful document upload."""
-    mock_rag = Mock()
+    mock_rag = Mock(read_only=False)
     mock_rag_service.return_value = mock_rag
 
     controller = DocController()
@@ -285,3 +285,178 @@ def test_search_knowledge_base_empty_results():
 
     results = controller.search_knowledge_base('nonexistent', k=5)
     assert len(results) == 0
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_index_rebuilder_from_documents(
+    mock_rag_embeddings, session, multiple_documents, max_workers
+):
+    """Test rebuilding the RAG index from the documents table."""
+    from sqlalchemy.orm import Session
+
+    from apps.ia.services.index_rebuilder import IndexRebuilder
+
+    multiple_documents[0].str_status = 'deleted'
+    session.commit()
+
+    rag_service = RAGService()
+    rag_service.add_document_from_text('Conteúdo antigo', {'doc_id': 999})
+    rag_service.add_document_from_text(
+        'Tinta 1 enriquecida', {'source': 'tintas.csv', 'row_index': 1}
+    )
+
+    rebuilder = IndexRebuilder(
+        rag_service,
+        lambda: Session(bind=session.get_bind()),
+        batch_size=4,
+        embed_batch_size=3,
+        max_workers=max_workers,
+    )
+    progress = rebuilder.run()
+
+    assert progress.status == 'completed'
+    assert progress.total_documents == 9
+    assert progress.documents_processed == 9
+    assert progress.chunks_indexed == 9
+    assert progress.chunks_kept == 1
+    assert progress.docs_per_second > 0
+    assert rag_service.get_document_count() == 10
+    assert rag_service.doc_ids == {doc.id for doc in multiple_documents[1:]}
+
+    # Chunks que não vêm da tabela (ex.: CSV enriquecido) são mantidos.
+    results = rag_service.similarity_search('Tinta 1 enriquecida', k=1)
+    assert results[0].metadata == {'source': 'tintas.csv', 'row_index': 1}
+
+    results = rag_service.similarity_search('Conteúdo do documento 5', k=1)
+    assert results[0].metadata['source'].startswith('document_')
+
+
+def test_rebuild_index_keeps_persisted_chunks(
+    mock_rag_embeddings, session, multiple_documents, tmp_path
+):
+    """Test the rebuild command keeping chunks of the persisted index."""
+    from sqlalchemy.orm import Session
+
+    from apps.ia.services.index_rebuilder import rebuild_index
+
+    index_dir = str(tmp_path / 'index')
+    previous = RAGService(index_dir=index_dir)
+    previous.add_document_from_text(
+        'Tinta 1 enriquecida', {'source': 'tintas.csv', 'row_index': 1}
+    )
+    previous.checkpoint()
+
+    progress = rebuild_index(
+        index_dir, lambda: Session(bind=session.get_bind())
+    )
+
+    assert progress.status == 'completed'
+    assert progress.chunks_kept == 1
+    reloaded = RAGService(index_dir=index_dir, role='reader')
+    assert reloaded.load_index() is True
+    assert reloaded.get_document_count() == 11
+    results = reloaded.similarity_search('Tinta 1 enriquecida', k=1)
+    assert results[0].metadata == {'source': 'tintas.csv', 'row_index': 1}
+
+
+def test_delete_document_removes_chunks(mock_rag_embeddings, session, user):
+    """Test deleting a document removing its chunks from the index."""
+    rag_service = RAGService()
+    controller = DocController(rag_service=rag_service, init_agent=False)
+    document = controller.upload_document(
+        session,
+        DocumentUploadSchema(
+            str_title='Tinta anti-mofo',
+            txt_content='Tinta anti-mofo para banheiros e cozinhas',
+        ),
+        user,
+        '127.0.0.1',
+    )
+    rag_service.add_document_from_text('Esmalte para portões', {'doc_id': 99})
+
+    controller.delete_document(session, document.id)
+
+    assert document.id not in rag_service.doc_ids
+    assert rag_service.get_document_count() == 1
+    results = rag_service.similarity_search('tinta anti-mofo', k=5)
+    assert [doc.metadata['doc_id'] for doc in results] == [99]
+
+
+def test_index_sync_writer_follows_documents_table(
+    mock_rag_embeddings, session, multiple_documents, tmp_path
+):
+    """Test the writer sync loop indexing and dropping documents."""
+    from sqlalchemy.orm import Session
+
+    from apps.ia.services.index_sync import IndexSync
+
+    rag_service = RAGService(index_dir=str(tmp_path / 'index'))
+    rag_service.add_document_from_text('Sem registro', {'doc_id': 999})
+    index_sync = IndexSync(
+        rag_service, lambda: Session(bind=session.get_bind()), interval=1
+    )
+
+    # Documentos ausentes só entram no índice no segundo ciclo.
+    assert index_sync.sync_documents() == (0, 1)
+    assert index_sync.sync_documents() == (10, 0)
+    assert rag_service.doc_ids == {doc.id for doc in multiple_documents}
+
+    multiple_documents[0].str_status = 'deleted'
+    session.commit()
+    index_sync.tick()
+
+    assert multiple_documents[0].id not in rag_service.doc_ids
+    assert rag_service.get_document_count() == 9
+    # Abaixo dos limites de checkpoint e de compactação nada é publicado.
+    assert rag_service.index_store.current_generation() is None
+    assert len(rag_service.tombstones) == 1
+
+    rag_service._last_checkpoint -= (
+        rag_service.settings.RAG_CHECKPOINT_INTERVAL_SECONDS
+    )
+    index_sync.tick()
+    assert rag_service.index_store.current_generation() is not None
+    assert len(rag_service.tombstones) == 1
+
+    reader = RAGService(index_dir=str(tmp_path / 'index'), role='reader')
+    assert reader.load_index() is True
+    assert reader.get_document_count() == 9
+    assert multiple_documents[0].id not in reader.chunk_ids
+
+
+def test_reader_upload_stays_pending_until_writer_indexes(
+    mock_rag_embeddings, session, user, tmp_path
+):
+    """Test an upload on a reader worker indexed later by the writer."""
+    from sqlalchemy.orm import Session
+
+    from apps.ia.services.index_sync import IndexSync
+
+    index_dir = str(tmp_path / 'index')
+    writer = RAGService(index_dir=index_dir, role='auto')
+    reader = RAGService(index_dir=index_dir, role='auto')
+    assert reader.read_only is True
+
+    document = DocController(
+        rag_service=reader, init_agent=False
+    ).upload_document(
+        session,
+        DocumentUploadSchema(
+            str_title='Tinta anti-mofo',
+            txt_content='Tinta anti-mofo para banheiros e cozinhas',
+        ),
+        user,
+        '127.0.0.1',
+    )
+    assert document.dt_processed_at is None
+    assert reader.get_document_count() == 0
+
+    index_sync = IndexSync(
+        writer, lambda: Session(bind=session.get_bind()), interval=1
+    )
+    index_sync.sync_documents()
+    assert index_sync.sync_documents() == (1, 0)
+
+    session.refresh(document)
+    assert document.dt_processed_at is not None
+    assert writer.doc_ids == {document.id}
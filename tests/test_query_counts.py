@@ -0,0 +1,74 @@
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import pytest
+
+
+def get(client, token, session, sql_statements, url, router):
+    """GET `url` with a fresh identity map, returning the SQL it ran."""
+    headers = {'Authorization': f'Bearer {token}'}
+    access = (
+        patch(f'apps.{router}.router.validate_transaction_access')
+        if router
+        else nullcontext()
+    )
+    with access:
+        # Primeira chamada aquece o cache do usuário autenticado.
+        assert client.get(url, headers=headers).status_code == 200
+        session.expunge_all()
+        sql_statements.clear()
+        assert client.get(url, headers=headers).status_code == 200
+    return list(sql_statements)
+
+
+@pytest.mark.parametrize(
+    ('url', 'router', 'fixture', 'expected'),
+    [
+        ('/users/1', 'core.api.user', 'paint', 1),
+        ('/users/', 'core.api.user', 'assignment_10', 1),
+        ('/users/1/transactions', 'core.api.user', 'assignment_10', 1),
+        ('/assignment/', 'core.api.assignment', 'assignment_10', 1),
+        ('/assignment/1', 'core.api.assignment', 'assignment_10', 1),
+        (
+            '/authorization/',
+            'core.api.authorization',
+            'authorization_10_plus_one',
+            1,
+        ),
+        ('/role/', 'core.api.role', 'assignment_10', 1),
+        (
+            '/transaction/',
+            'core.api.transaction',
+            'transaction_10_plus_one',
+            1,
+        ),
+        ('/paints/', 'core.api.paint', 'paint', 1),
+    ],
+)
+def test_endpoint_statement_count(
+    request,
+    client,
+    token,
+    session,
+    sql_statements,
+    url,
+    router,
+    fixture,
+    expected,
+):
+    request.getfixturevalue(fixture)
+
+    statements = get(client, token, session, sql_statements, url, router)
+
+    assert len(statements) == expected, statements
+
+
+def test_conversation_messages_loaded_explicitly(
+    client, token, session, sql_statements, conversation_with_messages
+):
+    url = f'/ia/conversations/{conversation_with_messages.id}'
+
+    statements = get(client, token, session, sql_statements, url, None)
+
+    # Conversa e mensagens (selectinload), sem carregar o usuário.
+    assert len(statements) == 2, statements
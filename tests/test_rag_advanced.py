@@ -2,7 +2,9 @@
 
 import contextlib
 
-from apps.ia.services.rag_service import RAGService
+import pytest
+
+from apps.ia.services.rag_service import RAGService, ReadOnlyIndexError
 
 
 def test_rag_service_concurrent_operations(mock_rag_embeddings):
@@ -243,3 +245,565 @@ def test_rag_service_edge_cases(mock_rag_embeddings):
 
     results = rag_service.similarity_search('test', k=-1)
     assert len(results) == 0
+
+
+def test_rag_service_index_checkpoint_and_reload(
+    mock_rag_embeddings, tmp_path
+):
+    """Test RAG service persisting and reloading the index from disk."""
+    rag_service = RAGService(index_dir=str(tmp_path))
+
+    rag_service.add_document_from_text('Tinta acrílica fosca', {'doc_id': 1})
+    rag_service.add_document_from_text('Esmalte sintético', {'doc_id': 2})
+    generation = rag_service.checkpoint()
+
+    assert generation is not None
+    assert rag_service.checkpoint() is None
+
+    manifest = rag_service.index_store.read_manifest()
+    assert manifest['generation'] == generation
+    assert manifest['doc_ids'] == [1, 2]
+    assert manifest['embedding_model'] == rag_service.embedding_model_name
+
+    reloaded = RAGService(index_dir=str(tmp_path))
+    assert reloaded.load_index() is True
+    assert reloaded.get_document_count() == 2
+    assert reloaded.doc_ids == {1, 2}
+    assert reloaded.similarity_search('Esmalte', k=1)
+
+    reloaded.clear_knowledge_base()
+    assert RAGService(index_dir=str(tmp_path)).load_index() is False
+
+
+def test_rag_service_index_checkpoint_threshold(mock_rag_embeddings, tmp_path):
+    """Test RAG service checkpointing automatically after N documents."""
+    rag_service = RAGService(index_dir=str(tmp_path))
+    threshold = rag_service.settings.RAG_CHECKPOINT_EVERY_DOCS
+
+    rag_service.add_documents(
+        [f'Documento {i}' for i in range(threshold)],
+        [{'doc_id': i} for i in range(threshold)],
+    )
+
+    assert rag_service.index_store.current_generation() is not None
+
+
+def test_rag_service_index_ignores_other_embedding_model(
+    mock_rag_embeddings, tmp_path
+):
+    """Test RAG service refusing an index built with another model."""
+    rag_service = RAGService(index_dir=str(tmp_path))
+    rag_service.add_document_from_text('Tinta para madeira', {'doc_id': 1})
+    rag_service.checkpoint()
+
+    other = RAGService(index_dir=str(tmp_path))
+    other.embedding_model_name = 'outro-modelo'
+
+    assert other.load_index() is False
+    assert other.get_document_count() == 0
+
+
+def test_embedding_pipeline_merges_concurrent_requests():
+    """Test concurrent embedding requests sharing one encoder batch."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from apps.ia.services.embedding_pipeline import EmbeddingPipeline
+    from tests.mock.mock_embeddings import MockEmbeddings
+
+    embeddings = MockEmbeddings()
+    calls = []
+    original = embeddings.embed_documents
+
+    def counting_embed_documents(texts):
+        calls.append(len(texts))
+        return original(texts)
+
+    embeddings.embed_documents = counting_embed_documents
+    pipeline = EmbeddingPipeline(embeddings, batch_size=12, max_wait_ms=200)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(
+            pool.map(
+                pipeline.embed_documents,
+                [
+                    [f'documento {i} chunk {j}' for j in range(3)]
+                    for i in range(4)
+                ],
+            )
+        )
+
+    assert calls == [12]
+    assert all(len(vectors) == 3 for vectors in results)
+    assert results[2][1] == original(['documento 2 chunk 1'])[0]
+    assert pipeline.stats()['avg_batch_size'] == 12
+
+
+def test_embedding_pipeline_flushes_after_timeout():
+    """Test a partial micro-batch being flushed after max_wait_ms."""
+    from apps.ia.services.embedding_pipeline import EmbeddingPipeline
+    from tests.mock.mock_embeddings import MockEmbeddings
+
+    pipeline = EmbeddingPipeline(
+        MockEmbeddings(), batch_size=100, max_wait_ms=10
+    )
+
+    assert len(pipeline.submit(['tinta acrílica']).result(timeout=5)) == 1
+    assert pipeline.submit([]).result() == []
+
+
+def test_embedding_cache_lru_and_persistence(tmp_path):
+    """Test the embedding cache evicting LRU entries and reopening."""
+    from apps.ia.services.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(str(tmp_path), 'modelo/teste', max_entries=2)
+    cache.put_many(['a', 'b'], [[1.0, 0.0], [0.0, 1.0]])
+    assert cache.get_many(['a']) == [[1.0, 0.0]]
+
+    cache.put_many(['c'], [[0.5, 0.5]])
+    assert cache.get_many(['a', 'b', 'c']) == [[1.0, 0.0], None, [0.5, 0.5]]
+    assert cache.stats()['hits'] == 3
+
+    reader = EmbeddingCache(str(tmp_path), 'modelo/teste', max_entries=2)
+    assert reader.writable is False
+    assert reader.get_many(['c']) == [[0.5, 0.5]]
+    reader.put_many(['d'], [[0.2, 0.8]])
+    assert len(reader) == 2
+
+    cache.flush()
+    del cache
+    reopened = EmbeddingCache(str(tmp_path), 'modelo/teste', max_entries=2)
+    assert reopened.get_many(['a', 'c']) == [[1.0, 0.0], [0.5, 0.5]]
+    assert len(EmbeddingCache(str(tmp_path), 'outro', max_entries=2)) == 0
+
+
+def test_embedding_cache_reader_misses_overwritten_slot(tmp_path):
+    """Test a reader never returning the vector of an evicting entry."""
+    from apps.ia.services.embedding_cache import EmbeddingCache
+
+    writer = EmbeddingCache(str(tmp_path), 'modelo', 1, writable=True)
+    writer.put_many(['a'], [[1.0, 0.0]])
+    reader = EmbeddingCache(str(tmp_path), 'modelo', 1, writable=False)
+    assert reader.get_many(['a']) == [[1.0, 0.0]]
+
+    writer.put_many(['b'], [[0.0, 1.0]])
+    assert reader.get_many(['a']) == [None]
+
+    class EvictOnRead:
+        """Vectors whose slot the writer reuses while a reader copies."""
+
+        def __init__(self, vectors):
+            self.vectors = vectors
+
+        def __getitem__(self, slot):
+            row = self.vectors[slot]
+            writer.put_many(['c'], [[0.5, 0.5]])
+            return row
+
+    reader.refresh()
+    reader._vectors = EvictOnRead(reader._vectors)
+    assert reader.get_many(['b']) == [None]
+    assert reader.stats()['misses'] == 2
+
+
+def test_rag_service_embedding_cache_skips_encoder(
+    mock_rag_embeddings, tmp_path
+):
+    """Test re-adding identical chunks not calling the encoder again."""
+    from apps.ia.services.embedding_cache import EmbeddingCache
+
+    rag_service = RAGService()
+    rag_service.embedding_cache = EmbeddingCache(
+        str(tmp_path), rag_service.embedding_model_name, max_entries=100
+    )
+
+    rag_service.add_document_from_text('Tinta acrílica fosca', {'doc_id': 1})
+    encoded = rag_service.embedding_pipeline.texts_encoded
+    rag_service.add_document_from_text('Tinta acrílica fosca', {'doc_id': 2})
+
+    assert rag_service.embedding_pipeline.texts_encoded == encoded
+    assert rag_service.embedding_cache.stats()['hits'] == 1
+    assert rag_service.get_document_count() == 2
+
+
+def test_rag_service_search_caches(mock_rag_embeddings):
+    """Test query embeddings and results cached per index version."""
+    rag_service = RAGService()
+    rag_service.add_document_from_text('Tinta para área externa', {})
+
+    first = rag_service.similarity_search('Tinta para área externa', k=1)
+    second = rag_service.similarity_search('  tinta PARA área externa ', k=1)
+
+    assert second == first
+    assert rag_service.search_cache.stats()['hits'] == 1
+    assert rag_service.query_embedding_cache.stats()['misses'] == 1
+
+    version = rag_service.index_version
+    rag_service.add_document_from_text('Tinta anti-mofo', {})
+    assert rag_service.index_version == version + 1
+    assert len(rag_service.search_cache) == 0
+
+    rag_service.similarity_search_with_score('tinta para área externa', k=2)
+    stats = rag_service.index_stats()
+    assert stats['query_embeddings']['hits'] == 1
+    assert stats['search_results']['misses'] == 2
+
+    rag_service.clear_knowledge_base()
+    assert rag_service.similarity_search('anti-mofo', k=1) == []
+
+
+def test_lru_cache_eviction_and_ttl():
+    """Test the LRU cache evicting old entries and expiring by TTL."""
+    from apps.ia.services.query_cache import LRUCache
+
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+
+    expired = LRUCache(max_entries=2, ttl_seconds=0)
+    expired.set('a', 1)
+    assert expired.get('a') is None
+
+
+def test_response_cache_exact_and_semantic_tiers():
+    """Test response cache tiers, versioning, TTL and eviction."""
+    from unittest.mock import Mock
+
+    from apps.ia.services.response_cache import ResponseCache
+
+    vectors = {
+        'qual tinta usar no banheiro?': [1.0, 0.0, 0.0],
+        'que tinta uso no banheiro?': [0.99, 0.1, 0.0],
+        'como limpar a parede?': [0.0, 1.0, 0.0],
+        'tinta para madeira?': [0.0, 0.0, 1.0],
+    }
+    rag_service = Mock(index_version=1)
+    rag_service.embed_query.side_effect = lambda q: vectors[q.lower()]
+    cache = ResponseCache(
+        rag_service, max_entries=2, ttl_seconds=60, threshold=0.95
+    )
+
+    cache.store('Qual tinta usar no banheiro?', 'v1', 'Use anti-mofo.')
+    assert cache.lookup('  qual TINTA usar no banheiro? ', 'v1') == (
+        'Use anti-mofo.',
+        'exact',
+    )
+    assert cache.lookup('Que tinta uso no banheiro?', 'v1') == (
+        'Use anti-mofo.',
+        'semantic',
+    )
+    assert cache.lookup('Como limpar a parede?', 'v1') is None
+    assert cache.lookup('Qual tinta usar no banheiro?', 'v2') is None
+
+    rag_service.index_version = 2
+    assert cache.lookup('Qual tinta usar no banheiro?', 'v1') is None
+
+    cache.store('Qual tinta usar no banheiro?', 'v1', 'Anti-mofo.')
+    cache.store('Como limpar a parede?', 'v1', 'Pano úmido.')
+    cache.store('Tinta para madeira?', 'v1', 'Esmalte.')
+    assert cache.lookup('Que tinta uso no banheiro?', 'v1') is None
+    assert cache.stats()['semantic_entries'] == 2
+
+    cache.ttl_seconds = cache.exact.ttl_seconds = 0
+    cache.store('Tinta para madeira?', 'v1', 'Verniz.')
+    assert cache.lookup('Tinta para madeira?', 'v1') is None
+
+
+def test_rag_service_delete_document_and_compact(mock_rag_embeddings):
+    """Test tombstoned chunks hidden from search until compaction."""
+    rag_service = RAGService()
+    rag_service.settings = rag_service.settings.model_copy(
+        update={'RAG_COMPACTION_MIN_TOMBSTONES': 100}
+    )
+    rag_service.add_documents(
+        [f'Tinta número {i}' for i in range(10)],
+        [{'doc_id': i} for i in range(10)],
+    )
+
+    assert rag_service.delete_document(3) == 1
+    assert rag_service.delete_document(3) == 0
+    assert rag_service.tombstones
+    assert rag_service.vector_store.index.ntotal == 10
+
+    results = rag_service.similarity_search('Tinta número 3', k=10)
+    assert len(results) == 9
+    assert 3 not in {doc.metadata['doc_id'] for doc in results}
+
+    rag_service.delete_document(4)
+    assert not rag_service.tombstones
+    assert rag_service.vector_store.index.ntotal == 8
+    assert rag_service.get_document_count() == 8
+    assert len(rag_service.similarity_search('Tinta', k=10)) == 8
+
+
+@pytest.mark.parametrize(
+    'index_type', ['sq8', 'pq', 'ivf_flat', 'ivf_pq', 'hnsw']
+)
+def test_rag_service_promotes_to_ann_index(
+    mock_rag_embeddings, tmp_path, index_type
+):
+    """Test promotion from the flat index to an ANN index and reload."""
+    from apps.ia.services.ann_index import ANNConfig
+
+    rag_service = RAGService(index_dir=str(tmp_path))
+    rag_service.ann_config = ANNConfig(
+        index_type=index_type, min_vectors=300, nlist=8, pq_nbits=4
+    )
+    rag_service.add_documents(
+        [f'Tinta {i} cor {i % 7} acabamento {i % 3}' for i in range(299)],
+        [{'doc_id': i} for i in range(299)],
+    )
+    assert rag_service.index_stats()['index']['type'] == 'flat'
+
+    rag_service.add_document_from_text('Tinta anti-mofo', {'doc_id': 299})
+    stats = rag_service.index_stats()['index']
+
+    assert stats['type'] == index_type
+    assert stats['vectors'] == 300
+    assert 0 < stats['ann_report']['recall_at_10']['recall'] <= 1
+    assert rag_service.similarity_search('Tinta anti-mofo', k=3)
+
+    rag_service.delete_document(299)
+    rag_service.compact()
+    assert rag_service.vector_store.index.ntotal == 299
+    assert all(
+        doc.metadata['doc_id'] != 299
+        for doc in rag_service.similarity_search('Tinta anti-mofo', k=5)
+    )
+
+    rag_service.checkpoint()
+    reloaded = RAGService(index_dir=str(tmp_path))
+    assert reloaded.load_index() is True
+    assert reloaded.index_stats()['index']['type'] == index_type
+
+
+def test_rag_service_quantized_index_with_rerank(
+    mock_rag_embeddings, tmp_path
+):
+    """Test int8 vectors cutting bytes per chunk, with float re-ranking."""
+    from unittest.mock import patch
+
+    from apps.ia.services.ann_index import ANNConfig
+    from apps.ia.services.embedding_cache import EmbeddingCache
+
+    rag_service = RAGService()
+    rag_service.settings = rag_service.settings.model_copy(
+        update={'RAG_RERANK_FACTOR': 4}
+    )
+    # A reordenação usa os vetores float32 guardados no cache.
+    rag_service.embedding_cache = EmbeddingCache(
+        str(tmp_path), rag_service.embedding_model_name, 100
+    )
+    rag_service.ann_config = ANNConfig(index_type='sq8', min_vectors=50)
+    texts = [f'Tinta {i} cor {i % 7} acabamento {i % 3}' for i in range(50)]
+
+    rag_service.add_documents(texts[:49])
+    flat_bytes = rag_service.index_stats()['index']['vector_bytes_per_chunk']
+    rag_service.add_documents(texts[49:])
+    stats = rag_service.index_stats()['index']
+
+    assert stats['type'] == 'sq8'
+    assert stats['vector_bytes_per_chunk'] == flat_bytes / 4
+
+    results = rag_service.similarity_search_with_score(texts[10], k=3)
+    assert results[0][0].page_content == texts[10]
+    assert results[0][1] == pytest.approx(0.0, abs=1e-6)
+
+    # Sem os vetores em cache, a busca não reprocessa os candidatos.
+    rag_service.embedding_cache = None
+    rag_service.search_cache.clear()
+    with patch.object(rag_service, 'embed_documents') as embed_documents:
+        results = rag_service.similarity_search_with_score(texts[10], k=3)
+    embed_documents.assert_not_called()
+    assert results[0][0].page_content == texts[10]
+
+
+def test_rag_service_chunk_text_store(mock_rag_embeddings, tmp_path):
+    """Test chunk text kept in the shared memory-mapped store."""
+    import pickle
+
+    from apps.ia.services.chunk_store import ChunkTextStore
+
+    rag_service = RAGService(index_dir=str(tmp_path / 'index'))
+    rag_service.settings = rag_service.settings.model_copy(
+        update={'RAG_CHUNK_STORE_DIR': str(tmp_path / 'chunks')}
+    )
+    rag_service.add_document_from_text('Tinta acrílica fosca', {'doc_id': 1})
+    rag_service.add_document_from_text('Esmalte sintético', {'doc_id': 2})
+
+    docstore = rag_service.vector_store.docstore
+    assert isinstance(docstore, ChunkTextStore)
+    assert rag_service.similarity_search('Esmalte sintético', k=1)[
+        0
+    ].metadata == {'doc_id': 2}
+
+    memory = rag_service.index_stats()['index']
+    assert memory['shared_bytes_per_chunk'] > 0
+    assert memory['process_bytes_per_chunk'] > 0
+
+    restored = pickle.loads(pickle.dumps(docstore))
+    assert len(restored) == 2
+    assert sorted(doc.page_content for _, doc in restored.items()) == [
+        'Esmalte sintético',
+        'Tinta acrílica fosca',
+    ]
+
+    rag_service.delete_document(1)
+    rag_service.checkpoint()
+    reloaded = RAGService(index_dir=str(tmp_path / 'index'))
+    assert reloaded.load_index() is True
+    assert [doc.page_content for doc in reloaded.documents] == [
+        'Esmalte sintético'
+    ]
+
+
+def test_rag_service_reader_follows_writer_generations(
+    mock_rag_embeddings, tmp_path
+):
+    """Test a reader worker loading the writer's generations read-only."""
+    index_dir = str(tmp_path / 'index')
+    writer = RAGService(index_dir=index_dir, role='auto')
+    reader = RAGService(index_dir=index_dir, role='auto')
+    assert writer.read_only is False
+    assert reader.read_only is True
+
+    writer.add_document_from_text('Tinta acrílica fosca', {'doc_id': 1})
+    writer.checkpoint()
+    assert reader.refresh_index() is True
+    assert reader.generation == writer.generation
+    assert reader.refresh_index() is False
+
+    with pytest.raises(ReadOnlyIndexError):
+        reader.add_document_from_text('Recusado pelo leitor', {'doc_id': 2})
+    assert reader.checkpoint() is None
+    assert reader.get_document_count() == 1
+
+    writer.add_document_from_text('Esmalte sintético', {'doc_id': 3})
+    writer.checkpoint()
+    assert reader.refresh_index() is True
+    assert reader.doc_ids == {1, 3}
+    assert reader.similarity_search('Esmalte sintético', k=1)[0].metadata == {
+        'doc_id': 3
+    }
+
+    writer.clear_knowledge_base()
+    assert reader.refresh_index() is True
+    assert reader.get_document_count() == 0
+
+
+def test_rag_service_embedding_cache_follows_index_writer(
+    mock_rag_embeddings, tmp_path
+):
+    """Test the index writer filling the cache its readers reload."""
+    from unittest.mock import patch
+
+    from apps.packpage.settings import get_settings
+
+    settings = get_settings().model_copy(
+        update={'RAG_EMBEDDING_CACHE_DIR': str(tmp_path / 'cache')}
+    )
+    index_dir = str(tmp_path / 'index')
+    with patch(
+        'apps.ia.services.rag_service.get_settings', return_value=settings
+    ):
+        reader = RAGService(index_dir=index_dir, role='reader')
+        writer = RAGService(index_dir=index_dir, role='auto')
+    assert writer.embedding_cache.writable is True
+    assert reader.embedding_cache.writable is False
+
+    writer.add_document_from_text('Tinta acrílica fosca', {'doc_id': 1})
+    writer.checkpoint()
+    assert reader.embedding_cache.get_many(['Tinta acrílica fosca']) == [None]
+
+    assert reader.refresh_index() is True
+    assert len(reader.embedding_cache) == 1
+    assert reader.embedding_cache.get_many(['Tinta acrílica fosca']) == (
+        writer.embedding_cache.get_many(['Tinta acrílica fosca'])
+    )
+
+
+def test_csv_enricher_resumes_after_crash(
+    mock_rag_embeddings, tmp_path, llm_gateway
+):
+    """Test CSV enrichment indexing in batches and resuming after a crash."""
+    from unittest.mock import Mock, patch
+
+    from apps.ia.services.csv_enricher import CSVEnricher
+    from apps.packpage.llm_gateway import TokenBucket
+
+    llm_gateway.requests = TokenBucket(10_000)
+    llm_gateway.tokens = TokenBucket(10_000_000)
+    csv_path = tmp_path / 'tintas.csv'
+    csv_path.write_text(
+        'nome,acabamento\n'
+        + '\n'.join(f'Tinta {i},fosco' for i in range(5))
+        + '\n'
+    )
+    index_dir = str(tmp_path / 'index')
+    llm = Mock()
+    llm.invoke.return_value = Mock(content='Descrição técnica')
+    rag_service = RAGService(index_dir=index_dir)
+    rag_service.llm = llm
+    add_documents = rag_service.add_documents
+    batches = []
+
+    def add_then_crash(texts, metadatas, **kwargs):
+        batches.append(texts)
+        if len(batches) > 1:
+            raise RuntimeError('falha no embedding')
+        add_documents(texts, metadatas, **kwargs)
+
+    with (
+        patch.object(rag_service, 'add_documents', add_then_crash),
+        pytest.raises(RuntimeError),
+    ):
+        CSVEnricher(
+            rag_service, str(csv_path), max_workers=2, batch_size=2
+        ).run()
+    indexed = len(batches[0])
+    assert 2 <= indexed < 5
+
+    # Novo processo: carrega o último checkpoint e retoma dali.
+    resumed = RAGService(index_dir=index_dir)
+    resumed.load_index()
+    resumed.llm = llm
+    enricher = CSVEnricher(resumed, str(csv_path), max_workers=2, batch_size=2)
+    with patch.object(
+        resumed, 'checkpoint', wraps=resumed.checkpoint
+    ) as checkpoint:
+        progress = enricher.run()
+
+    # Um único checkpoint para os lotes restantes, não um por lote.
+    assert checkpoint.call_count == 1
+    assert progress.status == 'completed'
+    assert progress.total_rows == 5
+    assert progress.rows_resumed == indexed
+    assert progress.rows_processed == 5 - indexed
+    assert progress.rows_per_second > 0
+    assert progress.eta_seconds == 0
+    assert sorted(doc.metadata['row_index'] for doc in resumed.documents) == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+
+    assert enricher.run().rows_processed == 0
+    # Recomeçar substitui os chunks do CSV em vez de duplicá-los.
+    assert enricher.run(restart=True).rows_processed == 5
+    assert resumed.get_document_count() == 5
+
+    # O progresso vem da geração publicada, sem registro à parte.
+    reloaded = RAGService(index_dir=index_dir)
+    reloaded.load_index()
+    reloaded.llm = llm
+    assert CSVEnricher(reloaded, str(csv_path)).run().rows_resumed == 5
+
+    # Esvaziar a base descarta o progresso: as linhas voltam a ser indexadas.
+    resumed.clear_knowledge_base()
+    assert enricher.run().rows_processed == 5
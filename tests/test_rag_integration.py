@@ -13,10 +13,10 @@ class TestRAGIntegration:
         """Test the RAG search tool function directly."""
 
         with patch(
-            'apps.ia.tools.rag_search_tool.RAGService'
-        ) as mock_rag_service_class:
+            'apps.ia.tools.rag_search_tool.get_rag_service'
+        ) as mock_get_rag_service:
             mock_rag_service = Mock()
-            mock_rag_service_class.return_value = mock_rag_service
+            mock_get_rag_service.return_value = mock_rag_service
 
             mock_doc = Mock()
             mock_doc.page_content = 'Este é um conteúdo de teste sobre IA.'
@@ -34,10 +34,10 @@ class TestRAGIntegration:
     def test_rag_search_tool_no_results(self):
         """Test RAG search tool when no documents are found."""
         with patch(
-            'apps.ia.tools.rag_search_tool.RAGService'
-        ) as mock_rag_service_class:
+            'apps.ia.tools.rag_search_tool.get_rag_service'
+        ) as mock_get_rag_service:
             mock_rag_service = Mock()
-            mock_rag_service_class.return_value = mock_rag_service
+            mock_get_rag_service.return_value = mock_rag_service
             mock_rag_service.similarity_search.return_value = []
 
             result = rag_search_function('termo inexistente')
@@ -47,10 +47,10 @@ class TestRAGIntegration:
     def test_rag_search_tool_error_handling(self):
         """Test RAG search tool error handling."""
         with patch(
-            'apps.ia.tools.rag_search_tool.RAGService'
-        ) as mock_rag_service_class:
+            'apps.ia.tools.rag_search_tool.get_rag_service'
+        ) as mock_get_rag_service:
             mock_rag_service = Mock()
-            mock_rag_service_class.return_value = mock_rag_service
+            mock_get_rag_service.return_value = mock_rag_service
             mock_rag_service.similarity_search.side_effect = Exception(
                 'Erro de teste'
             )
@@ -92,7 +92,8 @@ class TestRAGIntegration:
                 )
 
                 agent = ConversationAgent(mock_rag_service)
-                response = agent.process_query('Pergunta sobre documentos')
+                with patch.object(agent, 'route', return_value='crew'):
+                    response = agent.process_query('Pergunta sobre documentos')
 
                 # Verifica se o Crew foi criado e executado
                 mock_crew_class.assert_called_once()
@@ -3,3 +3,90 @@ def test_root_deve_retornar_200_e_ola_mundo(client):
 
     assert response.status_code == 200
     assert response.json() == {'message': 'Welcome to API!'}
+
+
+def test_lifespan_deve_compartilhar_rag_service(client):
+    from apps.core.clients.ai_clients import ai_clients, get_rag_service
+    from apps.ia.api.chat.router import get_chat_controller
+    from apps.ia.api.documents.router import doc_controller
+
+    rag_service = get_rag_service()
+
+    assert ai_clients.rag_service is rag_service
+    assert get_rag_service() is rag_service
+    assert doc_controller.rag_service is rag_service
+    # Todas as requisições usam o mesmo agente.
+    agent = get_chat_controller(rag_service).conversation_agent
+    assert agent is ai_clients.get_conversation_agent()
+    assert agent.rag_service is rag_service
+    assert get_chat_controller(rag_service).conversation_agent is agent
+
+
+def test_engine_options_deve_configurar_pool_e_pgbouncer(monkeypatch):
+    from apps.core.database.session import (
+        InstrumentedQueuePool,
+        engine_options,
+    )
+    from apps.packpage.settings import get_settings
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, 'DB_STATEMENT_TIMEOUT_MS', 5000)
+
+    assert engine_options('sqlite:///database.db') == {}
+
+    options = engine_options('postgresql://u:p@db/app')
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert options['pool_size'] == settings.DB_POOL_SIZE
+    assert options['pool_pre_ping'] is settings.DB_POOL_PRE_PING
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+    # PgBouncer não repassa `options` nem suporta prepared statements.
+    monkeypatch.setattr(settings, 'DB_PGBOUNCER', True)
+    assert 'connect_args' not in engine_options('postgresql://u:p@db/app')
+    assert engine_options('postgresql+psycopg://u:p@db/app')[
+        'connect_args'
+    ] == {'prepare_threshold': None}
+
+
+def test_pool_metrics_deve_medir_espera_e_utilizacao():
+    import pytest
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+    from apps.core.database.session import InstrumentedQueuePool, PoolMetrics
+
+    engine = create_engine(
+        'sqlite://',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    metrics = PoolMetrics()
+    metrics.bind(engine, capacity=1)
+
+    with engine.connect():
+        assert metrics.stats()['utilization'] == 1.0
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    stats = metrics.stats()
+    assert stats['capacity'] == 1
+    assert stats['checked_out'] == 0
+    assert stats['peak_checked_out'] == 1
+    assert stats['checkouts'] == 1
+    assert stats['timeouts'] == 1
+    assert stats['max_wait_ms'] >= 50
+    engine.dispose()
+
+
+def test_database_stats_deve_retornar_metricas_do_pool(client, token):
+    response = client.get(
+        '/database/stats', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == 200
+    assert 'checked_out' in response.json()
+    assert 'max_wait_ms' in response.json()
+
+    assert client.get('/database/stats').status_code == 401
@@ -118,7 +118,7 @@ def test_read_users_with_users(client, user, token):
     assert mocked_access_validation.assert_called_once
 
 
-def test_update_user_success(client, user, token):
+def test_update_user_success(client, session, user, token):
     with patch(
         'apps.core.api.user.router.validate_transaction_access'
     ) as mocked_access_validation:
@@ -141,6 +141,10 @@ def test_update_user_success(client, user, token):
     assert 'password' not in response.json()
     assert mocked_access_validation.assert_called_once
 
+    # Os tokens emitidos depois da alteração recarregam o usuário.
+    session.refresh(user)
+    assert user.permissions_version == 1
+
 
 def test_update_user_fail(client, user):
     with patch(